@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""run_benchmarks.py 결과 JSON 2개의 median 비교 (threshold 이상 느려진 항목이 있으면 종료 코드 1)
+
+    python compare_results.py results/old.json results/new.json --threshold 0.1
+"""
+
+import argparse
+import json
+import sys
+
+
+def flatten(scale):
+    """규모 1개 결과 → {측정 이름: median_ms}"""
+    out = {name: stats['median_ms'] for name, stats in scale.get('kernels', {}).items()}
+    for name, per_minute in scale.get('workers', {}).items():
+        for minute, stats in per_minute.items():
+            for kind in ('cold', 'warm'):
+                out[f'{name}.get_chart_data@{minute}.{kind}'] = stats[kind]['median_ms']
+    return out
+
+
+def compare(baseline, current, threshold=0.1):
+    """(출력 줄 목록, 느려진 항목 수)"""
+    base_scales = {(s['rows'], s['lots']): s for s in baseline['scales']}
+    lines, regressions = [], 0
+    for scale in current['scales']:
+        key = (scale['rows'], scale['lots'])
+        if key not in base_scales:
+            lines.append(f"{key[0]} rows / {key[1]} lots: no baseline")
+            continue
+        lines.append(f"{key[0]} rows / {key[1]} lots "
+                     f"(initialize {base_scales[key]['initialize_s']}s → {scale['initialize_s']}s)")
+        old, new = flatten(base_scales[key]), flatten(scale)
+        for name in sorted(new):
+            if name not in old:
+                continue
+            ratio = new[name] / old[name] if old[name] > 0 else float('inf')
+            flag = ''
+            if ratio > 1 + threshold:
+                flag = '  SLOWER'
+                regressions += 1
+            elif ratio < 1 - threshold:
+                flag = '  faster'
+            lines.append(f"  {name:<56} {old[name]:>10.3f} → {new[name]:>10.3f} ms  x{ratio:.2f}{flag}")
+    return lines, regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='compare two benchmark result files')
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=0.1, help='느려짐/빨라짐 표시 기준 비율')
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(args.current, encoding='utf-8') as f:
+        current = json.load(f)
+    lines, regressions = compare(baseline, current, args.threshold)
+    print('\n'.join(lines))
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""대시보드 polling 패턴 부하 테스트 (workers_server.py 또는 unreal app.py)
+
+세션 N 개가 각각 lot 을 set-lot 한 뒤 interval(기본 5초)마다 Worker1/2/5/6 data 를 동시에 요청하고,
+가끔 lot 을 바꾸거나 InfoBox 시각을 임의 분으로 옮긴다. 세션 수를 늘려 가며 endpoint 별
+p50/p95/p99 지연, 처리량, 오류율을 재고, poll 1회(4개 요청) p95 가 interval 을 넘거나 오류율이
+기준을 넘는 첫 세션 수를 포화 지점으로 보고한다.
+
+    python load_test.py --spawn --rows 100k --lots 1000 --sessions 10 25 50 100 --duration 60
+    python load_test.py --url http://127.0.0.1:5002 --csv ../../public/worker_dashboard/simulate_paper_data.csv
+    python load_test.py --target unreal --url http://127.0.0.1:5000 --csv <품질 데이터 CSV>
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from synthetic_data import ensure_paper_csv, parse_count
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+WORKERS_SERVER = os.path.join(BENCH_DIR, '..', 'workers', 'workers_server.py')
+WORKERS = ('worker1', 'worker2', 'worker5', 'worker6')
+
+
+class Recorder:
+    """endpoint 별 지연(ms) / 오류 기록 (스레드 안전)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+        self.statuses = {}
+        self.ticks = []      # poll 1회 전체 시간 (ms)
+
+    def add(self, endpoint, ms, status):
+        with self._lock:
+            self.latencies.setdefault(endpoint, []).append(ms)
+            self.statuses.setdefault(endpoint, {}).setdefault(str(status), 0)
+            self.statuses[endpoint][str(status)] += 1
+            if status != 200:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def add_tick(self, ms):
+        with self._lock:
+            self.ticks.append(ms)
+
+
+def percentiles(samples):
+    if not samples:
+        return {'count': 0}
+    values = np.asarray(samples, dtype=float)
+    return {
+        'count': len(values),
+        'p50_ms': round(float(np.percentile(values, 50)), 1),
+        'p95_ms': round(float(np.percentile(values, 95)), 1),
+        'p99_ms': round(float(np.percentile(values, 99)), 1),
+        'max_ms': round(float(values.max()), 1),
+    }
+
+
+class Client:
+    def __init__(self, base_url, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def request(self, path, body=None, session_id=None):
+        """(HTTP status, JSON body 또는 None, 지연 ms), 연결 실패 / timeout 은 status 0"""
+        headers = {'Content-Type': 'application/json'}
+        if session_id:
+            headers['X-Session-Id'] = session_id
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, headers=headers,
+                                     method='POST' if body is not None else 'GET')
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                payload = resp.read()
+                status = resp.status
+        except urllib.error.HTTPError as e:
+            payload, status = e.read(), e.code
+        except Exception:
+            return 0, None, (time.perf_counter() - started) * 1000
+        ms = (time.perf_counter() - started) * 1000
+        try:
+            return status, json.loads(payload), ms
+        except ValueError:
+            return status, None, ms
+
+
+class PollingSession:
+    """클라이언트 1개: tick 마다 (가끔 lot 전환 후) poll, 하위 클래스가 switch_lot / poll 구현"""
+
+    def __init__(self, index, client, lots, args, recorder, pool):
+        self.session_id = f'load-{index}'
+        self.client = client
+        self.lots = lots
+        self.args = args
+        self.recorder = recorder
+        self.pool = pool
+        self.rng = np.random.default_rng([args.seed, index])
+        self.lot = None
+
+    def _call(self, endpoint, path, body=None):
+        status, payload, ms = self.client.request(path, body, self.session_id)
+        self.recorder.add(endpoint, ms, status)
+        return payload
+
+    def _call_all(self, calls):
+        """[(endpoint, path, body)] 동시 요청, 응답 목록"""
+        futures = [self.pool.submit(self._call, *call) for call in calls]
+        return [future.result() for future in futures]
+
+    def _chance(self, every):
+        """평균 every 초마다 1번 일어나는 사건의 이번 tick 발생 여부"""
+        return self.rng.random() < self.args.interval / every
+
+    def tick(self):
+        if self.lot is None or self._chance(self.args.lot_switch_every):
+            self.lot = self.lots[int(self.rng.integers(len(self.lots)))]
+            self.switch_lot()
+        self.poll()
+
+
+class DashboardSession(PollingSession):
+    """workers_server 대시보드 1개: set-lot ×4, 이후 tick 마다 /workerN/data ×4 동시 요청"""
+
+    def switch_lot(self):
+        responses = self._call_all([(f'{name}/set-lot', f'/{name}/set-lot', {'lot': self.lot}) for name in WORKERS])
+        info = responses[WORKERS.index('worker2')] or {}
+        self.base_time = pd.Timestamp(info['base_time']) if info.get('base_time') else None
+        self.max_minutes = int(info.get('max_minutes') or 0)
+        self.timestamp = None  # InfoBox 시각 (None 이면 서버 cursor 자동 진행)
+
+    def poll(self):
+        if self.base_time is not None and self._chance(self.args.jump_every):
+            minute = int(self.rng.integers(self.max_minutes + 1))
+            self.timestamp = self.base_time + pd.Timedelta(minutes=minute)
+        elif self.timestamp is not None:
+            self.timestamp += pd.Timedelta(minutes=1)
+
+        query = ''
+        if self.timestamp is not None:
+            query = '?' + urllib.parse.urlencode({'timestamp': self.timestamp.strftime('%Y-%m-%d %H:%M')})
+        self._call_all([(f'{name}/data', f'/{name}/data{query}') for name in WORKERS])
+
+
+class UnrealSession(PollingSession):
+    """unreal app.py 클라이언트 1개: tick 마다 lot 경과 분을 1분씩 늘려 POST (가끔 임의 분으로 이동)"""
+
+    def switch_lot(self):
+        self.minutes = 0
+
+    def poll(self):
+        if self._chance(self.args.jump_every):
+            self.minutes = int(self.rng.integers(1, self.args.max_minutes + 1))
+        else:
+            self.minutes += 1
+        body = {'lot': self.lot, 'minutes': self.minutes}
+        self._call_all([(name, f'/{name}', body) for name in self.args.unreal_endpoints])
+
+
+def run_sessions(count, client, lots, args):
+    """세션 count 개를 duration 초 동안 실행한 단계 결과"""
+    recorder = Recorder()
+    session_cls = UnrealSession if args.target == 'unreal' else DashboardSession
+    per_session = len(args.unreal_endpoints) if args.target == 'unreal' else len(WORKERS)
+    pool = ThreadPoolExecutor(max_workers=count * per_session)
+    stop_at = time.monotonic() + args.duration
+
+    def run(index):
+        session = session_cls(index, client, lots, args, recorder, pool)
+        # 세션 시작 시각을 interval 안에 분산 (대시보드끼리 poll 시점이 맞물리지 않음)
+        next_tick = time.monotonic() + args.interval * index / count
+        while True:
+            time.sleep(max(next_tick - time.monotonic(), 0))
+            if time.monotonic() >= stop_at:
+                break
+            started = time.perf_counter()
+            session.tick()
+            recorder.add_tick((time.perf_counter() - started) * 1000)
+            # poll 이 interval 보다 길면 밀린 tick 은 건너뛰고 바로 다음 poll
+            next_tick = max(next_tick + args.interval, time.monotonic())
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=run, args=(i,), daemon=True) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    pool.shutdown(wait=True)
+    elapsed = time.monotonic() - started
+
+    endpoints = {}
+    total = errors = 0
+    for endpoint in sorted(recorder.latencies):
+        samples = recorder.latencies[endpoint]
+        endpoint_errors = recorder.errors.get(endpoint, 0)
+        total += len(samples)
+        errors += endpoint_errors
+        endpoints[endpoint] = {
+            **percentiles(samples),
+            'errors': endpoint_errors,
+            'error_rate': round(endpoint_errors / len(samples), 4),
+            'throughput_rps': round(len(samples) / elapsed, 2),
+            'statuses': recorder.statuses[endpoint],
+        }
+
+    poll = percentiles(recorder.ticks)
+    error_rate = errors / total if total else 0.0
+    saturated = (poll.get('p95_ms', 0) > args.interval * 1000) or error_rate > args.max_error_rate
+    return {
+        'sessions': count,
+        'elapsed_s': round(elapsed, 1),
+        'requests': total,
+        'throughput_rps': round(total / elapsed, 2),
+        'error_rate': round(error_rate, 4),
+        'poll': {**poll, 'overruns': sum(ms > args.interval * 1000 for ms in recorder.ticks)},
+        'endpoints': endpoints,
+        'saturated': bool(saturated),
+    }
+
+
+def print_step(step):
+    poll = step['poll']
+    print(f"[load] {step['sessions']:>4} sessions: {step['throughput_rps']:>7.1f} req/s, "
+          f"errors {step['error_rate'] * 100:.2f}%, poll p50/p95/p99 "
+          f"{poll.get('p50_ms', 0):.0f}/{poll.get('p95_ms', 0):.0f}/{poll.get('p99_ms', 0):.0f} ms"
+          f"{'  SATURATED' if step['saturated'] else ''}")
+    for endpoint, stats in step['endpoints'].items():
+        print(f"         {endpoint:<22} n={stats['count']:<6} p50 {stats.get('p50_ms', 0):>8.1f}  "
+              f"p95 {stats.get('p95_ms', 0):>8.1f}  p99 {stats.get('p99_ms', 0):>8.1f} ms  "
+              f"err {stats['error_rate'] * 100:.2f}%")
+
+
+def load_lots(args):
+    if args.lots_list:
+        return args.lots_list
+    if not args.csv:
+        raise SystemExit('--csv (또는 --lot-list / --spawn) 로 lot 목록을 지정해야 합니다')
+    lots = pd.read_csv(args.csv, usecols=['lot'])['lot'].dropna().unique().tolist()
+    return [str(lot) for lot in lots]
+
+
+def wait_for(client, path, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status, _, _ = client.request(path)
+        if status == 200:
+            return True
+        time.sleep(0.5)
+    return False
+
+
+def spawn_server(args):
+    """합성 데이터(또는 --csv)로 workers_server.py 실행, (프로세스, URL)"""
+    if not args.csv:
+        args.csv = ensure_paper_csv(args.data_dir, parse_count(args.rows), parse_count(args.lots), args.seed)
+    env = {**os.environ, 'WORKERS_CSV': os.path.abspath(args.csv)}
+    log = open(os.path.join(args.data_dir, 'workers_server.log'), 'w')
+    proc = subprocess.Popen([sys.executable, WORKERS_SERVER, '--port', str(args.port)],
+                            env=env, stdout=log, stderr=subprocess.STDOUT)
+    return proc, f'http://127.0.0.1:{args.port}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='dashboard polling load test')
+    parser.add_argument('--target', default='workers', choices=['workers', 'unreal'])
+    parser.add_argument('--url', default='http://127.0.0.1:5002')
+    parser.add_argument('--spawn', action='store_true', help='workers_server.py 를 직접 실행 (workers 대상)')
+    parser.add_argument('--port', type=int, default=5102, help='--spawn 서버 포트')
+    parser.add_argument('--csv', help='lot 목록을 읽을 CSV (--spawn 이면 서버 데이터)')
+    parser.add_argument('--lot-list', dest='lots_list', nargs='+', help='사용할 lot 목록')
+    parser.add_argument('--rows', default='100k', help='--spawn 합성 데이터 행 수')
+    parser.add_argument('--lots', default='1000', help='--spawn 합성 데이터 lot 수')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data-dir', default=os.path.join(BENCH_DIR, '.bench_data'))
+    parser.add_argument('--sessions', nargs='+', type=int, default=[5, 10, 25, 50, 100], help='단계별 세션 수')
+    parser.add_argument('--duration', type=float, default=60.0, help='단계별 실행 시간 (초)')
+    parser.add_argument('--interval', type=float, default=5.0, help='poll 간격 (초)')
+    parser.add_argument('--lot-switch-every', type=float, default=300.0, help='세션별 평균 lot 전환 간격 (초)')
+    parser.add_argument('--jump-every', type=float, default=120.0, help='세션별 평균 InfoBox 시각 이동 간격 (초)')
+    parser.add_argument('--timeout', type=float, default=30.0, help='요청 timeout (초)')
+    parser.add_argument('--max-error-rate', type=float, default=0.01, help='포화로 볼 오류율')
+    parser.add_argument('--keep-going', action='store_true', help='포화 후에도 남은 단계 실행')
+    parser.add_argument('--unreal-endpoints', nargs='+', default=['quality_and_steam'],
+                        choices=['quality_score', 'predict_steam', 'quality_and_steam'])
+    parser.add_argument('--max-minutes', type=int, default=120, help='unreal 분 이동 범위')
+    parser.add_argument('--out', help='결과 JSON (기본: results/load-<시각>.json)')
+    args = parser.parse_args()
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    proc = None
+    if args.spawn:
+        if args.target != 'workers':
+            raise SystemExit('--spawn 은 workers 대상만 지원합니다')
+        proc, args.url = spawn_server(args)
+    client = Client(args.url, args.timeout)
+
+    report = {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'target': args.target,
+            'url': args.url,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'args': {k: v for k, v in vars(args).items() if k not in ('data_dir', 'out', 'lots_list')},
+        },
+        'steps': [],
+        'saturation_sessions': None,
+        'max_ok_sessions': None,
+    }
+    try:
+        lots = load_lots(args)
+        if args.target == 'workers':
+            if not wait_for(client, '/health', 120):
+                raise SystemExit(f'{args.url} 가 응답하지 않습니다')
+            started = time.perf_counter()
+            status, body, _ = client.request('/init')
+            if status != 200:
+                raise SystemExit(f'/init 실패: {body}')
+            report['init_s'] = round(time.perf_counter() - started, 2)
+            print(f"[load] {args.url} initialized in {report['init_s']}s, {len(lots)} lots")
+
+        for count in sorted(args.sessions):
+            step = run_sessions(count, client, lots, args)
+            print_step(step)
+            report['steps'].append(step)
+            if step['saturated']:
+                if report['saturation_sessions'] is None:
+                    report['saturation_sessions'] = count
+                if not args.keep_going:
+                    break
+            elif report['saturation_sessions'] is None:
+                report['max_ok_sessions'] = count
+
+        if args.target == 'workers':
+            _, health, _ = client.request('/health')
+            report['server_health'] = health
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    if report['saturation_sessions'] is not None:
+        print(f"[load] Saturated at {report['saturation_sessions']} sessions "
+              f"(last healthy: {report['max_ok_sessions']})")
+    else:
+        print(f"[load] No saturation up to {max(args.sessions)} sessions")
+
+    out = args.out or os.path.join(BENCH_DIR, 'results', 'load-' + datetime.now().strftime('%Y%m%d-%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+    print(f"[load] Results saved to {out}")
+
+
+if __name__ == '__main__':
+    main()
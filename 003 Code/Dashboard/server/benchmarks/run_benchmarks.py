@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""점수 kernel / worker get_chart_data 성능 측정 → JSON 저장
+
+규모(행 수:lot 수)마다 합성 CSV 로 DataProcessor 를 초기화한 뒤
+  kernels: get_st, get_aj, get_y, get_wi, get_y_batch, LotCutoffIndex 생성, worker 분 단위 계산 함수
+  workers: Worker1/2/5/6 get_chart_data (cold: 캐시 비우고 set-lot 직후 첫 호출, warm: 같은 호출 반복)
+을 측정한다. 결과 비교는 compare_results.py.
+
+    python run_benchmarks.py --scales 10k:100 100k:1000 1M:5000 --minutes 0 10 30 60
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'workers'))
+
+from common import DataProcessor, get_aj, get_st, get_wi, get_y, get_y_batch
+from cutoff_index import LotCutoffIndex
+from bounded_cache import cache_registry
+from worker1 import Worker1
+from worker2 import Worker2
+from worker5 import Worker5
+from worker6 import Worker6
+from synthetic_data import ensure_paper_csv, parse_count
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+INPUT_COLS = ['x5', 'x1', 'x3', 'x2', 'x4']
+RATIOS = [0.2, 0.6, 0.2]
+
+WORKERS = {'worker1': Worker1, 'worker2': Worker2, 'worker5': Worker5, 'worker6': Worker6}
+# /workerN/set-lot 과 같은 lot 초기화
+SET_LOT = {
+    'worker1': lambda worker, lot: worker.calculate_similar_lots(lot, up_to_minute=0),
+    'worker2': lambda worker, lot: worker.calculate_strategy(lot),
+    'worker5': lambda worker, lot: worker.calculate_importance(lot),
+    'worker6': lambda worker, lot: worker.calculate_sensitivity(lot),
+}
+
+
+def summarize(samples_ms):
+    samples = np.asarray(samples_ms, dtype=float)
+    return {
+        'repeat': len(samples),
+        'min_ms': round(float(samples.min()), 3),
+        'median_ms': round(float(np.median(samples)), 3),
+        'mean_ms': round(float(samples.mean()), 3),
+        'max_ms': round(float(samples.max()), 3),
+    }
+
+
+def timed(func, repeat, setup=None):
+    """setup() 후 func() 실행 시간(ms) repeat 회, worker print 출력은 버림"""
+    samples = []
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            if setup is not None:
+                setup()
+            started = time.perf_counter()
+            func()
+            samples.append((time.perf_counter() - started) * 1000)
+    return summarize(samples)
+
+
+def pick_lot(dp):
+    """길이 중앙값 lot (대표 lot)"""
+    lots = list(dp.lot_index)
+    lengths = np.array([stop - start for start, stop in dp.lot_index.values()])
+    return lots[int(np.argsort(lengths, kind='stable')[len(lots) // 2])]
+
+
+def bench_kernels(dp, lot, minutes, repeat):
+    lot_df = dp.get_lot_df(lot)
+    paper, bw = lot_df['paper'].iloc[0], lot_df['bw'].iloc[0]
+    x_ref, x_tol = dp.ref_dict.get((paper, bw), {}), dp.tol_dict.get((paper, bw), {})
+    group_df = dp.get_group_df(paper, bw)
+    w_vec = dp.get_weights(INPUT_COLS)
+    score_mat = get_st(lot_df, INPUT_COLS, x_ref, x_tol)
+    a_ij = get_aj(lot_df, INPUT_COLS, RATIOS)
+    _, values, offsets = dp.get_group_block(paper, bw, INPUT_COLS)
+    lot_values, lot_dates = lot_df[INPUT_COLS].to_numpy(), lot_df['date'].to_numpy()
+
+    out = {
+        'get_st': timed(lambda: get_st(lot_df, INPUT_COLS, x_ref, x_tol), repeat),
+        'get_aj': timed(lambda: get_aj(lot_df, INPUT_COLS, RATIOS), repeat),
+        'get_y': timed(lambda: get_y(score_mat, a_ij, w_vec), repeat),
+        'get_wi.group': timed(lambda: get_wi(group_df, INPUT_COLS), repeat),
+        'get_y_batch.group': timed(
+            lambda: get_y_batch(values, offsets, INPUT_COLS, x_ref, x_tol, w_vec, ratios=RATIOS), repeat
+        ),
+        'cutoff_index.build': timed(
+            lambda: LotCutoffIndex(lot_values, lot_dates, INPUT_COLS, x_ref, x_tol, ratios=RATIOS), repeat
+        ),
+    }
+
+    worker1, worker2, worker5, worker6 = Worker1(dp), Worker2(dp), Worker5(dp), Worker6(dp)
+    out['worker1.checkpoint_table'] = timed(lambda: worker1._build_checkpoint_table(paper, bw), repeat)
+    with contextlib.redirect_stdout(io.StringIO()):
+        worker1.calculate_similar_lots(lot, up_to_minute=0)
+    for minute in minutes:
+        recalc = Worker1.recalc_minute(minute)
+        out[f'worker1.calculate_similar_lots@{minute}'] = timed(
+            lambda: worker1.calculate_similar_lots(lot, up_to_minute=recalc), repeat
+        )
+        out[f'worker2._calculate_strategy_for_cutoff@{minute}'] = timed(
+            lambda: worker2._calculate_strategy_for_cutoff(lot, minute), repeat
+        )
+        out[f'worker5._calculate_importance_for_cutoff@{minute}'] = timed(
+            lambda: worker5._calculate_importance_for_cutoff(lot, minute), repeat
+        )
+        out[f'worker6._calculate_sensitivity_for_cutoff@{minute}'] = timed(
+            lambda: worker6._calculate_sensitivity_for_cutoff(lot, minute), repeat
+        )
+    return out
+
+
+def bench_workers(dp, lot, minutes, repeat):
+    out = {}
+    for name, worker_cls in WORKERS.items():
+        out[name] = {}
+        for minute in minutes:
+            state = {}
+
+            def cold_setup():
+                cache_registry.clear()
+                state['worker'] = worker_cls(dp)
+                SET_LOT[name](state['worker'], lot)
+
+            cold = timed(lambda: state['worker'].get_chart_data(lot, minute), repeat, setup=cold_setup)
+            warm = timed(lambda: state['worker'].get_chart_data(lot, minute), repeat)
+            out[name][str(minute)] = {'cold': cold, 'warm': warm}
+    return out
+
+
+def run_scale(rows, lots, args):
+    csv_path = ensure_paper_csv(args.data_dir, rows, lots, args.seed)
+    cache_registry.clear()
+    dp = DataProcessor(csv_path, ingest=args.ingest)
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        dp.initialize()
+    initialize_s = time.perf_counter() - started
+
+    lot = args.lot or pick_lot(dp)
+    result = {
+        'rows': rows,
+        'lots': lots,
+        'seed': args.seed,
+        'lot': lot,
+        'lot_rows': len(dp.get_lot_df(lot)),
+        'initialize_s': round(initialize_s, 3),
+    }
+    print(f"[bench] {rows} rows / {lots} lots: initialize {initialize_s:.2f}s, lot {lot} ({result['lot_rows']} rows)")
+    if 'kernels' in args.suites:
+        result['kernels'] = bench_kernels(dp, lot, args.minutes, args.repeat)
+    if 'workers' in args.suites:
+        result['workers'] = bench_workers(dp, lot, args.minutes, args.repeat)
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_summary(result):
+    for name, stats in result.get('kernels', {}).items():
+        print(f"  {name:<52} {stats['median_ms']:>10.3f} ms")
+    for name, per_minute in result.get('workers', {}).items():
+        for minute, stats in per_minute.items():
+            print(f"  {name}.get_chart_data@{minute:<30} cold {stats['cold']['median_ms']:>9.3f} ms"
+                  f"  warm {stats['warm']['median_ms']:>9.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='scoring kernel / worker endpoint benchmarks')
+    parser.add_argument('--scales', nargs='+', default=['10k:100', '100k:1000'],
+                        help='행 수:lot 수 목록 (10k:100 ~ 10M:50k)')
+    parser.add_argument('--minutes', nargs='+', type=int, default=[0, 10, 30, 60])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--suites', nargs='+', default=['kernels', 'workers'], choices=['kernels', 'workers'])
+    parser.add_argument('--lot', help='측정 lot (기본: 길이 중앙값 lot)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--ingest', default='default', choices=['default', 'typed'])
+    parser.add_argument('--data-dir', default=os.path.join(BENCH_DIR, '.bench_data'), help='합성 CSV 캐시 위치')
+    parser.add_argument('--out', help='결과 JSON (기본: results/<시각>.json)')
+    args = parser.parse_args()
+
+    scales = []
+    for scale in args.scales:
+        rows, _, lots = scale.partition(':')
+        scales.append((parse_count(rows), parse_count(lots or '100')))
+
+    report = {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'args': {k: v for k, v in vars(args).items() if k not in ('data_dir', 'out')},
+        },
+        'scales': [],
+    }
+    for rows, lots in scales:
+        result = run_scale(rows, lots, args)
+        print_summary(result)
+        report['scales'].append(result)
+
+    out = args.out or os.path.join(BENCH_DIR, 'results', datetime.now().strftime('%Y%m%d-%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+    print(f"[bench] Results saved to {out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""simulate_paper_data.csv 스키마(lot, paper, bw, width, x1..x18, timestamp) 합성 데이터 생성
+
+lot 은 1분 간격으로 이어지고, 변수값은 lot 마다 새로 시작하는 random walk + 잡음이다.
+결측(1%), x3 spike(0.2%), x18 대량 결측(40%)을 넣어 전처리 경로도 실제와 같이 거친다.
+"""
+
+import argparse
+import os
+import numpy as np
+import pandas as pd
+
+COLUMNS = ['lot', 'paper', 'bw', 'width'] + [f'x{j}' for j in range(1, 19)] + ['timestamp']
+PAPERS = ['KB', 'SC', 'WL', 'MG']
+BWS = [70, 80, 100, 120]
+X_BASE = {2: 900.0, 3: 7.0, 4: 3.0, 5: 50.0}  # x1 은 평량(bw), 나머지는 10·j
+START = pd.Timestamp('2022-01-01 00:00:00')
+
+
+def parse_count(text):
+    """'10k', '1.5M', '50000' → int"""
+    text = str(text).strip()
+    scale = {'k': 1_000, 'm': 1_000_000}.get(text[-1:].lower(), 1)
+    return int(float(text[:-1] if scale > 1 else text) * scale)
+
+
+def lot_lengths(rows, lots, seed=0):
+    """lot 별 행 수 (평균 rows/lots 의 0.5~1.5배, 합계 rows)"""
+    if lots <= 0 or rows < lots:
+        raise ValueError(f'rows ({rows}) must be >= lots ({lots}) > 0')
+    rng = np.random.default_rng([seed, 0])
+    weights = rng.uniform(0.5, 1.5, lots)
+    lengths = np.maximum(np.floor(weights / weights.sum() * rows).astype(np.int64), 1)
+    # 반올림 차이는 긴 lot 부터 1행씩 조정
+    diff = int(rows - lengths.sum())
+    order = np.argsort(-lengths, kind='stable')
+    lengths[order[:abs(diff)]] += 1 if diff > 0 else -1
+    return lengths
+
+
+def _chunk_frame(lot_ids, lengths, row_start, rng):
+    """lot_ids (연속 lot 번호) 의 DataFrame, row_start 는 전체 데이터 기준 첫 행 번호"""
+    n = int(lengths.sum())
+    lot_of_row = np.repeat(lot_ids, lengths)
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    papers = np.array(PAPERS)[lot_ids % len(PAPERS)]
+    bws = np.array(BWS)[(lot_ids // len(PAPERS)) % len(BWS)]
+
+    data = {
+        'lot': np.repeat([f'L{k:06d}' for k in lot_ids], lengths),
+        'paper': np.repeat(papers, lengths),
+        'bw': np.repeat(bws, lengths),
+        'width': np.repeat(5000 + (lot_ids % 4) * 100, lengths),
+    }
+    for j in range(1, 19):
+        base = np.repeat(bws.astype(float), lengths) if j == 1 else X_BASE.get(j, 10.0 * j)
+        step = rng.normal(0, 1 + 0.1 * j, n) * 0.1
+        walk = np.cumsum(step)
+        walk -= np.repeat(walk[starts] - step[starts], lengths)  # lot 마다 0 근처에서 다시 시작
+        values = base + walk + rng.normal(0, 0.5, n)
+        values[rng.random(n) < (0.4 if j == 18 else 0.01)] = np.nan
+        if j == 3:
+            values[rng.random(n) < 0.002] = 1e4
+        data[f'x{j}'] = values
+
+    # lot 사이 1분 간격
+    minutes = row_start + np.arange(n) + lot_of_row
+    data['timestamp'] = START + pd.to_timedelta(minutes, unit='min')
+    return pd.DataFrame(data, columns=COLUMNS)
+
+
+def iter_paper_data(rows, lots, seed=0, chunk_rows=1_000_000):
+    """lot 경계에서 나눈 DataFrame chunk generator (chunk 마다 독립 난수열, 메모리는 chunk 크기만큼)"""
+    lengths = lot_lengths(rows, lots, seed)
+    ends = np.cumsum(lengths)
+    first, row_start, chunk = 0, 0, 1
+    while first < lots:
+        last = int(np.searchsorted(ends, row_start + chunk_rows, side='right'))
+        last = min(max(last, first + 1), lots)
+        lot_ids = np.arange(first, last)
+        rng = np.random.default_rng([seed, chunk])
+        yield _chunk_frame(lot_ids, lengths[first:last], row_start, rng)
+        row_start = int(ends[last - 1])
+        first, chunk = last, chunk + 1
+
+
+def generate_paper_data(rows, lots, seed=0):
+    """합성 데이터 전체 DataFrame (작은 규모용)"""
+    return pd.concat(list(iter_paper_data(rows, lots, seed)), ignore_index=True)
+
+
+def write_paper_csv(path, rows, lots, seed=0, chunk_rows=1_000_000):
+    """합성 데이터를 chunk 단위로 CSV 저장 (임시 파일에 쓴 뒤 교체)"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + '.tmp'
+    for i, frame in enumerate(iter_paper_data(rows, lots, seed, chunk_rows)):
+        frame.to_csv(tmp, mode='w' if i == 0 else 'a', header=(i == 0), index=False,
+                     date_format='%Y-%m-%d %H:%M:%S')
+    os.replace(tmp, path)
+    return path
+
+
+def ensure_paper_csv(data_dir, rows, lots, seed=0):
+    """data_dir 에 (rows, lots, seed) 합성 CSV 가 없으면 생성, 경로 반환"""
+    path = os.path.join(data_dir, f'paper_{rows}_{lots}_{seed}.csv')
+    if not os.path.exists(path):
+        print(f"[bench] Generating {rows} rows / {lots} lots → {path}")
+        write_paper_csv(path, rows, lots, seed)
+    return path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', default='100k', help='행 수 (10k ~ 10M)')
+    parser.add_argument('--lots', default='1000', help='lot 수 (100 ~ 50k)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', required=True, help='CSV 경로')
+    args = parser.parse_args()
+    print(write_paper_csv(args.out, parse_count(args.rows), parse_count(args.lots), args.seed))
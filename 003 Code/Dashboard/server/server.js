@@ -4,6 +4,7 @@ import cors from "cors";
 import fs from "fs";
 import path from "path";
 import { fileURLToPath } from "url";
+import { applyDeltaOps, diffPayload } from "../src/utils/payloadDelta.js";
 
 // Node 18+ 환경 가정: 글로벌 fetch 사용
 
@@ -26,6 +27,57 @@ app.use(
 app.use(express.json({ limit: "10mb" }));
 app.use(express.urlencoded({ extended: true }));
 
+// Flask /workerN/data delta 응답용 client ID (프로세스 단위)
+const DELTA_CLIENT_ID = `node-${process.pid}`;
+
+// 워커 SSE 방식 (poll: 브라우저 연결별 5초 polling, relay: Flask /workerN/stream 1개를 모든 연결에 분배)
+const WORKER_STREAM_MODE = process.env.WORKER_STREAM_MODE || "poll";
+
+/**
+ * Flask /workerN/data 조회 (delta 모드)
+ * - 직전 version을 since로 보내고, 변경분(ops)을 state.data에 적용해 전체 data로 복원
+ * - base가 현재 version과 다르면(동시 요청 응답 순서 역전 등) 전체 스냅샷 재요청
+ */
+async function fetchWorkerData(url, state, allowDelta = true) {
+  const params = [`client=${encodeURIComponent(DELTA_CLIENT_ID)}`];
+  if (allowDelta && state.version) {
+    params.push(`since=${encodeURIComponent(state.version)}`);
+  }
+  const response = await fetch(`${url}${url.includes("?") ? "&" : "?"}${params.join("&")}`);
+  const result = await response.json();
+  if (result?.status !== "ok" || result.full === undefined) {
+    return result;
+  }
+  if (!result.full) {
+    if (result.base !== state.version || state.data === null) {
+      return fetchWorkerData(url, state, false);
+    }
+    result.data = applyDeltaOps(state.data, result.ops);
+  }
+  state.version = result.version;
+  state.data = result.data;
+  return result;
+}
+
+/**
+ * SSE 전송기: 연결별 직전 payload와 비교해 두 번째 메시지부터 변경분만 전송
+ * - 전체: { ...payload, stream_version }
+ * - 변경분: { stream_delta: true, base, ops } (ops에 stream_version 갱신 포함)
+ */
+function createStreamSender(res) {
+  let last = null;
+  let version = 0;
+  return (payload) => {
+    version += 1;
+    const next = { ...payload, stream_version: version };
+    const message = last
+      ? { stream_delta: true, base: last.stream_version, ops: diffPayload(last, next) }
+      : next;
+    last = next;
+    res.write(`data: ${JSON.stringify(message)}\n\n`);
+  };
+}
+
 /**
  * 페이퍼 CSV 재생 상태
  */
@@ -42,6 +94,7 @@ const START_PERCENTAGE = parseInt(process.env.START_PERCENTAGE) || 30;
 class WorkerManager {
   constructor() {
     this.worker1Url = "http://localhost:5002/worker1";
+    this.dataDelta = { version: null, data: null }; // delta 응답 복원 상태
     this.isInitialized = false;
     this.currentLot = null;
     this.currentMinute = 0;
@@ -132,8 +185,7 @@ class WorkerManager {
     const url = `${this.worker1Url}/data${params.length ? `?${params.join("&")}` : ""}`;
 
     try {
-      const response = await fetch(url);
-      const result = await response.json();
+      const result = await fetchWorkerData(url, this.dataDelta);
 
       if (result?.status === "ok") {
         // Python 서버에서 받은 증가된 current_minute를 반영
@@ -235,6 +287,7 @@ class WorkerManager {
 class WorkerManager2 {
   constructor() {
     this.worker2Url = "http://localhost:5002/worker2";
+    this.dataDelta = { version: null, data: null }; // delta 응답 복원 상태
     this.isInitialized = false;
     this.currentLot = null;
     this.currentMinute = 0;
@@ -325,8 +378,7 @@ class WorkerManager2 {
     const url = `${this.worker2Url}/data${params.length ? `?${params.join("&")}` : ""}`;
 
     try {
-      const response = await fetch(url);
-      const result = await response.json();
+      const result = await fetchWorkerData(url, this.dataDelta);
 
       if (result?.status === "ok") {
         // Python 서버에서 받은 증가된 current_minute를 반영 (Worker1과 동일)
@@ -365,6 +417,7 @@ class WorkerManager2 {
 class WorkerManager5 {
   constructor() {
     this.worker5Url = "http://localhost:5002/worker5";
+    this.dataDelta = { version: null, data: null }; // delta 응답 복원 상태
     this.isInitialized = false;
     this.currentLot = null;
     this.currentMinute = 0;
@@ -446,8 +499,7 @@ class WorkerManager5 {
     const url = `${this.worker5Url}/data${params.length ? `?${params.join("&")}` : ""}`;
 
     try {
-      const response = await fetch(url);
-      const result = await response.json();
+      const result = await fetchWorkerData(url, this.dataDelta);
 
       if (result?.status === "ok") {
         this.currentMinute = result.current_minute || (this.currentMinute + 1);
@@ -484,6 +536,7 @@ class WorkerManager5 {
 class WorkerManager6 {
   constructor() {
     this.worker6Url = "http://localhost:5002/worker6";
+    this.dataDelta = { version: null, data: null }; // delta 응답 복원 상태
     this.isInitialized = false;
     this.currentLot = null;
     this.currentMinute = 0;
@@ -565,8 +618,7 @@ class WorkerManager6 {
     const url = `${this.worker6Url}/data${params.length ? `?${params.join("&")}` : ""}`;
 
     try {
-      const response = await fetch(url);
-      const result = await response.json();
+      const result = await fetchWorkerData(url, this.dataDelta);
 
       if (result?.status === "ok") {
         // Python 서버에서 받은 minute 값 사용 (요청한 분 그대로)
@@ -603,6 +655,134 @@ const workerManager2 = new WorkerManager2();
 const workerManager5 = new WorkerManager5();
 const workerManager6 = new WorkerManager6();
 
+/**
+ * Flask /workerN/stream relay (WORKER_STREAM_MODE=relay)
+ * - worker별 upstream 연결 1개를 브라우저 연결 전체가 공유 (분 진행/계산은 Flask 내부 clock이 담당)
+ * - 첫 구독 시 연결, 마지막 구독 해제 시 종료, 끊기면 STREAMING_INTERVAL 후 재연결
+ */
+class WorkerStreamRelay {
+  constructor(streamUrl, manager) {
+    this.streamUrl = streamUrl;
+    this.manager = manager;
+    this.subscribers = new Set();
+    this.controller = null;
+  }
+
+  subscribe(send) {
+    this.subscribers.add(send);
+    if (!this.controller) this.connect();
+    return () => {
+      this.subscribers.delete(send);
+      if (!this.subscribers.size && this.controller) {
+        this.controller.abort();
+        this.controller = null;
+      }
+    };
+  }
+
+  async connect() {
+    const controller = new AbortController();
+    this.controller = controller;
+    try {
+      const response = await fetch(this.streamUrl, { signal: controller.signal });
+      if (!response.ok) throw new Error(`upstream ${response.status}`);
+      const decoder = new TextDecoder();
+      let buffer = "";
+      for await (const chunk of response.body) {
+        buffer += decoder.decode(chunk, { stream: true });
+        let end = buffer.indexOf("\n\n");
+        while (end >= 0) {
+          const line = buffer.slice(0, end).split("\n").find((l) => l.startsWith("data: "));
+          buffer = buffer.slice(end + 2);
+          if (line) this.dispatch(JSON.parse(line.slice(6)));
+          end = buffer.indexOf("\n\n");
+        }
+      }
+    } catch (error) {
+      if (!controller.signal.aborted) {
+        console.error(`[Stream relay] ${this.streamUrl} error:`, error.message);
+        this.dispatch({ status: "error", message: error.message });
+      }
+    }
+    if (this.controller === controller) {
+      this.controller = null;
+      setTimeout(() => {
+        if (!this.controller && this.subscribers.size) this.connect();
+      }, STREAMING_INTERVAL);
+    }
+  }
+
+  dispatch(event) {
+    let payload;
+    if (event?.status === "ok") {
+      this.manager.currentMinute = event.current_minute;
+      payload = {
+        ...event.data,
+        current_minute: event.current_minute,
+        success: true,
+        timestamp: event.data?.timestamp || new Date().toISOString(),
+      };
+    } else {
+      payload = { error: "stream error", message: event?.message };
+    }
+    this.subscribers.forEach((send) => send(payload));
+  }
+}
+
+const streamRelays = {
+  worker1: new WorkerStreamRelay(`${workerManager.worker1Url}/stream`, workerManager),
+  worker2: new WorkerStreamRelay(`${workerManager2.worker2Url}/stream`, workerManager2),
+  worker5: new WorkerStreamRelay(`${workerManager5.worker5Url}/stream`, workerManager5),
+  worker6: new WorkerStreamRelay(`${workerManager6.worker6Url}/stream`, workerManager6),
+};
+
+/**
+ * 브라우저 SSE 연결을 relay에 구독 (연결별 delta 전송기 사용)
+ */
+function relayWorkerStream(workerName, req, res) {
+  res.writeHead(200, {
+    "Content-Type": "text/event-stream",
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "Access-Control-Allow-Origin": "*",
+    "X-Accel-Buffering": "no",
+  });
+
+  const ping = setInterval(() => {
+    try {
+      res.write(`:ping\n\n`);
+    } catch {}
+  }, 25000);
+
+  const sendPayload = createStreamSender(res);
+  const unsubscribe = streamRelays[workerName].subscribe((payload) => {
+    if (payload.error) {
+      res.write(`data: ${JSON.stringify(payload)}\n\n`);
+    } else {
+      sendPayload(payload);
+    }
+  });
+
+  const cleanup = () => {
+    clearInterval(ping);
+    unsubscribe();
+  };
+  req.on("close", cleanup);
+  req.on("error", cleanup);
+}
+
+/**
+ * relay 모드에서 InfoBox timestamp를 Flask 스트림 세션에 전달
+ */
+function forwardStreamTimestamp(workerName, timestamp) {
+  if (WORKER_STREAM_MODE !== "relay") return;
+  fetch(`http://localhost:5002/${workerName}/set-timestamp`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ timestamp }),
+  }).catch((error) => console.error(`[Stream relay] ${workerName} set-timestamp error:`, error.message));
+}
+
 /**
  * CSV 로드
  */
@@ -791,6 +971,7 @@ app.post("/api/worker1/set-timestamp", (req, res) => {
       return res.status(400).json({ status: "error", message: "Timestamp required" });
     }
     workerManager.setInfoBoxTimestamp(timestamp);
+    forwardStreamTimestamp("worker1", timestamp);
     res.json({ status: "ok", message: "InfoBox timestamp set" });
   } catch (error) {
     console.error("set-timestamp error:", error);
@@ -862,6 +1043,11 @@ app.get("/api/worker1/stream", (req, res) => {
       return;
     }
 
+    if (WORKER_STREAM_MODE === "relay") {
+      relayWorkerStream("worker1", req, res);
+      return;
+    }
+
     res.writeHead(200, {
       "Content-Type": "text/event-stream",
       "Cache-Control": "no-cache",
@@ -877,6 +1063,7 @@ app.get("/api/worker1/stream", (req, res) => {
       } catch {}
     }, 25000);
 
+    const sendPayload = createStreamSender(res);
     const interval = setInterval(async () => {
       try {
         // InfoBox의 timestamp를 항상 사용 (자동 동기화)
@@ -889,7 +1076,7 @@ app.get("/api/worker1/stream", (req, res) => {
           success: true,
           timestamp: data?.timestamp || new Date().toISOString(),
         };
-        res.write(`data: ${JSON.stringify(payload)}\n\n`);
+        sendPayload(payload);
       } catch (error) {
         res.write(`data: ${JSON.stringify({ error: "stream error", message: error.message })}\n\n`);
       }
@@ -927,6 +1114,7 @@ app.post("/api/worker2/set-timestamp", (req, res) => {
       return res.status(400).json({ status: "error", message: "Timestamp required" });
     }
     workerManager2.setInfoBoxTimestamp(timestamp);
+    forwardStreamTimestamp("worker2", timestamp);
     res.json({ status: "ok", message: "InfoBox timestamp set" });
   } catch (error) {
     console.error("worker2 set-timestamp error:", error);
@@ -998,6 +1186,11 @@ app.get("/api/worker2/stream", (req, res) => {
       return;
     }
 
+    if (WORKER_STREAM_MODE === "relay") {
+      relayWorkerStream("worker2", req, res);
+      return;
+    }
+
     res.writeHead(200, {
       "Content-Type": "text/event-stream",
       "Cache-Control": "no-cache",
@@ -1013,6 +1206,7 @@ app.get("/api/worker2/stream", (req, res) => {
       } catch {}
     }, 25000);
 
+    const sendPayload = createStreamSender(res);
     const interval = setInterval(async () => {
       try {
         // InfoBox의 timestamp를 항상 사용 (자동 동기화) - Worker1과 동일하게
@@ -1025,7 +1219,7 @@ app.get("/api/worker2/stream", (req, res) => {
           success: true,
           timestamp: data?.timestamp || new Date().toISOString(),
         };
-        res.write(`data: ${JSON.stringify(payload)}\n\n`);
+        sendPayload(payload);
       } catch (error) {
         res.write(`data: ${JSON.stringify({ error: "stream error", message: error.message })}\n\n`);
       }
@@ -1063,6 +1257,7 @@ app.post("/api/worker5/set-timestamp", (req, res) => {
       return res.status(400).json({ status: "error", message: "Timestamp required" });
     }
     workerManager5.setInfoBoxTimestamp(timestamp);
+    forwardStreamTimestamp("worker5", timestamp);
     res.json({ status: "ok", message: "InfoBox timestamp set" });
   } catch (error) {
     console.error("worker5 set-timestamp error:", error);
@@ -1132,6 +1327,11 @@ app.get("/api/worker5/stream", (req, res) => {
       return;
     }
 
+    if (WORKER_STREAM_MODE === "relay") {
+      relayWorkerStream("worker5", req, res);
+      return;
+    }
+
     res.writeHead(200, {
       "Content-Type": "text/event-stream",
       "Cache-Control": "no-cache",
@@ -1147,6 +1347,7 @@ app.get("/api/worker5/stream", (req, res) => {
       } catch {}
     }, 25000);
 
+    const sendPayload = createStreamSender(res);
     const interval = setInterval(async () => {
       try {
         const timestampToUse = workerManager5.infoBoxTimestamp;
@@ -1158,7 +1359,7 @@ app.get("/api/worker5/stream", (req, res) => {
           success: true,
           timestamp: data?.timestamp || new Date().toISOString(),
         };
-        res.write(`data: ${JSON.stringify(payload)}\n\n`);
+        sendPayload(payload);
       } catch (error) {
         res.write(`data: ${JSON.stringify({ error: "stream error", message: error.message })}\n\n`);
       }
@@ -1196,6 +1397,7 @@ app.post("/api/worker6/set-timestamp", (req, res) => {
       return res.status(400).json({ status: "error", message: "Timestamp required" });
     }
     workerManager6.setInfoBoxTimestamp(timestamp);
+    forwardStreamTimestamp("worker6", timestamp);
     res.json({ status: "ok", message: "InfoBox timestamp set" });
   } catch (error) {
     console.error("worker6 set-timestamp error:", error);
@@ -1265,6 +1467,11 @@ app.get("/api/worker6/stream", (req, res) => {
       return;
     }
 
+    if (WORKER_STREAM_MODE === "relay") {
+      relayWorkerStream("worker6", req, res);
+      return;
+    }
+
     res.writeHead(200, {
       "Content-Type": "text/event-stream",
       "Cache-Control": "no-cache",
@@ -1280,6 +1487,7 @@ app.get("/api/worker6/stream", (req, res) => {
       } catch {}
     }, 25000);
 
+    const sendPayload = createStreamSender(res);
     const interval = setInterval(async () => {
       try {
         const timestampToUse = workerManager6.infoBoxTimestamp;
@@ -1291,7 +1499,7 @@ app.get("/api/worker6/stream", (req, res) => {
           success: true,
           timestamp: data?.timestamp || new Date().toISOString(),
         };
-        res.write(`data: ${JSON.stringify(payload)}\n\n`);
+        sendPayload(payload);
       } catch (error) {
         res.write(`data: ${JSON.stringify({ error: "stream error", message: error.message })}\n\n`);
       }
@@ -0,0 +1,237 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+
+def estimate_size(obj, depth=0):
+    """객체 메모리 추정 (bytes), numpy/pandas 는 버퍼 크기, 리스트/튜플은 원소별 합"""
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes + 112
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        usage = obj.memory_usage(index=False, deep=False)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    size = sys.getsizeof(obj)
+    if depth > 4:
+        return size
+    if isinstance(obj, dict):
+        return size + sum(estimate_size(k, depth + 1) + estimate_size(v, depth + 1) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return size + sum(estimate_size(v, depth + 1) for v in obj)
+    if hasattr(obj, '__dict__') and not isinstance(obj, type):
+        return size + estimate_size(vars(obj), depth + 1)
+    return size
+
+
+class BoundedCache:
+    """LRU + TTL + 크기 추적 dict (스레드 안전)
+
+    max_entries / ttl 는 캐시별 제한, 바이트 예산은 CacheRegistry 가 전체 캐시에 걸쳐 적용한다.
+    """
+
+    def __init__(self, name, max_entries=None, ttl=None, registry=None, sizeof=estimate_size):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.registry = registry
+        self.sizeof = sizeof
+        self._data = OrderedDict()  # key → [value, bytes, 저장 시각, 최근 조회 시각]
+        self._lock = threading.RLock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _expired(self, entry, now):
+        ttl = self.ttl if self.ttl is not None else (self.registry.ttl if self.registry else None)
+        return ttl is not None and now - entry[2] > ttl
+
+    def _remove(self, key):
+        entry = self._data.pop(key)
+        self.bytes -= entry[1]
+        return entry
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and self._expired(entry, now):
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            entry[3] = now
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def __getitem__(self, key):
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        size = self.sizeof(value)
+        now = time.monotonic()
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = [value, size, now, now]
+            self.bytes += size
+            while self.max_entries is not None and len(self._data) > self.max_entries:
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+        if self.registry is not None:
+            self.registry.enforce_budget()
+
+    def resize(self, key):
+        """저장 후 커진 항목 크기 다시 측정 (값이 지연 계산 결과를 쌓는 경우), 없는 key 는 무시"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return
+            size = self.sizeof(entry[0])
+            self.bytes += size - entry[1]
+            entry[1] = size
+        if self.registry is not None:
+            self.registry.enforce_budget()
+
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return False
+            if self._expired(entry, time.monotonic()):
+                self._remove(key)
+                self.expirations += 1
+                return False
+            return True
+
+    def __len__(self):
+        return len(self._data)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def keys(self):
+        with self._lock:
+            return list(self._data.keys())
+
+    def values(self):
+        with self._lock:
+            return [entry[0] for entry in self._data.values()]
+
+    def items(self):
+        with self._lock:
+            return [(key, entry[0]) for key, entry in self._data.items()]
+
+    def pop(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            return self._remove(key)[0]
+
+    def discard_where(self, predicate):
+        """predicate(key) 가 참인 항목 삭제, 삭제 개수 반환"""
+        with self._lock:
+            keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def oldest_access(self):
+        """가장 오래 조회되지 않은 항목의 조회 시각 (비어 있으면 None)"""
+        with self._lock:
+            if not self._data:
+                return None
+            return next(iter(self._data.values()))[3]
+
+    def evict_oldest(self):
+        with self._lock:
+            if not self._data:
+                return 0
+            size = self._remove(next(iter(self._data)))[1]
+            self.evictions += 1
+            return size
+
+    def stats(self):
+        return {
+            'entries': len(self._data),
+            'bytes': int(self.bytes),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'max_entries': self.max_entries,
+        }
+
+
+class CacheRegistry:
+    """이름별 BoundedCache 목록과 전체 바이트 예산 (초과 시 전체 캐시 중 가장 오래 조회되지 않은 항목부터 제거)"""
+
+    def __init__(self, max_bytes=None, ttl=None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._caches = {}
+        self._lock = threading.Lock()
+
+    def configure(self, max_bytes=None, ttl=None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.enforce_budget()
+
+    def create(self, name, max_entries=None, ttl=None):
+        """캐시 생성 및 등록 (같은 이름이 있으면 교체)"""
+        cache = BoundedCache(name, max_entries=max_entries, ttl=ttl, registry=self)
+        with self._lock:
+            self._caches[name] = cache
+        return cache
+
+    def clear(self):
+        """등록된 캐시 전체 비움 (cold 상태 측정용)"""
+        with self._lock:
+            caches = list(self._caches.values())
+        for cache in caches:
+            cache.clear()
+
+    def total_bytes(self):
+        return sum(cache.bytes for cache in list(self._caches.values()))
+
+    def enforce_budget(self):
+        if self.max_bytes is None:
+            return
+        with self._lock:
+            caches = list(self._caches.values())
+            total = sum(cache.bytes for cache in caches)
+            while total > self.max_bytes:
+                candidates = [(cache.oldest_access(), i) for i, cache in enumerate(caches)]
+                candidates = [(t, i) for t, i in candidates if t is not None]
+                if not candidates:
+                    break
+                total -= caches[min(candidates)[1]].evict_oldest()
+
+    def stats(self):
+        with self._lock:
+            caches = dict(self._caches)
+        return {
+            'max_bytes': self.max_bytes,
+            'ttl': self.ttl,
+            'total_bytes': int(sum(cache.bytes for cache in caches.values())),
+            'caches': {name: cache.stats() for name, cache in caches.items()},
+        }
+
+
+# workers 공용 캐시 목록 (workers_server 가 환경변수로 예산/TTL 설정)
+cache_registry = CacheRegistry()
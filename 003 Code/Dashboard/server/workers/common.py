@@ -1,11 +1,94 @@
+import bisect
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
+from snapshot import (compute_fingerprint, load_snapshot, load_snapshot_arrays, save_snapshot,
+                      publish_current, read_current)
+from online_stats import GroupRefTolState, RunningCorrelation
+from cutoff_index import CutoffTerms, LotCutoffIndex
+from bounded_cache import cache_registry
+
+PAPER_CSV_SCHEMA = {
+    'lot': 'category',
+    'paper': 'category',
+    'bw': 'category',
+    'width': 'float32',
+    **{f'x{i}': 'float32' for i in range(1, 19)},
+    'timestamp': 'datetime',
+}
+
+WORKER_CSV_COLS = ['lot', 'paper', 'bw', 'width', 'x1', 'x2', 'x3', 'x4', 'x5', 'timestamp']
+
+def _count_csv_rows(csv_path):
+    """헤더 제외 행 수 (빈 줄 포함 상한값)"""
+    n, last = 0, b'\n'
+    with open(csv_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 24), b''):
+            n += chunk.count(b'\n')
+            last = chunk[-1:]
+    if last != b'\n':
+        n += 1
+    return max(n - 1, 0)
+
+def read_paper_csv(csv_path, usecols=WORKER_CSV_COLS, schema=PAPER_CSV_SCHEMA, chunksize=500_000):
+    """스키마 지정 CSV 로딩 (센서값 float32, lot/paper/bw 범주형, timestamp 파싱)
+
+    행 수만큼 컬럼 배열을 미리 잡고 chunk 단위로 채워, 최대 메모리가 최종 DataFrame 크기에 가깝게 유지된다.
+    """
+    usecols = list(usecols)
+    n_max = _count_csv_rows(csv_path)
+
+    arrays = {}
+    categories = {}
+    for col in usecols:
+        kind = schema[col]
+        if kind == 'category':
+            arrays[col] = np.full(n_max, -1, dtype=np.int32)
+            categories[col] = {}
+        elif kind == 'datetime':
+            arrays[col] = np.empty(n_max, dtype='datetime64[ns]')
+        else:
+            arrays[col] = np.empty(n_max, dtype=kind)
+
+    read_dtypes = {col: schema[col] for col in usecols if schema[col] not in ('category', 'datetime')}
+    date_cols = [col for col in usecols if schema[col] == 'datetime']
+
+    pos = 0
+    reader = pd.read_csv(csv_path, usecols=usecols, dtype=read_dtypes, chunksize=chunksize)
+    for chunk in reader:
+        m = len(chunk)
+        for col in usecols:
+            if col in categories:
+                codes, uniques = pd.factorize(chunk[col])
+                mapping = categories[col]
+                lut = np.array([mapping.setdefault(u, len(mapping)) for u in uniques] + [-1], dtype=np.int32)
+                arrays[col][pos:pos + m] = lut[codes]  # 결측(-1) → 마지막 원소 -1
+            elif col in date_cols:
+                arrays[col][pos:pos + m] = pd.to_datetime(chunk[col]).to_numpy(dtype='datetime64[ns]')
+            else:
+                arrays[col][pos:pos + m] = chunk[col].to_numpy()
+        pos += m
+
+    data = {}
+    for col in usecols:
+        values = arrays[col][:pos]
+        if col in categories:
+            # 범주는 값 순서로 정렬 (lot 정렬 순서를 문자열 정렬과 동일하게 유지)
+            cats = pd.Index(list(categories[col]))
+            order = cats.argsort()
+            remap = np.empty(len(order), dtype=np.int32)
+            remap[order] = np.arange(len(order), dtype=np.int32)
+            valid = values >= 0
+            values[valid] = remap[values[valid]]
+            data[col] = pd.Categorical.from_codes(values, categories=cats[order])
+        else:
+            data[col] = values
+
+    return pd.DataFrame(data, copy=False)
 
 def drop_missing_cols(df, rat):
     """결측치 많은 컬럼 제거"""
-    df = df.copy()
     total_cols = len(df.columns)
     null_ratio = df.isnull().mean() * 100
     cols_to_drop = null_ratio[null_ratio > rat].index.tolist()
@@ -24,17 +107,154 @@ def drop_missing_cols(df, rat):
 
     return df, cols_to_drop
 
+def _rolling_outlier_mask(values, window=5, z_thresh=3, block_size=1 << 20):
+    """2-D 배열(행=시간, 열=변수) 전체에 대한 centered rolling z-score 이상치 마스크
+
+    pandas rolling(window, center=True, min_periods=1) 과 같은 구간을 사용하며,
+    컬럼 루프 대신 window 오프셋만큼만 배열 연산을 반복한다.
+    임시 배열은 block_size 원소 단위 컬럼 블록으로 재사용해 메모리를 데이터 크기에 맞춘다.
+    """
+    T, C = values.shape
+    mask = np.zeros((T, C), dtype=bool)
+    if T == 0 or C == 0:
+        return mask
+
+    offset = (window - 1) // 2          # pandas center=True 기준 오른쪽 폭
+    left = window - 1 - offset          # 왼쪽 폭
+    step = max(1, min(C, block_size // max(T, 1)))
+
+    for c0 in range(0, C, step):
+        block = values[:, c0:c0 + step]
+        B = block.shape[1]
+
+        padded = np.zeros((T + window - 1, B))
+        valid = np.zeros((T + window - 1, B), dtype=bool)
+        np.isnan(block, out=valid[left:left + T])
+        np.logical_not(valid[left:left + T], out=valid[left:left + T])
+        np.copyto(padded[left:left + T], block, where=valid[left:left + T])
+
+        count = np.zeros((T, B))
+        total = np.zeros((T, B))
+        lo = np.full((T, B), np.inf)
+        hi = np.full((T, B), -np.inf)
+        for k in range(window):
+            s, v = padded[k:k + T], valid[k:k + T]
+            count += v
+            total += s
+            np.minimum(lo, s, out=lo, where=v)
+            np.maximum(hi, s, out=hi, where=v)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / count         # count == 0 → NaN
+
+            sq = total                   # total 버퍼 재사용
+            sq.fill(0.0)
+            dev = np.empty((T, B))
+            for k in range(window):
+                np.subtract(padded[k:k + T], mean, out=dev)
+                dev *= valid[k:k + T]
+                dev *= dev
+                sq += dev
+            count -= 1
+            std = np.sqrt(sq / count, out=sq)  # ddof=1
+
+            # 구간 값이 모두 같으면 pandas 와 동일하게 mean 은 그 값, std 는 0
+            const = lo == hi
+            mean[const] = lo[const]
+            std[const] = 0.0
+            std[count < 1] = np.nan      # 관측 1개 이하 → NaN
+
+            np.subtract(block, mean, out=dev)
+            dev /= std
+            np.abs(dev, out=dev)
+            np.greater(dev, z_thresh, out=mask[:, c0:c0 + B])
+
+    return mask
+
+def _ffill_bfill(values):
+    """2-D 배열 열 단위 ffill → bfill"""
+    T = len(values)
+    if T == 0:
+        return values
+    rows = np.arange(T)[:, None]
+
+    idx = np.where(np.isnan(values), 0, rows)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    values = np.take_along_axis(values, idx, axis=0)
+
+    idx = np.where(np.isnan(values), T - 1, rows)
+    idx = np.minimum.accumulate(idx[::-1], axis=0)[::-1]
+    return np.take_along_axis(values, idx, axis=0)
+
+def grid_columns(values, max_len=None, padding='hold'):
+    """(분, 변수) 격자 → 변수별 JSON 용 list (소수 3자리, NaN → None), max_len 으로 자르거나 padding"""
+    values = np.asarray(values, dtype=np.float64)
+    if max_len is not None:
+        if len(values) >= max_len:
+            values = values[:max_len]
+        else:
+            if padding == 'hold' and len(values):
+                pad = np.repeat(values[-1:], max_len - len(values), axis=0)
+            else:
+                pad = np.full((max_len - len(values), values.shape[1]), np.nan)
+            values = np.vstack([values, pad])
+
+    values = np.round(values, 3)
+    out = []
+    for col in values.T:
+        if np.isnan(col).any():
+            col = col.astype(object)
+            col[pd.isna(col)] = None
+        out.append(col.tolist())
+    return out
+
+def _write_back(df, num_cols, values, changed):
+    """변경된 컬럼만 df 에 반영 (정수형은 기존 loc NaN 대입과 같이 항상 float64 로 승격)"""
+    for i, col in enumerate(num_cols):
+        dtype = df[col].dtype
+        if dtype.kind in 'iu':
+            df[col] = values[:, i]
+        elif changed[i]:
+            df[col] = values[:, i].astype(dtype, copy=False)
+
+def _clean_numeric(df, window=5, z_thresh=3):
+    """숫자형 컬럼 이상치 NaN 처리 + ffill/bfill (df 컬럼 교체, 중간 복사본 없음)"""
+    num_cols = df.select_dtypes(include='number').columns
+    if len(num_cols) == 0 or len(df) == 0:
+        empty = np.zeros((len(df), len(num_cols)), dtype=bool)
+        return num_cols, empty, empty
+
+    values = df[num_cols].to_numpy(dtype=float)
+    outlier_mask = _rolling_outlier_mask(values, window, z_thresh)
+    values[outlier_mask] = np.nan
+
+    missing = np.isnan(values)
+    changed = missing.any(axis=0)
+    if changed.any():
+        values[:, changed] = _ffill_bfill(values[:, changed])
+
+    _write_back(df, num_cols, values, changed)
+
+    filled_mask = missing & ~np.isnan(values)
+    return num_cols, outlier_mask, filled_mask
+
 def interpolate(df, obj_cols):
     """결측치 보간"""
     df = df.copy()
     filled_mask = df.isnull()
 
-    # 문자열 보간 전 숫자형/선택된 문자형만
-    cols = df.select_dtypes(include='number').columns.tolist()
-    cols += [col for col in obj_cols if col in df.columns]
+    num_cols = df.select_dtypes(include='number').columns
+    changed = filled_mask[num_cols].to_numpy().any(axis=0)
+    if changed.any():
+        values = df[num_cols].to_numpy(dtype=float)
+        values[:, changed] = _ffill_bfill(values[:, changed])
+        for i in np.flatnonzero(changed):
+            df[num_cols[i]] = values[:, i].astype(df[num_cols[i]].dtype, copy=False)
 
-    for col in cols:
-        df[col] = df[col].ffill().bfill()
+    # 문자열 보간 전 숫자형/선택된 문자형만
+    for col in obj_cols:
+        if col in df.columns and col not in num_cols:
+            df[col] = df[col].ffill().bfill()
 
     filled_mask = filled_mask & df.notnull()  # 결측 → 채워진 위치만 True
     return df, filled_mask
@@ -44,31 +264,30 @@ def outliers(df, window=5, z_thresh=3):
     df = df.copy()
     outlier_mask = pd.DataFrame(False, index=df.index, columns=df.columns)
     num_cols = df.select_dtypes(include='number').columns
+    if len(num_cols) == 0:
+        return df, outlier_mask
 
-    for col in num_cols:
-        rolling_mean = df[col].rolling(window, center=True, min_periods=1).mean()
-        rolling_std = df[col].rolling(window, center=True, min_periods=1).std()
-        z_scores = (df[col] - rolling_mean) / rolling_std
-        outliers = z_scores.abs() > z_thresh
-        outlier_mask[col] = outliers
-        df.loc[outliers, col] = np.nan  # 이상치는 NaN 처리
+    values = df[num_cols].to_numpy(dtype=float)
+    mask = _rolling_outlier_mask(values, window, z_thresh)
+    outlier_mask[num_cols] = mask
+    values[mask] = np.nan  # 이상치는 NaN 처리
+    _write_back(df, num_cols, values, mask.any(axis=0))
 
     return df, outlier_mask
 
-def prepro(df, rat=20, obj_cols=['paper']):
+def prepro(df, rat=20, obj_cols=['paper'], window=5, z_thresh=3):
     """전처리 통합"""
-    df = df.copy()
-    original_df = df.copy()
-
-    # 결측치 많은 컬럼 제거
+    # 결측치 많은 컬럼 제거 (원본과 분리된 새 DataFrame)
     df, dropped_cols = drop_missing_cols(df, rat)
 
-    # 이상치 제거
-    df, outlier_mask = outliers(df)
+    # 이상치 제거 + 숫자형 결측치 보간 (전체 컬럼 2-D 1회 처리)
+    _clean_numeric(df, window=window, z_thresh=z_thresh)
     print("이상치 제거 완료 (Rolling Z-score 기반)")
 
-    # 결측치 보간
-    df, filled_mask = interpolate(df, obj_cols)
+    # 선택된 문자형 결측치 보간
+    for col in obj_cols:
+        if col in df.columns and not pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = df[col].ffill().bfill()
     print("시간 기반 보간 완료 (ffill → bfill)")
 
     # 문자열 변수들 중 obj_cols 에 포함된 경우 → 원핫 인코딩
@@ -160,20 +379,94 @@ def get_y(score_mat, a_ij, w_vec):
     if isinstance(w_vec, dict):
         w_vec = np.array(list(w_vec.values()))
 
-    y = 0.0
-    for i in range(num_vars):
-        for j in range(num_slices):
-            start = j * slice_len
-            end = (j + 1) * slice_len if j < num_slices - 1 else T
-            segment_mean = score_mat[start:end, i].mean() if end > start else 0
-            y += w_vec[i] * a_ij[i, j] * segment_mean
+    # 구간 j = [j*slice_len, (j+1)*slice_len), 마지막 구간은 T 까지
+    bounds = [j * slice_len for j in range(num_slices)] + [T]
+    seg_means = np.zeros((num_vars, num_slices))
+    for j in range(num_slices):
+        if bounds[j + 1] > bounds[j]:
+            seg_means[:, j] = score_mat[bounds[j]:bounds[j + 1]].mean(axis=0)
 
+    y = float((np.asarray(w_vec, dtype=float)[:num_vars, None] * a_ij * seg_means).sum())
     return y*100
 
+def get_y_batch(values, offsets, input_cols, x_ref, x_tol, w_vec, ratios=None):
+    """여러 lot 품질 점수 y 일괄 계산
+
+    values 는 lot 순으로 이어 붙인 (행, 변수) 배열, lot k 는 offsets[k]:offsets[k+1] 구간.
+    lot 마다 get_st → get_aj(ratios) → get_y 를 호출한 결과와 같은 값을 segment 합산으로 계산한다.
+    """
+    if ratios is None:
+        ratios = [1.0]
+    assert np.isclose(sum(ratios), 1.0), "ratios의 합은 1이어야 합니다."
+
+    offsets = np.asarray(offsets, dtype=np.int64)
+    num_lots = len(offsets) - 1
+    num_vars = len(input_cols)
+    num_slices = len(ratios)
+    eps = 1e-6
+    if num_lots <= 0:
+        return np.empty(0)
+
+    if isinstance(w_vec, dict):
+        w_vec = np.array(list(w_vec.values()))
+    w_vec = np.asarray(w_vec, dtype=float)
+
+    lengths = np.diff(offsets)
+    seg = np.repeat(np.arange(num_lots), lengths)
+    pos = np.arange(len(seg)) - np.repeat(offsets[:-1], lengths)
+
+    # get_y: 길이 T//num_slices 균등 구간 (마지막 구간은 나머지 포함)
+    slice_len = lengths // num_slices
+    y_slice = np.full(len(seg), num_slices - 1)
+    has_len = slice_len[seg] > 0
+    y_slice[has_len] = np.minimum(pos[has_len] // slice_len[seg][has_len], num_slices - 1)
+    y_bin = seg * num_slices + y_slice
+    y_count = np.bincount(y_bin, minlength=num_lots * num_slices).reshape(num_lots, num_slices)
+
+    # get_aj: 결측 제외 값 기준 int(누적비율 * T) 절단점
+    cum_ratios = np.array([sum(ratios[:j + 1]) for j in range(num_slices)])
+    cuts = (cum_ratios[None, :] * lengths[:, None]).astype(np.int64)
+
+    y = np.zeros(num_lots)
+    for i, col in enumerate(input_cols):
+        x = values[:, i]
+        score = np.exp(-((x - x_ref[col]) / x_tol[col]) ** 2)
+
+        y_sum = np.bincount(y_bin, weights=score, minlength=num_lots * num_slices).reshape(num_lots, num_slices)
+        seg_means = np.divide(y_sum, y_count, out=np.zeros_like(y_sum), where=y_count > 0)
+
+        valid = ~np.isnan(x)
+        seg_v, x_v = seg[valid], x[valid].astype(float)
+        csum = np.cumsum(valid)
+        rank = (csum - 1 - np.concatenate(([0], csum))[offsets[:-1]][seg])[valid]
+        aj_slice = (rank[:, None] >= cuts[seg_v, :num_slices - 1]).sum(axis=1)
+        aj_bin = seg_v * num_slices + aj_slice
+        n = np.bincount(aj_bin, minlength=num_lots * num_slices)
+        mean = np.divide(np.bincount(aj_bin, weights=x_v, minlength=num_lots * num_slices), n,
+                         out=np.zeros(num_lots * num_slices), where=n > 0)
+        m2 = np.bincount(aj_bin, weights=(x_v - mean[aj_bin]) ** 2, minlength=num_lots * num_slices)
+        var = np.divide(m2, n, out=np.zeros_like(m2), where=n > 1).reshape(num_lots, num_slices)
+        inv_vars = 1 / (var + eps)
+        a_ij = inv_vars / inv_vars.sum(axis=1, keepdims=True)
+
+        y += w_vec[i] * (a_ij * seg_means).sum(axis=1)
+
+    return y*100
+
+def filter_time_window(df, time_window, time_col='date'):
+    """time_col 최댓값 기준 최근 time_window 구간 행만 선택 (예: '30D')"""
+    if time_window is None or df.empty:
+        return df
+    end = df[time_col].max()
+    return df[df[time_col] >= end - pd.Timedelta(time_window)]
+
 def get_ref_tol_dict_with_plot(df, mean_std_vars, iqr_vars,
                                std_multiplier=2.0, iqr_multiplier=1.5,
-                               group_cols=None, plot=False, max_plots_per_group=12):
-    """변수별 기준값(ref), 허용범위(tol) 계산"""
+                               group_cols=None, plot=False, max_plots_per_group=12,
+                               time_window=None, time_col='date'):
+    """변수별 기준값(ref), 허용범위(tol) 계산 (time_window 지정 시 최근 구간만 사용)"""
+    df = filter_time_window(df, time_window, time_col)
+
     # 그룹 없이: 기존 동작 유지
     if group_cols is None:
         ref_dict = {}
@@ -201,84 +494,667 @@ def get_ref_tol_dict_with_plot(df, mean_std_vars, iqr_vars,
 
         return ref_dict, tol_dict
 
-    # 그룹별 계산
+    # 그룹별 계산 (그룹 루프 대신 변수 묶음별 1회 집계)
     if isinstance(group_cols, str):
         group_cols = [group_cols]
     group_cols = list(group_cols)
 
+    groups = df.groupby(group_cols, dropna=False, observed=True)
+    ms_stats = groups[list(mean_std_vars)].agg(['count', 'mean', 'std']) if mean_std_vars else None
+    if iqr_vars:
+        iqr_q = groups[list(iqr_vars)].quantile([0.25, 0.75])
+        iqr_q1 = iqr_q.xs(0.25, level=-1)
+        iqr_q3 = iqr_q.xs(0.75, level=-1)
+        iqr_med = groups[list(iqr_vars)].median()
+        iqr_count = groups[list(iqr_vars)].count()
+
     ref_dict = {}
     tol_dict = {}
 
-    groups = df.groupby(group_cols, dropna=False)
-    plotted = 0
-
-    for gkey, gdf in groups:
-        if not isinstance(gkey, tuple):
-            gkey = (gkey,)
-        ref_dict[gkey] = {}
-        tol_dict[gkey] = {}
+    for gkey in groups.groups.keys() if len(df) else []:
+        key = gkey if isinstance(gkey, tuple) else (gkey,)
+        ref_dict[key] = {}
+        tol_dict[key] = {}
 
         # mean±std
         for col in mean_std_vars:
-            series = gdf[col].dropna()
-            if series.empty:
+            if ms_stats.at[gkey, (col, 'count')] == 0:
                 ref, tol = np.nan, np.nan
             else:
-                ref = round(float(series.mean()), 2)
-                std = float(series.std(ddof=1))
+                ref = round(float(ms_stats.at[gkey, (col, 'mean')]), 2)
+                std = float(ms_stats.at[gkey, (col, 'std')])
                 tol = round(float(std * std_multiplier if np.isfinite(std) else np.nan), 2)
 
-            ref_dict[gkey][col] = ref
-            tol_dict[gkey][col] = tol
+            ref_dict[key][col] = ref
+            tol_dict[key][col] = tol
 
         # median±IQR
         for col in iqr_vars:
-            series = gdf[col].dropna()
-            if series.empty:
+            if iqr_count.at[gkey, col] == 0:
                 ref, tol = np.nan, np.nan
             else:
-                q1 = series.quantile(0.25)
-                q3 = series.quantile(0.75)
-                iqr = float(q3 - q1)
-                ref = round(float(series.median()), 2)
+                iqr = float(iqr_q3.at[gkey, col] - iqr_q1.at[gkey, col])
+                ref = round(float(iqr_med.at[gkey, col]), 2)
                 tol = round(float(iqr * iqr_multiplier if np.isfinite(iqr) else np.nan), 2)
 
-            ref_dict[gkey][col] = ref
-            tol_dict[gkey][col] = tol
+            ref_dict[key][col] = ref
+            tol_dict[key][col] = tol
 
     return ref_dict, tol_dict
 
+def _close_values(a, b, tol=0.0):
+    """같은 key 의 dict 값이 모두 tol 이내인지 (NaN 끼리는 같음으로 봄)"""
+    if a is None or b is None or a.keys() != b.keys():
+        return False
+    for key, x in a.items():
+        y = b[key]
+        if pd.isna(x) and pd.isna(y):
+            continue
+        if not abs(x - y) <= tol:
+            return False
+    return True
+
 class DataProcessor:
     """전체 데이터 관리"""
-    def __init__(self, csv_path):
+
+    PREPRO_PARAMS = {'rat': 25, 'window': 5, 'z_thresh': 3}
+
+    REF_TOL_PARAMS = {
+        'mean_std_vars': ['x1', 'x3', 'x2'],
+        'iqr_vars': ['x5', 'x4'],
+        'group_cols': ('paper', 'bw'),
+    }
+
+    # append 후 전체 가중치 변화가 이 값 이하면 기존 가중치 유지 (전체 캐시 무효화 생략)
+    WEIGHT_TOLERANCE = 1e-4
+
+    def __init__(self, csv_path, snapshot_dir=None, ingest='default'):
         self.csv_path = csv_path
+        self.snapshot_dir = snapshot_dir
+        self.ingest = ingest  # 'default' | 'typed' (스키마 지정 저메모리 로딩)
         self.org_df = None
         self.pre_df = None
         self.cal_df = None
         self.ref_dict = {}
         self.tol_dict = {}
+        self.lot_index = {}
+        self.group_lots = {}
+        self._group_rows = {}
+        self._tail = None            # append 용 원본 순서 마지막 구간 (rolling halo, ffill 값)
+        self._ref_tol_state = None   # append 용 그룹별 ref/tol 누적 상태 (첫 append 시 생성)
+        self.ref_tol_window = None   # ref/tol 계산 기간 (None 이면 전체 데이터)
+        self._append_listeners = []
+        self.data_version = 0           # 전체 무효화 (append 로 가중치 변경)
+        self.group_versions = {}        # (paper, bw) → append / ref·tol 재계산으로 lot 데이터 / ref·tol 이 바뀐 횟수
+        self._derived = {}              # 이름 → lot 단위 파생 캐시 (cutoff 인덱스, 격자), data_version 변경 시 비움
+        self._weights = {}              # (입력 열, target) → get_wi 가중치
+        self._weight_states = {}        # append 용 가중치 상관계수 누적 상태
+        self._derived_version = None
+        self.read_only = False          # attach 로 연결한 공유 데이터셋 (append / ref-tol 재계산 불가)
+        self.fingerprint = None         # 원본 CSV + 전처리 파라미터 지문 (replay store 일치 확인용)
         
     def initialize(self):
         """서버 시작 시 1회 실행"""
+        fingerprint = None
+        if self.snapshot_dir:
+            fingerprint = self.source_fingerprint()
+            loaded = load_snapshot(self.snapshot_dir, fingerprint)
+            if loaded is not None:
+                self.cal_df, self.ref_dict, self.tol_dict, extra = loaded
+                self._tail = self._load_tail((extra or {}).get('tail'))
+                self._build_lot_index(sort=False)
+                print(f"Initialization complete! (snapshot {fingerprint})")
+                return {'status': 'ok', 'snapshot': 'hit'}
+
         print("Loading CSV...")
-        self.org_df = pd.read_csv(self.csv_path)
+        if self.ingest == 'typed':
+            self.org_df = read_paper_csv(self.csv_path)
+        else:
+            self.org_df = pd.read_csv(self.csv_path)
         self.org_df.rename(columns={'timestamp': 'date'}, inplace=True)
         self.org_df['date'] = pd.to_datetime(self.org_df['date'])
         
         print("Preprocessing...")
-        self.pre_df = prepro(self.org_df, rat=25, obj_cols=[])
+        self.pre_df = prepro(self.org_df, obj_cols=[], **self.PREPRO_PARAMS)
+        if self.ingest == 'typed':
+            # 범주형 bw 는 숫자형 보간 대상에서 빠지므로 기본 모드와 같이 별도 보간
+            self.pre_df['bw'] = self.pre_df['bw'].ffill().bfill()
         
         print("Calculating production...")
         self.cal_df = calculated_col(self.pre_df)
+        self._tail = self._make_tail(self.org_df, self.pre_df)
+        if self.ingest == 'typed':
+            # 중간 단계 DataFrame 은 유지하지 않음
+            self.org_df = None
+            self.pre_df = None
+
+        print("Building lot index...")
+        self._build_lot_index()
         
         print("Calculating ref/tol...")
         self.ref_dict, self.tol_dict = get_ref_tol_dict_with_plot(
             self.cal_df,
-            mean_std_vars=['x1', 'x3', 'x2'],
-            iqr_vars=['x5', 'x4'],
-            group_cols=('paper', 'bw'),
-            plot=False
+            plot=False,
+            **self.REF_TOL_PARAMS
         )
+
+        if fingerprint is not None:
+            print("Saving snapshot...")
+            save_snapshot(self.snapshot_dir, fingerprint, self.cal_df, self.ref_dict, self.tol_dict,
+                          extra={'tail': self._dump_tail()})
         
         print("Initialization complete!")
-        return {'status': 'ok'}
+        return {'status': 'ok', 'snapshot': 'miss' if fingerprint is not None else None}
+
+    def source_fingerprint(self):
+        """원본 CSV + 전처리 파라미터 지문 (1회 계산, attach 는 게시된 값 사용), 알 수 없으면 None"""
+        if self.fingerprint is None and self.csv_path is not None:
+            self.fingerprint = compute_fingerprint(self.csv_path, {**self.PREPRO_PARAMS, 'ingest': self.ingest})
+        return self.fingerprint
+
+    # 공유 데이터셋 (loader 1개가 publish, 서빙 프로세스는 attach)
+
+    def publish(self, dataset_dir, block_cols=()):
+        """cal_df / ref·tol / 그룹 블록(block_cols 별 값 배열)을 dataset_dir 에 게시, 같은 내용이 이미 있으면 생략"""
+        if self.cal_df is None:
+            raise RuntimeError('DataProcessor not initialized')
+        block_cols = [list(cols) for cols in block_cols]
+        fingerprint = compute_fingerprint(
+            self.csv_path, {**self.PREPRO_PARAMS, 'ingest': self.ingest, 'blocks': block_cols}
+        )
+        if read_current(dataset_dir) == fingerprint and load_snapshot(dataset_dir, fingerprint) is not None:
+            return {'status': 'ok', 'fingerprint': fingerprint, 'published': False}
+
+        # 그룹 블록은 그룹 순으로 이어 붙여 1개 배열로 저장 (attach 시 그룹별 slice view)
+        groups = list(self.group_lots.keys())
+        arrays = {}
+        blocks = []
+        starts = []
+        if groups and block_cols and np.issubdtype(self.cal_df['date'].dtype, np.datetime64):
+            sizes = [self.get_group_block(paper, bw, block_cols[0])[2][-1] for paper, bw in groups]
+            starts = np.concatenate(([0], np.cumsum(sizes)))[:-1].tolist()
+            for i, cols in enumerate(block_cols):
+                arrays[f'block_{i}'] = np.concatenate(
+                    [self.get_group_block(paper, bw, cols)[1] for paper, bw in groups]
+                )
+                blocks.append({'cols': cols, 'array': f'block_{i}'})
+            dates = np.concatenate(
+                [self.get_group_block(paper, bw, block_cols[0], with_dates=True)[3] for paper, bw in groups]
+            )
+            arrays['block_dates'] = dates.view('int64')
+
+        shared = {
+            'groups': [list(gkey) for gkey in groups] if blocks else [],
+            'group_starts': starts,
+            'blocks': blocks,
+            'date_dtype': str(self.cal_df['date'].dtype),
+            'source': self.source_fingerprint(),
+        }
+        save_snapshot(dataset_dir, fingerprint, self.cal_df, self.ref_dict, self.tol_dict,
+                      extra={'shared': shared}, arrays=arrays)
+        publish_current(dataset_dir, fingerprint)
+        return {'status': 'ok', 'fingerprint': fingerprint, 'published': True}
+
+    def attach(self, dataset_dir):
+        """publish 된 데이터셋에 읽기 전용 memory-map 으로 연결 (CSV 읽기 / 전처리 / 지문 계산 없음)"""
+        fingerprint = read_current(dataset_dir)
+        loaded = load_snapshot(dataset_dir, fingerprint) if fingerprint else None
+        if loaded is None:
+            raise RuntimeError(f'No published dataset in {dataset_dir}')
+
+        self.cal_df, self.ref_dict, self.tol_dict, extra = loaded
+        self.read_only = True
+        self._tail = None
+        self.fingerprint = ((extra or {}).get('shared') or {}).get('source')
+        self._build_lot_index(sort=False)
+
+        shared = (extra or {}).get('shared') or {}
+        if shared.get('blocks'):
+            arrays = load_snapshot_arrays(dataset_dir, fingerprint)
+            dates = arrays['block_dates'].view(shared['date_dtype'])
+            starts = {tuple(gkey): start for gkey, start in zip(shared['groups'], shared['group_starts'])}
+            for gkey, lots in self.group_lots.items():
+                start = starts.get(gkey)
+                if start is None:
+                    continue
+                lengths = [self.lot_index[lot][1] - self.lot_index[lot][0] for lot in lots]
+                offsets = np.concatenate(([0], np.cumsum(lengths, dtype=np.int64)))
+                stop = start + int(offsets[-1])
+                for block in shared['blocks']:
+                    self._group_blocks[(gkey, tuple(block['cols']))] = {
+                        'lots': lots,
+                        'values': arrays[block['array']][start:stop],
+                        'dates': dates[start:stop],
+                        'offsets': offsets,
+                    }
+
+        print(f"Attached shared dataset {fingerprint} ({len(self.cal_df)} rows)")
+        return {'status': 'ok', 'snapshot': 'attach', 'fingerprint': fingerprint}
+
+    def _check_writable(self):
+        if self.cal_df is None:
+            raise RuntimeError('DataProcessor not initialized')
+        if self.read_only:
+            raise RuntimeError('Shared dataset is read-only (append / ref-tol on the loader, then republish)')
+
+    # lot 인덱스
+
+    def _build_lot_index(self, sort=True):
+        """cal_df를 (lot, date) 순으로 1회 정렬하고 lot → (start, stop), (paper, bw) → lot 목록 생성"""
+        if sort:
+            self.cal_df = self.cal_df.sort_values(['lot', 'date'], kind='mergesort').reset_index(drop=True)
+        self.lot_index = {}
+        self.group_lots = {}
+        self._group_rows = {}
+        self._group_blocks = {}
+        self._weights = {}
+
+        n = len(self.cal_df)
+        if n == 0:
+            return
+
+        lot_col = self.cal_df['lot']
+        if isinstance(lot_col.dtype, pd.CategoricalDtype):
+            keys = lot_col.cat.codes.to_numpy()
+        else:
+            keys = lot_col.to_numpy()
+        change = np.flatnonzero(keys[1:] != keys[:-1]) + 1
+        starts = np.concatenate(([0], change))
+        stops = np.concatenate((change, [n]))
+
+        lots = lot_col.take(starts).tolist()
+        papers = self.cal_df['paper'].take(starts).tolist()
+        bws = self.cal_df['bw'].take(starts).tolist()
+
+        for lot, paper, bw, start, stop in zip(lots, papers, bws, starts.tolist(), stops.tolist()):
+            if pd.isna(lot):
+                continue
+            self.lot_index[lot] = (start, stop)
+            self.group_lots.setdefault((paper, bw), []).append(lot)
+
+    def get_lot_df(self, lot, up_to_minute=None):
+        """date 순 정렬된 lot 구간 (복사 없는 slice), up_to_minute 지정 시 시작 후 해당 분까지"""
+        rng = self.lot_index.get(lot)
+        if rng is None:
+            return self.cal_df.iloc[0:0]
+
+        start, stop = rng
+        if up_to_minute is not None:
+            dates = self.cal_df['date'].to_numpy()[start:stop]
+            cutoff = dates[0] + pd.to_timedelta(up_to_minute, unit='m').to_timedelta64()
+            stop = start + int(np.searchsorted(dates, cutoff, side='right'))
+
+        return self.cal_df.iloc[start:stop]
+
+    def get_group_lots(self, paper, bw):
+        """(paper, bw) 조합에 속한 lot 목록 (lot 순)"""
+        return self.group_lots.get((paper, bw), [])
+
+    def get_group_df(self, paper, bw):
+        """(paper, bw) 조합의 전체 행 (lot, date 순)"""
+        rows = self._group_rows.get((paper, bw))
+        if rows is None:
+            ranges = [self.lot_index[lot] for lot in self.get_group_lots(paper, bw)]
+            if ranges:
+                rows = np.concatenate([np.arange(start, stop) for start, stop in ranges])
+            else:
+                rows = np.array([], dtype=np.int64)
+            self._group_rows[(paper, bw)] = rows
+        return self.cal_df.iloc[rows]
+
+    def get_group_block(self, paper, bw, cols, up_to_minute=None, with_dates=False):
+        """(paper, bw) 조합 lot 들의 cols 값 배열 (lot 목록, 값, lot 경계 offsets[, date]), up_to_minute 지정 시 lot 별 시작 후 해당 분까지"""
+        key = ((paper, bw), tuple(cols))
+        block = self._group_blocks.get(key)
+        if block is None:
+            lots = self.get_group_lots(paper, bw)
+            group_df = self.get_group_df(paper, bw)
+            lengths = [self.lot_index[lot][1] - self.lot_index[lot][0] for lot in lots]
+            block = {
+                'lots': lots,
+                'values': group_df[list(cols)].to_numpy(),
+                'dates': group_df['date'].to_numpy(),
+                'offsets': np.concatenate(([0], np.cumsum(lengths, dtype=np.int64))),
+            }
+            self._group_blocks[key] = block
+
+        lots, values, offsets = block['lots'], block['values'], block['offsets']
+        if up_to_minute is None or not lots:
+            return (lots, values, offsets, block['dates']) if with_dates else (lots, values, offsets)
+
+        lengths = np.diff(offsets)
+        seg = np.repeat(np.arange(len(lots)), lengths)
+        dates = block['dates']
+        cutoff = dates[offsets[:-1]] + pd.to_timedelta(up_to_minute, unit='m').to_timedelta64()
+        keep = dates <= cutoff[seg]  # lot 내부는 date 정렬 → searchsorted(side='right') 와 동일
+        counts = np.bincount(seg[keep], minlength=len(lots))
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+        return (lots, values[keep], offsets, dates[keep]) if with_dates else (lots, values[keep], offsets)
+
+    def _derived_cache(self, name):
+        """data_version 이 바뀌면 비워지는 파생 캐시 (크기 제한, 밀려난 항목은 다시 계산)"""
+        if self._derived_version != self.data_version:
+            self._derived_version = self.data_version
+            for cache in self._derived.values():
+                cache.clear()
+        cache = self._derived.get(name)
+        if cache is None:
+            cache = self._derived.setdefault(name, cache_registry.create(f'data.{name}'))
+        return cache
+
+    def get_weights(self, input_cols, target_col='cal_production'):
+        """전체 데이터 기준 get_wi 가중치 (append 로 WEIGHT_TOLERANCE 이상 바뀌기 전까지 재사용)"""
+        key = (tuple(input_cols), target_col)
+        weights = self._weights.get(key)
+        if weights is None:
+            weights = get_wi(self.cal_df, input_cols, target_col)[0]
+            self._weights[key] = weights
+        return weights
+
+    def get_cutoff_index(self, lot, input_cols, ratios=None):
+        """lot 의 LotCutoffIndex (그룹 ref/tol 기준, 데이터 변경 전까지 재사용)"""
+        cache = self._derived_cache('cutoff_index')
+        key = (lot, tuple(input_cols), tuple(ratios) if ratios is not None else None)
+        index = cache.get(key)
+        if index is None:
+            lot_df = self.get_lot_df(lot)
+            if lot_df.empty:
+                return None
+            gkey = (lot_df['paper'].iloc[0], lot_df['bw'].iloc[0])
+            index = LotCutoffIndex(
+                lot_df[list(input_cols)].to_numpy(), lot_df['date'].to_numpy(), input_cols,
+                self.ref_dict.get(gkey, {}), self.tol_dict.get(gkey, {}), ratios=ratios
+            )
+            index.on_grow = lambda: cache.resize(key)
+            cache[key] = index
+        return index
+
+    def get_cutoff_terms(self, lot, input_cols, minutes, ratios=None, target_col='cal_production'):
+        """lot 의 minutes 분 시점 CutoffTerms (전체 가중치 + cutoff 인덱스), lot 데이터 없으면 None"""
+        w_vec = self.get_weights(input_cols, target_col)
+        index = self.get_cutoff_index(lot, input_cols, ratios=ratios)
+        if index is None:
+            return None
+        return CutoffTerms(index, w_vec, minutes)
+
+    def get_lot_grid(self, lot, cols):
+        """lot 의 분 단위 dense 격자 (데이터 변경 전까지 재사용)
+
+        values: (분, 변수) float32, 시작 후 경과 분 위치에 값 배치 → ffill → bfill, 소수 3자리 반올림
+        rows: 분별 lot 내 첫 행 위치 (해당 분 행이 없으면 -1)
+        """
+        cache = self._derived_cache('grid')
+        key = (lot, tuple(cols))
+        grid = cache.get(key)
+        if grid is None:
+            lot_df = self.get_lot_df(lot)
+            if lot_df.empty:
+                return None
+            dates = lot_df['date'].to_numpy()
+            time_min = ((dates - dates[0]) / np.timedelta64(1, 's') / 60).astype(int)
+            num_minutes = int(time_min.max()) + 1
+
+            # 같은 분에 행이 여러 개면 첫 행 사용 (역순 대입)
+            order = np.arange(len(time_min))[::-1]
+            rows = np.full(num_minutes, -1, dtype=np.int64)
+            rows[time_min[order]] = order
+            values = np.full((num_minutes, len(cols)), np.nan)
+            present = rows >= 0
+            values[present] = lot_df[list(cols)].to_numpy(dtype=float)[rows[present]]
+            values = np.round(_ffill_bfill(values), 3).astype(np.float32)
+
+            grid = {'values': values, 'rows': rows}
+            cache[key] = grid
+        return grid
+
+    # 증분 추가
+
+    def add_append_listener(self, callback):
+        """append / ref·tol 재계산 후 callback(lots) 호출 (lots: 데이터 또는 그룹 ref/tol 이 바뀐 lot, 워커 캐시 무효화용)"""
+        self._append_listeners.append(callback)
+
+    def _make_tail(self, org_df, pre_df):
+        """원본 순서 기준 마지막 rolling halo 원본값 + ffill 이어받을 마지막 보간값"""
+        num_cols = org_df[pre_df.columns.intersection(org_df.columns)].select_dtypes(include='number').columns
+        window = self.PREPRO_PARAMS['window']
+        halo = window - 1 - (window - 1) // 2
+        return {
+            'columns': [col for col in pre_df.columns],
+            'num_cols': num_cols.tolist(),
+            'raw': org_df[num_cols].to_numpy(dtype=float)[-halo:] if halo else np.empty((0, len(num_cols))),
+            'last': pre_df[num_cols].to_numpy(dtype=float)[-1:],
+        }
+
+    def _dump_tail(self):
+        if self._tail is None:
+            return None
+        return {key: (val.tolist() if isinstance(val, np.ndarray) else val) for key, val in self._tail.items()}
+
+    def _load_tail(self, tail):
+        if tail is None:
+            return None
+        n_cols = len(tail['num_cols'])
+        return {
+            'columns': tail['columns'],
+            'num_cols': tail['num_cols'],
+            'raw': np.array(tail['raw'], dtype=float).reshape(-1, n_cols),
+            'last': np.array(tail['last'], dtype=float).reshape(-1, n_cols),
+        }
+
+    def _prepro_tail(self, new_df):
+        """신규 행만 전처리 (이전 halo 포함 rolling z-score, 이전 마지막 값에서 ffill 이어받기)"""
+        tail = self._tail
+        num_cols = tail['num_cols']
+        window = self.PREPRO_PARAMS['window']
+        z_thresh = self.PREPRO_PARAMS['z_thresh']
+
+        values = new_df[num_cols].to_numpy(dtype=float)
+        halo = tail['raw']
+        full = np.vstack([halo, values])
+        mask = _rolling_outlier_mask(full, window, z_thresh)[len(halo):]
+        if len(halo):
+            tail['raw'] = full[-len(halo):]
+
+        values[mask] = np.nan
+        filled = _ffill_bfill(np.vstack([tail['last'], values]))[len(tail['last']):]
+        if len(filled):
+            tail['last'] = filled[-1:]
+
+        for i, col in enumerate(num_cols):
+            dtype = self.cal_df[col].dtype if col in self.cal_df.columns else np.dtype(float)
+            new_df[col] = filled[:, i].astype(dtype, copy=False)
+        return new_df
+
+    def _align_categories(self, new_df):
+        """범주형 컬럼은 기존 범주에 신규 값을 추가해 concat 시 dtype 유지"""
+        for col in new_df.columns:
+            if col in self.cal_df.columns and isinstance(self.cal_df[col].dtype, pd.CategoricalDtype):
+                cats = self.cal_df[col].cat.categories
+                extra = pd.Index(new_df[col].dropna().unique()).difference(cats)
+                if len(extra):
+                    self.cal_df[col] = self.cal_df[col].cat.add_categories(extra)
+                new_df[col] = pd.Categorical(new_df[col], categories=self.cal_df[col].cat.categories)
+        return new_df
+
+    def _set_ref_tol(self, ref_dict, tol_dict):
+        """ref/tol 교체, 값이 바뀐 그룹 목록"""
+        changed = [
+            gkey for gkey in set(self.ref_dict).union(ref_dict)
+            if not (_close_values(ref_dict.get(gkey), self.ref_dict.get(gkey))
+                    and _close_values(tol_dict.get(gkey), self.tol_dict.get(gkey)))
+        ]
+        self.ref_dict, self.tol_dict = ref_dict, tol_dict
+        return changed
+
+    def _invalidate(self, touched, changed_groups):
+        """추가된 lot 과 ref/tol 이 바뀐 그룹의 lot 만 파생 캐시 폐기 후 listener 호출, 무효화된 lot 목록"""
+        stale = list(touched)
+        for gkey in changed_groups:
+            stale += [lot for lot in self.group_lots.get(gkey, []) if lot not in touched]
+        for gkey in set(touched.values()).union(changed_groups):
+            self.group_versions[gkey] = self.group_versions.get(gkey, 0) + 1
+        self._drop_derived(set(stale))
+        for callback in self._append_listeners:
+            callback(stale)
+        return stale
+
+    def recompute_ref_tol(self, time_window=None):
+        """ref/tol 재계산 (time_window 예: '30D', None 이면 전체 데이터), 값이 바뀐 그룹만 무효화"""
+        self._check_writable()
+        self.ref_tol_window = time_window
+        changed = self._set_ref_tol(*get_ref_tol_dict_with_plot(
+            self.cal_df,
+            plot=False,
+            time_window=time_window,
+            **self.REF_TOL_PARAMS
+        ))
+        self._invalidate({}, changed)
+        return {'status': 'ok', 'time_window': time_window, 'groups': len(self.ref_dict), 'changed_groups': len(changed)}
+
+    def _insert_group_lot(self, gkey, lot):
+        """그룹 lot 목록의 정렬 위치에 lot 추가 (_build_lot_index 와 같은 lot 순, 목록은 새로 만들어 교체)"""
+        lots = self.group_lots.get(gkey, [])
+        if isinstance(self.cal_df['lot'].dtype, pd.CategoricalDtype):
+            codes = self.cal_df['lot'].cat.categories.get_indexer(lots + [lot])
+            pos = int(np.searchsorted(codes[:-1], codes[-1], side='right'))
+        else:
+            pos = bisect.bisect_right(lots, lot)
+        self.group_lots[gkey] = lots[:pos] + [lot] + lots[pos:]
+
+    def _insert_rows(self, new_cal):
+        """신규 행을 lot 구간 끝에 끼워 넣고 lot 인덱스 증분 갱신 (전체 재정렬 없음), {갱신 lot: (paper, bw)}
+
+        batch 만 (lot, date) 순으로 정렬하고, 기존 구간보다 이른 시각이 섞인 lot 은 그 구간 안에서만 다시 정렬한다.
+        새 lot 은 맨 뒤에 붙이므로 진행 중인 lot 의 다음 batch 는 다른 lot 위치를 옮기지 않는다.
+        """
+        new_cal = new_cal.sort_values(['lot', 'date'], kind='mergesort')
+        lot_col = new_cal['lot']
+        keys = lot_col.cat.codes.to_numpy() if isinstance(lot_col.dtype, pd.CategoricalDtype) else lot_col.to_numpy()
+        change = np.flatnonzero(keys[1:] != keys[:-1]) + 1
+        starts = np.concatenate(([0], change)).tolist()
+        stops = np.concatenate((change, [len(new_cal)])).tolist()
+
+        existing, fresh = [], []
+        for start, stop in zip(starts, stops):
+            lot = lot_col.iat[start]
+            if pd.notna(lot) and lot in self.lot_index:
+                existing.append((self.lot_index[lot], lot, new_cal.iloc[start:stop]))
+            else:
+                fresh.append((lot, new_cal.iloc[start:stop]))
+        existing.sort(key=lambda item: item[0][1])
+
+        # 기존 lot: 구간 끝에 이어 붙임
+        n = len(self.cal_df)
+        dates = self.cal_df['date'].to_numpy()
+        touched = {}
+        pieces, prev, ends, added = [], 0, [], [0]
+        for (lo, hi), lot, rows in existing:
+            if rows['date'].iat[0] < dates[hi - 1]:
+                merged = pd.concat([self.cal_df.iloc[lo:hi], rows]).sort_values('date', kind='mergesort')
+                pieces += [self.cal_df.iloc[prev:lo], merged]
+            else:
+                pieces += [self.cal_df.iloc[prev:hi], rows]
+            touched[lot] = (self.cal_df['paper'].iat[lo], self.cal_df['bw'].iat[lo])
+            ends.append(hi)
+            added.append(added[-1] + len(rows))
+            prev = hi
+        pieces.append(self.cal_df.iloc[prev:])
+
+        if ends and ends[0] < n:
+            # 마지막이 아닌 lot 에 추가한 경우 뒤쪽 lot 위치를 앞선 추가 행 수만큼 이동
+            ends, added = np.array(ends), np.array(added)
+            lots = list(self.lot_index)
+            bounds = np.array([self.lot_index[lot] for lot in lots], dtype=np.int64)
+            lo = bounds[:, 0] + added[np.searchsorted(ends, bounds[:, 0], side='right')]
+            hi = bounds[:, 1] + added[np.searchsorted(ends, bounds[:, 1], side='right')]
+            self.lot_index = dict(zip(lots, zip(lo.tolist(), hi.tolist())))
+            self._group_rows = {}
+        elif ends:
+            (lo, hi), lot, rows = existing[0]
+            self.lot_index[lot] = (lo, hi + len(rows))
+
+        # 새 lot: 맨 뒤에 추가
+        pos = n + added[-1]
+        for lot, rows in fresh:
+            pieces.append(rows)
+            if pd.notna(lot):
+                gkey = (rows['paper'].iat[0], rows['bw'].iat[0])
+                self.lot_index[lot] = (pos, pos + len(rows))
+                self._insert_group_lot(gkey, lot)
+                touched[lot] = gkey
+            pos += len(rows)
+        self.cal_df = pd.concat(pieces, ignore_index=True)
+
+        groups = set(touched.values())
+        for gkey in groups:
+            self._group_rows.pop(gkey, None)
+        self._group_blocks = {key: block for key, block in self._group_blocks.items() if key[0] not in groups}
+        return touched
+
+    def _drop_derived(self, lots):
+        """lot 단위 파생 캐시(cutoff 인덱스, 격자) 중 lots 항목 삭제"""
+        for cache in self._derived.values():
+            cache.discard_where(lambda key: key[0] in lots)
+
+    def append(self, rows):
+        """신규 생산 행 추가 (tail 만 전처리 → cal_df / lot 인덱스 / ref·tol 증분 갱신)"""
+        self._check_writable()
+        if self._tail is None:
+            raise RuntimeError('No preprocessing tail state (rebuild without snapshot to enable append)')
+
+        new_df = rows.copy() if isinstance(rows, pd.DataFrame) else pd.DataFrame(list(rows))
+        if new_df.empty:
+            return {'status': 'ok', 'appended': 0, 'lots': []}
+
+        new_df.rename(columns={'timestamp': 'date'}, inplace=True)
+        new_df['date'] = pd.to_datetime(new_df['date'])
+        new_df = new_df.reindex(columns=self._tail['columns'])
+
+        new_df = self._prepro_tail(new_df)
+        if 'bw' in new_df.columns and not pd.api.types.is_numeric_dtype(self.cal_df['bw']):
+            new_df['bw'] = new_df['bw'].ffill().bfill()
+        new_cal = calculated_col(new_df)
+        new_cal = self._align_categories(new_cal)[self.cal_df.columns]
+
+        # 첫 append 시 기존 전체 데이터로 누적 상태 생성
+        if self._ref_tol_state is None:
+            self._ref_tol_state = GroupRefTolState.from_frame(self.cal_df, **self.REF_TOL_PARAMS)
+        for key in self._weights:
+            if key not in self._weight_states:
+                self._weight_states[key] = RunningCorrelation.from_frame(self.cal_df, list(key[0]), key[1])
+
+        touched = self._insert_rows(new_cal)
+
+        changed_groups = []
+        if self.ref_tol_window is None:
+            for gkey in self._ref_tol_state.update(new_cal):
+                ref, tol = self._ref_tol_state.ref_tol(gkey)
+                if not (_close_values(ref, self.ref_dict.get(gkey)) and _close_values(tol, self.tol_dict.get(gkey))):
+                    changed_groups.append(gkey)
+                self.ref_dict[gkey], self.tol_dict[gkey] = ref, tol
+        else:
+            # 기간 기준이면 누적 상태 대신 최근 구간으로 재계산
+            self._ref_tol_state.update(new_cal)
+            changed_groups = self._set_ref_tol(*get_ref_tol_dict_with_plot(
+                self.cal_df,
+                plot=False,
+                time_window=self.ref_tol_window,
+                **self.REF_TOL_PARAMS
+            ))
+
+        weights_changed = False
+        for key, state in self._weight_states.items():
+            state.update(new_cal)
+            weights = self._weights.get(key)
+            if weights is not None and not _close_values(state.weights(), weights, self.WEIGHT_TOLERANCE):
+                weights_changed = True
+
+        # 가중치가 바뀌면 전체 무효화
+        if weights_changed:
+            self._weights = {}
+            self.data_version += 1
+        self._invalidate(touched, changed_groups)
+
+        lots = list(touched)
+
+        return {'status': 'ok', 'appended': len(new_cal), 'lots': lots, 'rows': len(self.cal_df)}
@@ -0,0 +1,189 @@
+import numpy as np
+
+
+class LotCutoffIndex:
+    """lot 1개의 누적합 인덱스 (시작 후 m 분까지의 get_st → get_aj → get_y 를 상수 번 조회로 계산)
+
+    - 점수: 변수별 exp(-((x-ref)/tol)^2) 누적합 + NaN 개수 누적합 → get_y 균등 구간 평균
+    - 분산: 결측 제외 값(lot 평균 기준 이동)의 누적합/제곱 누적합 + 값 변화 횟수 → get_aj 구간 분산
+    """
+
+    def __init__(self, values, dates, input_cols, x_ref, x_tol, ratios=None):
+        if ratios is None:
+            ratios = [1.0]
+        self.input_cols = list(input_cols)
+        self.ratios = list(ratios)
+        self.num_slices = len(self.ratios)
+        self.cum_ratios = np.array([sum(self.ratios[:j + 1]) for j in range(self.num_slices)])
+        self.eps = 1e-6
+
+        self.x = np.asarray(values, dtype=float)
+        self.dates = np.asarray(dates).astype('datetime64[ns]').view('int64')
+        self.ref = np.array([x_ref[col] for col in self.input_cols], dtype=float)
+        self.tol = np.array([x_tol[col] for col in self.input_cols], dtype=float)
+        self.length = len(self.x)
+
+        # get_y 용 점수 누적합
+        self.score_cum, self.score_nan = self._score_prefix(np.exp(-((self.x - self.ref) / self.tol) ** 2))
+
+        # get_aj 용 결측 제외 값 누적합 (변수별 길이가 달라 목록으로 보관)
+        valid = ~np.isnan(self.x)
+        self.valid_cum = np.vstack([np.zeros((1, len(self.input_cols)), dtype=np.int64), np.cumsum(valid, axis=0)])
+        self.moments = []
+        for i in range(len(self.input_cols)):
+            v = self.x[valid[:, i], i]
+            shift = v.mean() if len(v) else 0.0
+            d = v - shift
+            changes = np.concatenate(([0, 0], np.cumsum(v[1:] != v[:-1])))
+            self.moments.append((
+                np.concatenate(([0.0], np.cumsum(d))),
+                np.concatenate(([0.0], np.cumsum(d * d))),
+                changes,
+            ))
+
+        self._shift_cache = {}
+        self._grad_prefix = None
+        self._value_cum = None
+        self.on_grow = None  # 지연 누적합 추가 시 호출 (캐시 크기 재측정)
+
+    def _grown(self):
+        if self.on_grow is not None:
+            self.on_grow()
+
+    @staticmethod
+    def _score_prefix(score):
+        nan = np.isnan(score)
+        zero = np.zeros((1,) + score.shape[1:])
+        score_cum = np.concatenate([zero, np.cumsum(np.where(nan, 0.0, score), axis=0)])
+        nan_cum = np.concatenate([zero.astype(np.int64), np.cumsum(nan, axis=0)])
+        return score_cum, nan_cum
+
+    def rows_at(self, minutes):
+        """시작 후 minutes 분까지의 행 수 (get_lot_df(lot, m) 길이와 동일)"""
+        if self.length == 0:
+            return np.zeros(np.shape(minutes), dtype=np.int64)
+        cutoff = self.dates[0] + np.asarray(minutes, dtype=np.int64) * 60_000_000_000
+        return np.searchsorted(self.dates, cutoff, side='right')
+
+    def _y_bounds(self, n):
+        """get_y 구간 경계 (len(n), num_slices + 1)"""
+        n = np.asarray(n, dtype=np.int64)
+        slice_len = n // self.num_slices
+        bounds = slice_len[:, None] * np.arange(self.num_slices + 1)
+        bounds[:, -1] = n
+        return bounds
+
+    def _means(self, score_cum, score_nan, n):
+        """누적합에서 구간 평균 (len(n), ..., num_slices), 빈 구간은 0, NaN 포함 구간은 NaN"""
+        bounds = self._y_bounds(n)
+        lo, hi = bounds[:, :-1], bounds[:, 1:]
+        total = score_cum[hi] - score_cum[lo]
+        nan = score_nan[hi] - score_nan[lo]
+        count = (hi - lo).reshape(hi.shape + (1,) * (total.ndim - 2))
+        means = np.divide(total, count, out=np.zeros_like(total), where=count > 0)
+        means[nan > 0] = np.nan
+        return np.moveaxis(means, 1, -1)
+
+    def slice_means(self, n):
+        """변수별 get_y 구간 점수 평균 (len(n), 변수, 구간)"""
+        return self._means(self.score_cum, self.score_nan, n)
+
+    def shifted_slice_means(self, var_idx, deltas, n):
+        """변수 var_idx 를 delta 만큼 이동했을 때 구간 점수 평균 (len(n), delta, 구간)"""
+        key = (var_idx, tuple(np.asarray(deltas, dtype=float).tolist()))
+        prefix = self._shift_cache.get(key)
+        if prefix is None:
+            x = self.x[:, var_idx][:, None] + np.asarray(deltas, dtype=float)[None, :]
+            prefix = self._score_prefix(np.exp(-((x - self.ref[var_idx]) / self.tol[var_idx]) ** 2))
+            self._shift_cache[key] = prefix
+            self._grown()
+        return self._means(prefix[0], prefix[1], n)
+
+    def slice_grad_means(self, n):
+        """변수별 d(점수)/dx 구간 평균 (len(n), 변수, 구간), 상수 이동 시 get_y 구간 평균의 도함수"""
+        if self._grad_prefix is None:
+            z = (self.x - self.ref) / self.tol
+            self._grad_prefix = self._score_prefix(np.exp(-z ** 2) * (-2 * z / self.tol))
+            self._grown()
+        return self._means(self._grad_prefix[0], self._grad_prefix[1], n)
+
+    def value_means(self, n):
+        """변수별 시작 후 n 행까지 결측 제외 값 평균 (len(n), 변수), 값이 없으면 NaN"""
+        if self._value_cum is None:
+            self._value_cum = self._score_prefix(self.x)[0]
+            self._grown()
+        n = np.asarray(n, dtype=np.int64)
+        total, count = self._value_cum[n], self.valid_cum[n]
+        return np.divide(total, count, out=np.full(total.shape, np.nan), where=count > 0)
+
+    def values_at(self, n):
+        """변수별 n 번째 행 값 (len(n), 변수), n = 0 이면 0"""
+        n = np.asarray(n, dtype=np.int64)
+        if self.length == 0:
+            return np.zeros((len(n), len(self.input_cols)))
+        return np.where((n > 0)[:, None], self.x[np.maximum(n - 1, 0)], 0.0)
+
+    def a_ij(self, n):
+        """get_aj 구간 분산 가중치 (len(n), 변수, 구간)"""
+        n = np.asarray(n, dtype=np.int64)
+        cuts = (self.cum_ratios[None, :] * n[:, None]).astype(np.int64)
+        cuts = np.hstack([np.zeros((len(n), 1), dtype=np.int64), cuts])
+
+        out = np.zeros((len(n), len(self.input_cols), self.num_slices))
+        for i, (s1, s2, changes) in enumerate(self.moments):
+            nv = self.valid_cum[n, i]
+            ranks = np.minimum(cuts, nv[:, None])
+            lo, hi = ranks[:, :-1], ranks[:, 1:]
+            c = hi - lo
+            total = s1[hi] - s1[lo]
+            sq = s2[hi] - s2[lo]
+            var = np.divide(sq - total * total / np.maximum(c, 1), c, out=np.zeros(c.shape, dtype=float), where=c > 1)
+            # 구간 내 값 변화가 없으면 분산 0 (eps 대비 누적합 오차 방지)
+            constant = changes[np.maximum(hi, 1)] - changes[np.minimum(lo + 1, np.maximum(hi, 1))] == 0
+            var[constant | (var < 0)] = 0.0
+            inv_vars = 1 / (var + self.eps)
+            out[:, i] = inv_vars / inv_vars.sum(axis=1, keepdims=True)
+        return out
+
+    @staticmethod
+    def combine(w_vec, a_ij, means):
+        """get_y 와 같은 변수→구간 순서 누적 합산 (..., 변수, 구간) → (...)"""
+        terms = np.asarray(w_vec, dtype=float)[:, None] * a_ij * means
+        flat = terms.reshape(terms.shape[:-2] + (-1,))
+        return np.cumsum(flat, axis=-1)[..., -1] * 100
+
+    def y(self, n, w_vec):
+        """시작 후 n 행까지의 y (len(n),)"""
+        return self.combine(w_vec, self.a_ij(n), self.slice_means(n))
+
+
+class CutoffTerms:
+    """LotCutoffIndex 의 분 목록별 a_ij / 구간 점수 평균 / 도함수 평균 / y (처음 조회 시 1회 계산, 요청 안에서 공유)"""
+
+    def __init__(self, index, w_vec, minutes):
+        self.index = index
+        self.w_vec = w_vec
+        self.w_arr = np.array(list(w_vec.values()))
+        self.n = index.rows_at(np.asarray(minutes))
+        self._values = {}
+
+    def _get(self, name, compute):
+        if name not in self._values:
+            self._values[name] = compute()
+        return self._values[name]
+
+    @property
+    def a_ij(self):
+        return self._get('a_ij', lambda: self.index.a_ij(self.n))
+
+    @property
+    def means(self):
+        return self._get('means', lambda: self.index.slice_means(self.n))
+
+    @property
+    def grad_means(self):
+        return self._get('grad_means', lambda: self.index.slice_grad_means(self.n))
+
+    @property
+    def y(self):
+        return self._get('y', lambda: self.index.combine(self.w_arr, self.a_ij, self.means))
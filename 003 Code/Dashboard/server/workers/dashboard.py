@@ -0,0 +1,57 @@
+import pandas as pd
+
+SECTIONS = ('worker1', 'worker2', 'worker5', 'worker6')
+
+
+class DashboardContext:
+    """/dashboard/data 요청 1회 공유 컨텍스트
+
+    lot slice, 분 단위 시간축, 분별 CutoffTerms(가중치, cutoff 인덱스, a_ij, 구간 점수 평균)를
+    한 번만 만들어 Worker1/2/5/6 이 같은 값을 쓰도록 한다.
+    """
+
+    INPUT_COLS = ['x5', 'x1', 'x3', 'x2', 'x4']
+    RATIOS = [0.2, 0.6, 0.2]
+
+    def __init__(self, data_processor, lot):
+        self.dp = data_processor
+        self.lot = lot
+        self.lot_df = data_processor.get_lot_df(lot)
+        self.axis = self._build_axis()
+        self._terms = {}
+
+    def _build_axis(self):
+        """lot 시작 시각 / 분 단위 시간축 (Worker2/5/6 과 같은 형식), 데이터 없으면 (None, None)"""
+        if self.lot_df.empty:
+            return None, None
+        base_t0 = self.lot_df['date'].iloc[0]
+        max_minutes = int((self.lot_df['date'].iloc[-1] - base_t0).total_seconds() / 60)
+        time_labels = [
+            (base_t0 + pd.to_timedelta(i, unit='min')).strftime('%H:%M')
+            for i in range(max_minutes + 1)
+        ]
+        return base_t0, time_labels
+
+    def terms(self, minute):
+        """minute 분 시점 CutoffTerms (같은 분은 재사용), lot 데이터 없으면 None"""
+        if minute not in self._terms:
+            self._terms[minute] = self.dp.get_cutoff_terms(self.lot, self.INPUT_COLS, [minute], ratios=self.RATIOS)
+        return self._terms[minute]
+
+
+def build_dashboard(context, workers, sections=SECTIONS, minute=None, timestamp=None, modes=None):
+    """sections 의 worker 응답을 공유 컨텍스트로 계산해 {section: data} 반환"""
+    modes = modes or {}
+    out = {}
+    for name in sections:
+        worker = workers[name]
+        kwargs = {
+            'current_lot': context.lot,
+            'current_minute': minute,
+            'info_box_timestamp': timestamp,
+            'context': context,
+        }
+        if name != 'worker5':
+            kwargs['mode'] = modes.get(name)
+        out[name] = worker.get_chart_data(**kwargs)
+    return out
@@ -0,0 +1,69 @@
+import threading
+import uuid
+from collections import OrderedDict
+
+
+def diff_payload(old, new, path=()):
+    """두 payload 차이 → 연산 목록
+
+    - ['set', path, value]: 값 교체 (새 키 포함)
+    - ['append', path, items]: 기존 리스트 뒤에 items 추가 (앞부분이 그대로인 경우)
+    - ['del', path]: 키 삭제
+    dict 는 키 단위로 내려가며 비교하고, 리스트는 앞부분 일치 여부만 본다.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = []
+        for key, value in new.items():
+            if key not in old:
+                ops.append(['set', list(path + (key,)), value])
+            else:
+                ops.extend(diff_payload(old[key], value, path + (key,)))
+        for key in old:
+            if key not in new:
+                ops.append(['del', list(path + (key,))])
+        return ops
+
+    if old is new:
+        return []
+    if isinstance(old, list) and isinstance(new, list) and 0 < len(old) <= len(new) and new[:len(old)] == old:
+        return [['append', list(path), new[len(old):]]] if len(new) > len(old) else []
+    if type(old) is type(new) and old == new:
+        return []
+    return [['set', list(path), new]]
+
+
+class DeltaEncoder:
+    """클라이언트별 마지막 전송 payload 를 기억해 변경분만 내려주는 인코더
+
+    클라이언트는 직전 응답의 version 을 since 로 보내고, 서버가 기억하는 version 과
+    다르면(최초 요청, 서버 재시작, 오래된 클라이언트 정리 등) 전체 스냅샷을 보낸다.
+    """
+
+    def __init__(self, max_clients=64):
+        self.max_clients = max_clients
+        self.epoch = uuid.uuid4().hex[:8]
+        self.clients = OrderedDict()  # client -> (version, payload)
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def encode(self, client, since, data):
+        """since 기준 응답 필드 dict ({'version', 'full', 'data'} 또는 {'version', 'full', 'base', 'ops'})"""
+        with self._lock:
+            self._counter += 1
+            version = f'{self.epoch}.{self._counter}'
+            prev = self.clients.pop(client, None)
+            self.clients[client] = (version, data)
+            while len(self.clients) > self.max_clients:
+                self.clients.popitem(last=False)
+
+        if prev is None or since is None or prev[0] != since:
+            return {'version': version, 'full': True, 'data': data}
+        return {'version': version, 'full': False, 'base': since, 'ops': diff_payload(prev[1], data)}
+
+    def reset(self, client=None):
+        """client 상태 삭제 (None 이면 전체), 다음 요청은 전체 스냅샷"""
+        with self._lock:
+            if client is None:
+                self.clients.clear()
+            else:
+                self.clients.pop(client, None)
@@ -0,0 +1,116 @@
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+
+from common import DataProcessor
+from replay_store import ReplayStore
+from worker2 import Worker2
+from worker5 import Worker5
+from worker6 import Worker6
+
+# pool 프로세스별 worker (initializer 에서 공유 데이터셋 attach 후 생성)
+_workers = {}
+
+
+def _attach_workers(dataset_dir, replay_dir=None):
+    dp = DataProcessor(None)
+    dp.attach(dataset_dir)
+    _workers.update(worker2=Worker2(dp), worker5=Worker5(dp), worker6=Worker6(dp))
+    if replay_dir is not None:
+        replay = ReplayStore(replay_dir, dp)
+        for worker in _workers.values():
+            worker.replay = replay
+
+
+def _call(worker_name, method, kwargs):
+    return getattr(_workers[worker_name], method)(**kwargs)
+
+
+def _ready():
+    return len(_workers)
+
+
+class OffloadError(Exception):
+    status_code = 500
+
+
+class OffloadBusy(OffloadError):
+    """endpoint 동시 실행 제한 초과 (timeout 동안 빈 자리 없음)"""
+    status_code = 503
+
+
+class OffloadTimeout(OffloadError):
+    """pool 계산이 timeout 안에 끝나지 않음 (계산은 계속되고 끝나면 자리 반환)"""
+    status_code = 504
+
+
+class WorkerOffload:
+    """무거운 worker 호출을 공유 데이터셋이 attach 된 process pool 에서 실행 (endpoint 별 동시 실행 제한 + timeout)
+
+    요청 스레드는 결과를 기다리기만 하므로 GIL 을 잡지 않고, 가벼운 요청(Worker1, /health)은 서버 프로세스에서 바로 처리된다.
+    """
+
+    def __init__(self, dataset_dir, processes=2, limits=None, timeout=30.0, replay_dir=None):
+        self.processes = processes
+        self.timeout = timeout
+        self.limits = dict(limits or {})
+        self._semaphores = {name: threading.BoundedSemaphore(n) for name, n in self.limits.items()}
+        self._stats = {name: {'calls': 0, 'running': 0, 'busy': 0, 'timeouts': 0, 'errors': 0} for name in self.limits}
+        self._lock = threading.Lock()
+        # 스레드가 도는 서버 프로세스에서 fork 하지 않도록 spawn 사용
+        self.pool = ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_attach_workers,
+            initargs=(dataset_dir, replay_dir),
+        )
+
+    def warm_up(self):
+        """pool 프로세스를 모두 띄워 attach 완료까지 대기"""
+        futures = [self.pool.submit(_ready) for _ in range(self.processes)]
+        return [future.result() for future in futures]
+
+    def handles(self, endpoint):
+        return endpoint in self.limits
+
+    def _count(self, endpoint, key, delta=1):
+        with self._lock:
+            self._stats[endpoint][key] += delta
+
+    def _finished(self, endpoint, semaphore, future):
+        self._count(endpoint, 'running', -1)
+        if not future.cancelled() and future.exception() is not None:
+            self._count(endpoint, 'errors')
+        semaphore.release()
+
+    def call(self, endpoint, worker_name, method, **kwargs):
+        """pool 에서 worker_name.method(**kwargs) 실행 후 결과 반환 (대기 + 계산 전체가 timeout 초 이내)"""
+        deadline = time.monotonic() + self.timeout
+        semaphore = self._semaphores[endpoint]
+        if not semaphore.acquire(timeout=self.timeout):
+            self._count(endpoint, 'busy')
+            raise OffloadBusy(f'{endpoint} is busy ({self.limits[endpoint]} running)')
+
+        try:
+            future = self.pool.submit(_call, worker_name, method, kwargs)
+        except Exception:
+            semaphore.release()
+            raise
+        self._count(endpoint, 'calls')
+        self._count(endpoint, 'running')
+        future.add_done_callback(lambda f: self._finished(endpoint, semaphore, f))
+
+        try:
+            return future.result(timeout=max(deadline - time.monotonic(), 0))
+        except FutureTimeoutError:
+            self._count(endpoint, 'timeouts')
+            raise OffloadTimeout(f'{endpoint} timed out after {self.timeout:g}s')
+
+    def stats(self):
+        with self._lock:
+            endpoints = {name: dict(st) for name, st in self._stats.items()}
+        return {'processes': self.processes, 'timeout': self.timeout, 'limits': dict(self.limits), 'endpoints': endpoints}
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
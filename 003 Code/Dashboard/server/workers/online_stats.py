@@ -0,0 +1,202 @@
+import numpy as np
+import pandas as pd
+
+
+class RunningMoments:
+    """개수/평균/편차제곱합 누적 (Chan 병합)"""
+
+    def __init__(self, n=0, mean=0.0, m2=0.0):
+        self.n = int(n)
+        self.mean = float(mean)
+        self.m2 = float(m2)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        mean_b = float(values.mean())
+        m2_b = float(((values - mean_b) ** 2).sum())
+        self.merge(RunningMoments(len(values), mean_b, m2_b))
+
+    def merge(self, other):
+        if other.n == 0:
+            return
+        if self.n == 0:
+            self.n, self.mean, self.m2 = other.n, other.mean, other.m2
+            return
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.n = n
+
+    def std(self, ddof=1):
+        return float(np.sqrt(self.m2 / (self.n - ddof))) if self.n > ddof else np.nan
+
+
+class RunningCorrelation:
+    """열별 (x, target) 상관계수 누적 (둘 다 결측이 아닌 행 기준, Chan 병합), get_wi 와 같은 방식의 가중치"""
+
+    def __init__(self, cols, target_col):
+        self.cols = list(cols)
+        self.target_col = target_col
+        k = len(self.cols)
+        self.n = np.zeros(k)
+        self.mean_x = np.zeros(k)
+        self.mean_y = np.zeros(k)
+        self.m2_x = np.zeros(k)
+        self.m2_y = np.zeros(k)
+        self.c_xy = np.zeros(k)
+
+    @classmethod
+    def from_frame(cls, df, cols, target_col):
+        state = cls(cols, target_col)
+        state.update(df)
+        return state
+
+    def update(self, df):
+        if self.target_col not in df.columns:
+            return
+        y = df[self.target_col].to_numpy(dtype=float)
+        for i, col in enumerate(self.cols):
+            if col not in df.columns:
+                continue
+            x = df[col].to_numpy(dtype=float)
+            valid = ~(np.isnan(x) | np.isnan(y))
+            nb = int(valid.sum())
+            if nb == 0:
+                continue
+            xb, yb = x[valid], y[valid]
+            mx, my = float(xb.mean()), float(yb.mean())
+            dx, dy = xb - mx, yb - my
+            n = self.n[i] + nb
+            delta_x, delta_y = mx - self.mean_x[i], my - self.mean_y[i]
+            scale = self.n[i] * nb / n
+            self.m2_x[i] += float(dx @ dx) + delta_x * delta_x * scale
+            self.m2_y[i] += float(dy @ dy) + delta_y * delta_y * scale
+            self.c_xy[i] += float(dx @ dy) + delta_x * delta_y * scale
+            self.mean_x[i] += delta_x * nb / n
+            self.mean_y[i] += delta_y * nb / n
+            self.n[i] = n
+
+    def weights(self):
+        """|상관계수| 정규화 가중치 (값 변화가 없는 열은 0, 모두 없으면 균등)"""
+        valid = self.m2_x > 0
+        if not valid.any():
+            return {col: 1 / len(self.cols) for col in self.cols}
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = np.abs(self.c_xy / np.sqrt(self.m2_x * self.m2_y))
+        total = corr[valid].sum()
+        return {col: float(corr[i] / total) if valid[i] else 0.0 for i, col in enumerate(self.cols)}
+
+
+class QuantileSketch:
+    """병합 가능한 분위수 sketch (KLL 방식 compactor, 값 k 개 이하에서는 정확값)"""
+
+    def __init__(self, k=1024):
+        self.k = k
+        self.levels = [np.empty(0)]  # level i 원소 가중치 = 2 ** i
+        self.n = 0
+        self._flip = 0
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self.n += len(values)
+        self._compress()
+
+    def merge(self, other):
+        for i, items in enumerate(other.levels):
+            if i == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[i] = np.concatenate([self.levels[i], items])
+        self.n += other.n
+        self._compress()
+
+    def _compress(self):
+        i = 0
+        while i < len(self.levels):
+            items = self.levels[i]
+            if len(items) > self.k:
+                items = np.sort(items)
+                keep = items[len(items) - len(items) % 2:]  # 홀수 개면 마지막 1개는 현재 level 에 유지
+                pairs = items[:len(items) - len(items) % 2]
+                promoted = pairs[self._flip::2]
+                self._flip ^= 1
+                self.levels[i] = keep
+                if i + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[i + 1] = np.concatenate([self.levels[i + 1], promoted])
+            i += 1
+
+    def quantile(self, q):
+        """선형 보간 분위수 (pandas quantile 과 같은 위치 정의)"""
+        if self.n == 0:
+            return np.nan
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(lv), 2.0 ** i) for i, lv in enumerate(self.levels)])
+        order = np.argsort(items, kind='mergesort')
+        items, weights = items[order], weights[order]
+        # 원소 i 가 펼쳐진 구간의 중앙 위치 (가중치 1 이면 0..n-1)
+        positions = np.cumsum(weights) - weights + (weights - 1) / 2
+        return float(np.interp(q * (weights.sum() - 1), positions, items))
+
+
+class GroupRefTolState:
+    """(paper, bw) 그룹별 ref/tol 온라인 갱신 상태
+
+    mean±std 변수는 RunningMoments, median±IQR 변수는 QuantileSketch 로 누적하고
+    get_ref_tol_dict_with_plot 과 같은 반올림 규칙으로 ref/tol 을 다시 만든다.
+    """
+
+    def __init__(self, group_cols, mean_std_vars, iqr_vars, std_multiplier=2.0, iqr_multiplier=1.5):
+        self.group_cols = list(group_cols)
+        self.mean_std_vars = list(mean_std_vars)
+        self.iqr_vars = list(iqr_vars)
+        self.std_multiplier = std_multiplier
+        self.iqr_multiplier = iqr_multiplier
+        self.moments = {}
+        self.sketches = {}
+
+    @classmethod
+    def from_frame(cls, df, group_cols, mean_std_vars, iqr_vars, **kwargs):
+        state = cls(group_cols, mean_std_vars, iqr_vars, **kwargs)
+        state.update(df)
+        return state
+
+    def update(self, df):
+        """df 행을 그룹별로 누적, 갱신된 그룹 키 목록 반환"""
+        touched = []
+        for gkey, gdf in df.groupby(self.group_cols, dropna=False, observed=True):
+            if not isinstance(gkey, tuple):
+                gkey = (gkey,)
+            moments = self.moments.setdefault(gkey, {col: RunningMoments() for col in self.mean_std_vars})
+            sketches = self.sketches.setdefault(gkey, {col: QuantileSketch() for col in self.iqr_vars})
+            for col in self.mean_std_vars:
+                moments[col].update(gdf[col].to_numpy())
+            for col in self.iqr_vars:
+                sketches[col].update(gdf[col].to_numpy())
+            touched.append(gkey)
+        return touched
+
+    def ref_tol(self, gkey):
+        ref, tol = {}, {}
+        for col, m in self.moments.get(gkey, {}).items():
+            if m.n == 0:
+                ref[col], tol[col] = np.nan, np.nan
+            else:
+                std = m.std(ddof=1)
+                ref[col] = round(float(m.mean), 2)
+                tol[col] = round(float(std * self.std_multiplier if np.isfinite(std) else np.nan), 2)
+        for col, sk in self.sketches.get(gkey, {}).items():
+            if sk.n == 0:
+                ref[col], tol[col] = np.nan, np.nan
+            else:
+                iqr = sk.quantile(0.75) - sk.quantile(0.25)
+                ref[col] = round(float(sk.quantile(0.5)), 2)
+                tol[col] = round(float(iqr * self.iqr_multiplier if np.isfinite(iqr) else np.nan), 2)
+        return ref, tol
@@ -0,0 +1,302 @@
+import json
+import os
+import shutil
+import time
+import numpy as np
+
+REPLAY_VERSION = 1
+META_FILE = 'meta.json'
+RATIOS = [0.2, 0.6, 0.2]
+
+# lot × 분 행 배열 (lot 별 0..max_minutes+1 분, 이후 분은 전체 행이 포함되어 마지막 행과 같음)
+MINUTE_ARRAYS = (
+    'w2_y_now', 'w2_y_best', 'w2_norm_d', 'w2_gain', 'w2_current', 'w2_mean',
+    'w5_contrib', 'w5_y', 'w6_sens',
+)
+SCALAR_ARRAYS = ('w2_y_now', 'w2_y_best', 'w5_y')
+# lot × 유사 lot 재계산 시점 행 배열
+CHECKPOINT_ARRAYS = ('w1_minutes', 'w1_similar', 'w1_scores', 'w1_y', 'w1_ok')
+SIMILAR_K = 3
+
+
+def _to_py(v):
+    return v.item() if isinstance(v, np.generic) else v
+
+
+def _lot_minute_count(lot_df):
+    max_minutes = int((lot_df['date'].iloc[-1] - lot_df['date'].iloc[0]).total_seconds() / 60)
+    return max_minutes + 2
+
+
+def _nan_rows(name, count, num_vars):
+    return np.full(count if name in SCALAR_ARRAYS else (count, num_vars), np.nan)
+
+
+def _minute_block(worker2, worker5, worker6, lot, terms, count):
+    """lot 1개의 분별 Worker2/5/6 수치, (배열 dict, [worker2, worker5, worker6 성공 여부])"""
+    block = {name: _nan_rows(name, count, len(worker2.INPUT_COLS)) for name in MINUTE_ARRAYS}
+    ok = [False, False, False]
+    if terms is None:
+        return block, ok
+
+    try:
+        arrays = worker2._strategy_arrays(terms, worker2.SEARCH_MODE)
+        for name in ('y_now', 'y_best', 'norm_d', 'gain', 'current', 'mean'):
+            block[f'w2_{name}'] = arrays[name]
+        ok[0] = True
+    except Exception as e:
+        print(f"[Replay] Worker2 failed for lot {lot}: {e}")
+    try:
+        block['w5_contrib'], block['w5_y'] = worker5._contribution_matrix(None, None, terms)
+        ok[1] = True
+    except Exception as e:
+        print(f"[Replay] Worker5 failed for lot {lot}: {e}")
+    try:
+        block['w6_sens'] = worker6._sensitivity_matrix(None, None, terms)[0]
+        ok[2] = True
+    except Exception as e:
+        print(f"[Replay] Worker6 failed for lot {lot}: {e}")
+    return block, ok
+
+
+def _checkpoint_block(worker1, lot, lot_df, lot_pos):
+    """lot 1개의 재계산 시점별 Worker1 유사 lot (배열 dict, 그룹 테이블 max_minute), 테이블이 없으면 None"""
+    paper, bw = lot_df['paper'].iloc[0], lot_df['bw'].iloc[0]
+    table = worker1._checkpoint_table(paper, bw)
+    if table is None:
+        return None, -1
+
+    minutes = list(table['minutes'])
+    block = {
+        'w1_minutes': np.array(minutes, dtype=np.int64),
+        'w1_similar': np.full((len(minutes), SIMILAR_K), -1, dtype=np.int64),
+        'w1_scores': np.full((len(minutes), SIMILAR_K), np.nan),
+        'w1_y': np.full(len(minutes), np.nan),
+        'w1_ok': np.zeros(len(minutes), dtype=bool),
+    }
+    for j, minute in enumerate(minutes):
+        found = worker1._find_similar(paper, bw, lot, minute, worker1.similarity_mode)
+        if isinstance(found, dict):
+            continue
+        similar_lots, y_current, scores = found
+        block['w1_similar'][j, :len(similar_lots)] = [lot_pos[s] for s in similar_lots]
+        block['w1_scores'][j, :len(scores)] = scores
+        block['w1_y'][j] = y_current
+        block['w1_ok'][j] = True
+    return block, table['max_minute']
+
+
+def build_replay_store(store_dir, dp, worker1, worker2, worker5, worker6):
+    """전체 lot × 분의 Worker1/2/5/6 분석 결과를 store_dir 에 배열로 저장 (기존 store 교체)
+
+    Worker2 는 SEARCH_MODE, Worker1 은 similarity_mode 결과만 저장하고, 다른 mode 는 서빙 시 직접 계산한다.
+    """
+    started = time.monotonic()
+    lots = list(dp.lot_index.keys())
+    lot_pos = {lot: i for i, lot in enumerate(lots)}
+    num_vars = len(worker2.INPUT_COLS)
+
+    minute_counts = np.zeros(len(lots), dtype=np.int64)
+    checkpoint_counts = np.zeros(len(lots), dtype=np.int64)
+    ok = np.zeros((len(lots), 3), dtype=bool)
+    tol = np.full((len(lots), num_vars), np.nan)
+    w1_max_minute = np.full(len(lots), -1, dtype=np.int64)
+    blocks = {name: [] for name in MINUTE_ARRAYS + CHECKPOINT_ARRAYS}
+
+    for k, lot in enumerate(lots):
+        lot_df = dp.get_lot_df(lot)
+        if lot_df.empty:
+            continue
+
+        count = _lot_minute_count(lot_df)
+        try:
+            terms = dp.get_cutoff_terms(lot, worker2.INPUT_COLS, list(range(count)), ratios=RATIOS)
+        except Exception as e:
+            print(f"[Replay] Cutoff index failed for lot {lot}: {e}")
+            terms = None
+        block, ok[k] = _minute_block(worker2, worker5, worker6, lot, terms, count)
+        if terms is not None:
+            tol[k] = terms.index.tol
+        for name in MINUTE_ARRAYS:
+            blocks[name].append(block[name])
+        minute_counts[k] = count
+
+        block, w1_max_minute[k] = _checkpoint_block(worker1, lot, lot_df, lot_pos)
+        if block is not None:
+            for name in CHECKPOINT_ARRAYS:
+                blocks[name].append(block[name])
+            checkpoint_counts[k] = len(block['w1_minutes'])
+
+        if (k + 1) % 500 == 0:
+            print(f"[Replay] {k + 1}/{len(lots)} lots ({time.monotonic() - started:.1f}s)")
+
+    arrays = {
+        'minute_offsets': np.concatenate(([0], np.cumsum(minute_counts))),
+        'checkpoint_offsets': np.concatenate(([0], np.cumsum(checkpoint_counts))),
+        'ok': ok,
+        'tol': tol,
+        'w1_max_minute': w1_max_minute,
+    }
+    for name, parts in blocks.items():
+        arrays[name] = np.concatenate(parts) if parts else _nan_rows(name, 0, num_vars)
+
+    os.makedirs(os.path.dirname(os.path.abspath(store_dir)), exist_ok=True)
+    tmp = store_dir.rstrip(os.sep) + '.tmp'
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    files = {}
+    for name, values in arrays.items():
+        files[name] = f'{name}.npy'
+        np.save(os.path.join(tmp, files[name]), np.ascontiguousarray(values))
+
+    meta = {
+        'version': REPLAY_VERSION,
+        'source': dp.source_fingerprint(),
+        'rows': len(dp.cal_df),
+        'lots': [_to_py(lot) for lot in lots],
+        'input_cols': list(worker2.INPUT_COLS),
+        'modes': {'worker1': worker1.similarity_mode, 'worker2': worker2.SEARCH_MODE},
+        'arrays': files,
+        'built_seconds': round(time.monotonic() - started, 1),
+    }
+    with open(os.path.join(tmp, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    shutil.rmtree(store_dir, ignore_errors=True)
+    os.replace(tmp, store_dir)
+
+    total_bytes = sum(values.nbytes for values in arrays.values())
+    print(f"[Replay] Store ready: {len(lots)} lots, {int(minute_counts.sum())} lot-minutes, "
+          f"{total_bytes / 1e6:.1f} MB, {meta['built_seconds']}s")
+    return {
+        'status': 'ok',
+        'lots': len(lots),
+        'lot_minutes': int(minute_counts.sum()),
+        'bytes': int(total_bytes),
+        'seconds': meta['built_seconds'],
+    }
+
+
+class ReplayStore:
+    """build_replay_store 결과 조회 (배열은 읽기 전용 memory-map)
+
+    데이터가 store 생성 시점과 같을 때만 값을 돌려주고, 저장되지 않은 lot / mode / 분이나
+    데이터 변경(가중치 변경, 해당 lot 그룹의 append / ref·tol 재계산) 이후에는 None 을 돌려줘 worker 가 직접 계산하게 한다.
+    """
+
+    def __init__(self, store_dir, data_processor):
+        with open(os.path.join(store_dir, META_FILE), encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('version') != REPLAY_VERSION:
+            raise RuntimeError(f'Replay store version mismatch in {store_dir}')
+
+        lots = list(data_processor.lot_index.keys())
+        source = data_processor.source_fingerprint()
+        if meta['rows'] != len(data_processor.cal_df) or meta['lots'] != [_to_py(lot) for lot in lots]:
+            raise RuntimeError(f'Replay store {store_dir} does not match the loaded data')
+        if source is not None and meta.get('source') is not None and meta['source'] != source:
+            raise RuntimeError(f'Replay store {store_dir} was built from different data ({meta["source"]})')
+
+        self.store_dir = store_dir
+        self.dp = data_processor
+        self.data_version = data_processor.data_version
+        self.group_versions = dict(data_processor.group_versions)
+        self.groups = {lot: gkey for gkey, group in data_processor.group_lots.items() for lot in group}
+        self.modes = meta['modes']
+        self.lots = lots
+        self.pos = {lot: i for i, lot in enumerate(lots)}
+        self.arrays = {
+            name: np.load(os.path.join(store_dir, file_name), mmap_mode='r')
+            for name, file_name in meta['arrays'].items()
+        }
+        self.bytes = sum(values.nbytes for values in self.arrays.values())
+        self.hits = 0
+        self.misses = 0
+
+    def _lot(self, lot):
+        """lot 위치 (저장되지 않았거나 데이터 / lot 그룹이 바뀌었으면 None)"""
+        k = self.pos.get(lot)
+        gkey = self.groups.get(lot)
+        if (k is None or self.dp.data_version != self.data_version
+                or self.dp.group_versions.get(gkey, 0) != self.group_versions.get(gkey, 0)):
+            self.misses += 1
+            return None
+        return k
+
+    def _minute_rows(self, lot, minutes, worker_idx):
+        """lot 분 목록 → (lot 위치, 배열 행), 마지막 분 이후는 마지막 행, 조회 불가면 (None, None)"""
+        k = self._lot(lot)
+        if k is None:
+            return None, None
+        start, stop = self.arrays['minute_offsets'][k:k + 2]
+        minutes = np.asarray(minutes, dtype=np.int64)
+        if stop == start or not self.arrays['ok'][k, worker_idx] or (minutes < 0).any():
+            self.misses += 1
+            return None, None
+        self.hits += 1
+        return k, start + np.minimum(minutes, stop - start - 1)
+
+    def similar_lots(self, lot, mode, up_to_minute):
+        """Worker1 재계산 시점 유사 lot (유사 lot, y_current, 유사 lot y), 없으면 None"""
+        if mode != self.modes['worker1']:
+            return None
+        k = self._lot(lot)
+        if k is None:
+            return None
+        start, stop = self.arrays['checkpoint_offsets'][k:k + 2]
+        row = None
+        if stop > start:
+            if mode == 'score' and (up_to_minute is None or up_to_minute >= self.arrays['w1_max_minute'][k]):
+                row = stop - 1  # 모든 lot 이 끝까지 포함되는 시점
+            elif up_to_minute is not None:
+                minutes = self.arrays['w1_minutes'][start:stop]
+                j = int(np.searchsorted(minutes, up_to_minute))
+                if j < len(minutes) and minutes[j] == up_to_minute:
+                    row = start + j
+        if row is None or not self.arrays['w1_ok'][row]:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        similar = [int(i) for i in self.arrays['w1_similar'][row] if i >= 0]
+        scores = list(self.arrays['w1_scores'][row][:len(similar)])
+        return [self.lots[i] for i in similar], float(self.arrays['w1_y'][row]), scores
+
+    def strategy(self, lot, minutes, mode):
+        """Worker2 분별 전략 수치 (Worker2._strategy_arrays 형식), 없으면 None"""
+        if mode != self.modes['worker2']:
+            return None
+        k, rows = self._minute_rows(lot, minutes, 0)
+        if rows is None:
+            return None
+        out = {name: self.arrays[f'w2_{name}'][rows] for name in ('y_now', 'y_best', 'norm_d', 'gain', 'current', 'mean')}
+        out['tol'] = self.arrays['tol'][k]
+        return out
+
+    def contributions(self, lot, minutes):
+        """Worker5 분별 (기여도, y), 없으면 None"""
+        k, rows = self._minute_rows(lot, minutes, 1)
+        if rows is None:
+            return None
+        return self.arrays['w5_contrib'][rows], self.arrays['w5_y'][rows]
+
+    def sensitivities(self, lot, minutes):
+        """Worker6 분별 (dy/dx·tol, tol), 없으면 None"""
+        k, rows = self._minute_rows(lot, minutes, 2)
+        if rows is None:
+            return None
+        return self.arrays['w6_sens'][rows], np.array(self.arrays['tol'][k])
+
+    def stats(self):
+        return {
+            'dir': self.store_dir,
+            'lots': len(self.lots),
+            'lot_minutes': int(self.arrays['minute_offsets'][-1]),
+            'bytes': int(self.bytes),
+            'modes': dict(self.modes),
+            'active': self.dp.data_version == self.data_version,
+            'stale_groups': sum(self.dp.group_versions.get(gkey, 0) != self.group_versions.get(gkey, 0)
+                                for gkey in set(self.groups.values())),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
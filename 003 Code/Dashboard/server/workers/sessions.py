@@ -0,0 +1,109 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class ReadWriteLock:
+    """읽기 다중 / 쓰기 단독 lock (쓰기 대기 중이면 새 읽기는 대기)"""
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writing = False
+        self._waiting_writers = 0
+
+    def acquire_read(self):
+        with self._cond:
+            while self._writing or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+
+    def release_read(self):
+        with self._cond:
+            self._readers -= 1
+            if self._readers == 0:
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        with self._cond:
+            self._waiting_writers += 1
+            while self._writing or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writing = True
+
+    def release_write(self):
+        with self._cond:
+            self._writing = False
+            self._cond.notify_all()
+
+    @contextmanager
+    def read(self):
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self):
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+class PlaybackSession:
+    """대시보드 1개의 worker 별 재생 상태 (lot, 분, 옵션)"""
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.lock = threading.Lock()
+        self.workers = {}
+        self.last_seen = time.monotonic()
+
+    def state(self, worker_name):
+        """worker 별 상태 dict ({'lot', 'minute', 'mode', 'timestamp'}), 없으면 생성"""
+        return self.workers.setdefault(worker_name, {'lot': None, 'minute': 0, 'mode': None, 'timestamp': None})
+
+
+class SessionStore:
+    """session id → PlaybackSession (유휴 시간 초과 또는 최대 개수 초과 시 오래된 순 정리)"""
+
+    def __init__(self, max_sessions=256, idle_ttl=3600.0):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is None:
+                session = PlaybackSession(session_id)
+            session.last_seen = now
+            self._sessions[session_id] = session
+
+            while self._sessions:
+                oldest = next(iter(self._sessions.values()))
+                if oldest is session:
+                    break
+                if len(self._sessions) <= self.max_sessions and now - oldest.last_seen <= self.idle_ttl:
+                    break
+                self._sessions.popitem(last=False)
+            return session
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def summary(self):
+        """session id 별 worker lot/분 요약"""
+        with self._lock:
+            sessions = list(self._sessions.values())
+        return {
+            s.session_id: {name: {'lot': st['lot'], 'minute': st['minute']} for name, st in s.workers.items()}
+            for s in sessions
+        }
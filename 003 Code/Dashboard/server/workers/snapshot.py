@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+
+SNAPSHOT_VERSION = 1
+META_FILE = 'meta.json'
+CURRENT_FILE = 'current.json'
+
+
+def compute_fingerprint(csv_path, params):
+    """원본 CSV 내용 + 전처리 파라미터 기반 스냅샷 키"""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(json.dumps({'version': SNAPSHOT_VERSION, 'params': params}, sort_keys=True).encode())
+    with open(csv_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _to_py(v):
+    """numpy 스칼라 → JSON 저장용 파이썬 값"""
+    return v.item() if isinstance(v, np.generic) else v
+
+
+def _dump_group_dict(d):
+    return [[[_to_py(k) for k in gkey], {col: _to_py(v) for col, v in vals.items()}]
+            for gkey, vals in d.items()]
+
+
+def _load_group_dict(items):
+    return {tuple(gkey): vals for gkey, vals in items}
+
+
+def save_snapshot(snapshot_dir, fingerprint, df, ref_dict, tol_dict, extra=None, arrays=None):
+    """cal_df 컬럼별 .npy + ref/tol 메타 저장 (기존 스냅샷은 교체)
+
+    extra 는 JSON 직렬화 가능한 부가 상태, arrays 는 이름 → 파생 ndarray (load_snapshot_arrays 로 memory-map)
+    """
+    os.makedirs(snapshot_dir, exist_ok=True)
+    target = os.path.join(snapshot_dir, fingerprint)
+    tmp = target + '.tmp'
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    columns = []
+    for i, col in enumerate(df.columns):
+        ser = df[col]
+        file_name = f'col_{i}.npy'
+        entry = {'name': col, 'file': file_name}
+
+        if isinstance(ser.dtype, pd.CategoricalDtype) or ser.dtype == object:
+            cat = ser.astype('category').cat
+            entry['kind'] = 'category'
+            entry['categories'] = [_to_py(v) for v in cat.categories.tolist()]
+            values = cat.codes.to_numpy()
+        elif pd.api.types.is_datetime64_any_dtype(ser.dtype):
+            entry['kind'] = 'datetime'
+            if ser.dt.tz is not None:
+                entry['tz'] = str(ser.dt.tz)
+                ser = ser.dt.tz_convert('UTC').dt.tz_localize(None)
+            entry['dtype'] = str(ser.dtype)
+            values = ser.to_numpy().view('int64')
+        else:
+            entry['kind'] = 'numeric'
+            values = ser.to_numpy()
+
+        np.save(os.path.join(tmp, file_name), np.ascontiguousarray(values))
+        columns.append(entry)
+
+    array_files = {}
+    for i, (name, values) in enumerate((arrays or {}).items()):
+        array_files[name] = f'arr_{i}.npy'
+        np.save(os.path.join(tmp, array_files[name]), np.ascontiguousarray(values))
+
+    meta = {
+        'version': SNAPSHOT_VERSION,
+        'fingerprint': fingerprint,
+        'rows': len(df),
+        'columns': columns,
+        'ref_dict': _dump_group_dict(ref_dict),
+        'tol_dict': _dump_group_dict(tol_dict),
+        'extra': extra,
+        'arrays': array_files,
+    }
+    with open(os.path.join(tmp, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(tmp, target)
+
+    # 다른 fingerprint 스냅샷 정리
+    for name in os.listdir(snapshot_dir):
+        if name != fingerprint and os.path.isdir(os.path.join(snapshot_dir, name)):
+            shutil.rmtree(os.path.join(snapshot_dir, name), ignore_errors=True)
+
+
+def load_snapshot(snapshot_dir, fingerprint):
+    """fingerprint 일치 시 (cal_df, ref_dict, tol_dict, extra) 반환, 컬럼은 memory-map 으로 연결"""
+    target = os.path.join(snapshot_dir, fingerprint)
+    meta_path = os.path.join(target, META_FILE)
+    if not os.path.exists(meta_path):
+        return None
+
+    with open(meta_path, encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta.get('version') != SNAPSHOT_VERSION or meta.get('fingerprint') != fingerprint:
+        return None
+
+    data = {}
+    for entry in meta['columns']:
+        values = np.load(os.path.join(target, entry['file']), mmap_mode='r')
+        if entry['kind'] == 'category':
+            data[entry['name']] = pd.Categorical.from_codes(values, categories=entry['categories'])
+        elif entry['kind'] == 'datetime':
+            values = values.view(entry['dtype'])
+            if 'tz' in entry:
+                values = pd.DatetimeIndex(values).tz_localize('UTC').tz_convert(entry['tz'])
+            data[entry['name']] = values
+        else:
+            data[entry['name']] = values
+
+    df = pd.DataFrame(data, copy=False)
+    return df, _load_group_dict(meta['ref_dict']), _load_group_dict(meta['tol_dict']), meta.get('extra')
+
+
+def load_snapshot_arrays(snapshot_dir, fingerprint):
+    """save_snapshot(arrays=...) 로 저장한 파생 배열 (이름 → 읽기 전용 memory-map)"""
+    target = os.path.join(snapshot_dir, fingerprint)
+    with open(os.path.join(target, META_FILE), encoding='utf-8') as f:
+        files = json.load(f).get('arrays') or {}
+    return {name: np.load(os.path.join(target, file_name), mmap_mode='r') for name, file_name in files.items()}
+
+
+def publish_current(snapshot_dir, fingerprint):
+    """attach 프로세스가 CSV 지문 계산 없이 찾을 수 있도록 현재 스냅샷 fingerprint 기록"""
+    path = os.path.join(snapshot_dir, CURRENT_FILE)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump({'fingerprint': fingerprint}, f)
+    os.replace(path + '.tmp', path)
+
+
+def read_current(snapshot_dir):
+    """publish_current 로 기록된 fingerprint (없으면 None)"""
+    try:
+        with open(os.path.join(snapshot_dir, CURRENT_FILE), encoding='utf-8') as f:
+            return json.load(f).get('fingerprint')
+    except (OSError, ValueError):
+        return None
@@ -0,0 +1,128 @@
+import json
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class StreamHub:
+    """채널별 SSE 구독자에게 내부 clock 1개로 주기적 update push
+
+    tick 마다 구독자가 있는 채널의 plan(channel) 으로 이번 계산 키를 정하고, 같은 키는 compute(key) 를 1번만
+    실행해 해당 채널들의 모든 구독자에게 같은 결과를 보낸다. 구독자 queue 가 차면 오래된 메시지부터 버린다.
+    """
+
+    def __init__(self, plan, compute, interval=5.0, keepalive=25.0, max_queue=8, compute_threads=4):
+        self.plan = plan          # channel → (계산 키, 메시지 메타 dict) 또는 None (보낼 것 없음)
+        self.compute = compute    # 계산 키 → data
+        self.interval = interval
+        self.keepalive = keepalive
+        self.max_queue = max_queue
+        self._channels = {}       # channel → 구독자 queue 목록
+        self._lock = threading.Lock()
+        self._clock = None
+        self._executor = ThreadPoolExecutor(max_workers=compute_threads, thread_name_prefix='stream')
+        self.ticks = 0
+        self.computed = 0
+        self.sent = 0
+        self.dropped = 0
+        self.last_tick_ms = 0.0
+
+    def subscribe(self, channel):
+        subscriber = queue.Queue(maxsize=self.max_queue)
+        with self._lock:
+            self._channels.setdefault(channel, []).append(subscriber)
+            if self._clock is None:
+                self._clock = threading.Thread(target=self._run, name='stream-clock', daemon=True)
+                self._clock.start()
+        return subscriber
+
+    def unsubscribe(self, channel, subscriber):
+        with self._lock:
+            subscribers = self._channels.get(channel, [])
+            if subscriber in subscribers:
+                subscribers.remove(subscriber)
+            if not subscribers:
+                self._channels.pop(channel, None)
+
+    def events(self, channel):
+        """구독 → SSE 문자열 generator (연결이 끊기면 구독 해제)"""
+        subscriber = self.subscribe(channel)
+        try:
+            while True:
+                try:
+                    message = subscriber.get(timeout=self.keepalive)
+                except queue.Empty:
+                    yield ':ping\n\n'
+                    continue
+                yield f'data: {message}\n\n'
+        finally:
+            self.unsubscribe(channel, subscriber)
+
+    def _run(self):
+        next_tick = time.monotonic() + self.interval
+        while True:
+            time.sleep(max(next_tick - time.monotonic(), 0))
+            started = time.monotonic()
+            self.tick()
+            self.last_tick_ms = (time.monotonic() - started) * 1000
+            # 계산이 interval 보다 길면 밀린 tick 은 건너뜀
+            next_tick = max(next_tick + self.interval, time.monotonic())
+
+    def tick(self):
+        """구독 채널 전체 1회 갱신 (계산 키가 같은 채널은 결과 공유)"""
+        with self._lock:
+            channels = {channel: list(subs) for channel, subs in self._channels.items() if subs}
+        self.ticks += 1
+
+        planned = {}
+        for channel in channels:
+            try:
+                plan = self.plan(channel)
+            except Exception as e:
+                plan = (None, {'status': 'error', 'message': str(e)})
+            if plan is not None:
+                planned[channel] = plan
+
+        keys = {key for key, _ in planned.values() if key is not None}
+        futures = {key: self._executor.submit(self.compute, key) for key in keys}
+        self.computed += len(futures)
+
+        for channel, (key, meta) in planned.items():
+            if key is None:
+                message = meta
+            else:
+                try:
+                    message = {**meta, 'data': futures[key].result()}
+                except Exception as e:
+                    message = {'status': 'error', 'message': str(e)}
+            self._publish(channels[channel], json.dumps(message, ensure_ascii=False, default=str))
+
+    def _publish(self, subscribers, message):
+        for subscriber in subscribers:
+            while True:
+                try:
+                    subscriber.put_nowait(message)
+                    self.sent += 1
+                    break
+                except queue.Full:
+                    try:
+                        subscriber.get_nowait()
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+
+    def stats(self):
+        with self._lock:
+            subscribers = sum(len(subs) for subs in self._channels.values())
+            channels = len(self._channels)
+        return {
+            'interval': self.interval,
+            'channels': channels,
+            'subscribers': subscribers,
+            'ticks': self.ticks,
+            'computed': self.computed,
+            'sent': self.sent,
+            'dropped': self.dropped,
+            'last_tick_ms': round(self.last_tick_ms, 1),
+        }
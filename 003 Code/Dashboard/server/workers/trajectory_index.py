@@ -0,0 +1,86 @@
+import numpy as np
+
+
+def paa_embed(values, dates, offsets, ref, tol, segments=8, up_to_minute=None):
+    """lot 별 (ref, tol) 정규화 궤적을 구간 평균(PAA)으로 요약 → (lot, 변수 × segments)
+
+    values/dates 는 lot 순으로 이어 붙인 행, lot k 는 offsets[k]:offsets[k+1].
+    구간은 시작 후 up_to_minute 분(None 이면 lot 자체 길이)을 segments 등분하며,
+    행이 없는 구간은 직전 구간 값을 유지한다 (lot 이 먼저 끝나면 마지막 값 hold).
+    """
+    offsets = np.asarray(offsets, dtype=np.int64)
+    num_lots = len(offsets) - 1
+    num_vars = values.shape[1]
+    if num_lots <= 0:
+        return np.empty((0, num_vars * segments))
+
+    lengths = np.diff(offsets)
+    seg = np.repeat(np.arange(num_lots), lengths)
+    t = (dates - dates[offsets[:-1]][seg]) / np.timedelta64(1, 'm')
+    if up_to_minute is None:
+        window = np.maximum(t[offsets[1:] - 1], 1e-9)[seg]
+    else:
+        window = max(float(up_to_minute), 1e-9)
+    bucket = np.minimum((t / window * segments).astype(np.int64), segments - 1)
+    bins = seg * segments + bucket
+
+    scale = np.where(np.isfinite(tol) & (tol > 0), tol, 1.0)
+    z = (np.asarray(values, dtype=float) - np.nan_to_num(ref)) / scale
+
+    out = np.empty((num_lots, num_vars, segments))
+    for i in range(num_vars):
+        valid = ~np.isnan(z[:, i])
+        total = np.bincount(bins[valid], weights=z[valid, i], minlength=num_lots * segments)
+        count = np.bincount(bins[valid], minlength=num_lots * segments)
+        means = np.divide(total, count, out=np.full(total.shape, np.nan), where=count > 0)
+        out[:, i] = _fill_segments(means.reshape(num_lots, segments))
+    return np.nan_to_num(out.reshape(num_lots, -1))
+
+
+def _fill_segments(means):
+    """빈 구간 ffill → bfill (lot 별)"""
+    idx = np.where(np.isnan(means), 0, np.arange(means.shape[1]))
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    filled = np.take_along_axis(means, idx, axis=1)
+    first = np.argmax(~np.isnan(filled), axis=1)
+    head = np.take_along_axis(filled, first[:, None], axis=1)
+    return np.where(np.isnan(filled), head, filled)
+
+
+def dtw_distance(a, b, band=None):
+    """다변량 DTW 거리 (a, b: (길이, 변수)), band 지정 시 Sakoe-Chiba 제한"""
+    n, m = len(a), len(b)
+    if band is None:
+        band = max(n, m)
+    band = max(band, abs(n - m))
+    cost = np.sqrt(((a[:, None, :] - b[None, :, :]) ** 2).sum(axis=-1)).tolist()
+    acc = np.full((n + 1, m + 1), np.inf).tolist()
+    acc[0][0] = 0.0
+    for i in range(1, n + 1):
+        for j in range(max(1, i - band), min(m, i + band) + 1):
+            acc[i][j] = cost[i - 1][j - 1] + min(acc[i - 1][j - 1], acc[i - 1][j], acc[i][j - 1])
+    return float(acc[n][m])
+
+
+class TrajectoryIndex:
+    """(paper, bw) 그룹 lot 궤적 embedding 최근접 탐색 (행렬곱 brute force)"""
+
+    def __init__(self, lots, embeddings):
+        self.lots = list(lots)
+        self.pos = {lot: i for i, lot in enumerate(self.lots)}
+        self.embeddings = np.ascontiguousarray(embeddings, dtype=np.float64)
+        self.norms = (self.embeddings ** 2).sum(axis=1)
+
+    def query(self, lot, k=3):
+        """lot 과 embedding 거리가 가까운 순서로 k 개 (index, 거리), 동일 거리는 lot 순"""
+        idx = self.pos.get(lot)
+        if idx is None or len(self.lots) < 2:
+            return []
+        dist = self.norms - 2 * (self.embeddings @ self.embeddings[idx]) + self.norms[idx]
+        dist = np.sqrt(np.maximum(dist, 0.0))
+        dist[idx] = np.inf
+
+        k = min(k, len(self.lots) - 1)
+        cand = np.argpartition(dist, k - 1)[:k] if k < len(dist) else np.arange(len(dist))
+        cand = cand[np.lexsort((cand, dist[cand]))][:k]
+        return [(int(i), float(dist[i])) for i in cand]
@@ -1,4 +1,8 @@
-from common import get_st, get_aj, get_wi, get_y
+import contextlib
+import threading
+from common import get_wi, get_y_batch, grid_columns
+from bounded_cache import cache_registry
+from trajectory_index import TrajectoryIndex, paa_embed, dtw_distance
 import pandas as pd
 import numpy as np
 
@@ -17,14 +21,29 @@ class Worker1:
 
     PADDING_MODE = "hold"
 
+    # 유사 lot 기준: "score" (y 거리) | "trajectory" (궤적 embedding) | "trajectory_dtw" (+ DTW 재정렬)
+    SIMILARITY_MODE = "score"
+    PAA_SEGMENTS = 8
+    DTW_CANDIDATES = 10
+    DTW_SEGMENTS = 24
+    DTW_BAND = 3
+
     def __init__(self, data_processor):
         self.dp = data_processor
+        # (lot, mode, 재계산 시점) 단위 결과, 밀려난 항목은 조회 시 다시 계산
         self.cache = {
-            'similar_lots': {},
-            'similar_lots_data': {},
-            'bands': {},
-            'time_labels': {},
+            'similar_lots': cache_registry.create('worker1.similar_lots'),
+            'similar_lots_data': cache_registry.create('worker1.similar_lots_data'),
+            'bands': cache_registry.create('worker1.bands'),  # lot → 기준값 밴드
+            'time_labels': cache_registry.create('worker1.time_labels'),
         }
+        self._cache_version = self.dp.data_version
+        self._cache_lock = threading.Lock()
+        self.checkpoints = {'version': None, 'groups': {}}  # (paper, bw) → 재계산 시점별 정렬 y 테이블
+        self.trajectories = {'version': None, 'groups': {}}  # (paper, bw) → {시점: TrajectoryIndex}
+        self.similarity_mode = self.SIMILARITY_MODE
+        self.replay = None  # 사전 계산 결과 store (replay 모드, ReplayStore)
+        self.dp.add_append_listener(self.invalidate_lots)
 
     # 유틸 메서드
 
@@ -48,197 +67,360 @@ class Worker1:
                 out[var] = {'ref': None, 'lower': None, 'upper': None}
         return out
 
-    def _pad_series(self, series_list, max_len):
-        out = list(series_list)
-        if len(out) >= max_len:
-            return out[:max_len]
-        pad_len = max_len - len(out)
-        if self.PADDING_MODE == "hold":
-            last = out[-1] if out else None
-            out.extend([last] * pad_len)
-        else:  # "none"
-            out.extend([None] * pad_len)
-        return out
-
-    # 유사 lot 계산
-
-    def calculate_similar_lots(self, current_lot, up_to_minute=None):
-        cal_df = self.dp.cal_df
-        lot_df_full = cal_df[cal_df['lot'] == current_lot].sort_values('date').copy()
-        if lot_df_full.empty:
-            return {'status': 'error', 'message': f'No data for lot {current_lot}'}
-
-        base_t0 = lot_df_full['date'].min()
-
-        if up_to_minute is not None:
-            cutoff_time = base_t0 + pd.to_timedelta(up_to_minute, unit='m')
-            lot_df_partial = lot_df_full[lot_df_full['date'] <= cutoff_time].copy()
-        else:
-            lot_df_partial = lot_df_full.copy()
-
-        paper = lot_df_full['paper'].iloc[0]
-        bw = lot_df_full['bw'].iloc[0]
+    # 재계산 시점 테이블
+
+    @staticmethod
+    def recalc_minute(minute):
+        """minute 시점에 적용되는 유사 lot 재계산 시점 (0~15분은 5분, 이후 10분 간격)"""
+        if minute is None or minute <= 0:
+            return 0
+        return minute // 5 * 5 if minute < 20 else minute // 10 * 10
+
+    @staticmethod
+    def checkpoint_minutes(max_minute):
+        """get_chart_data 재계산 시점 (0, 5, 10, 15, 20, 30, ...) 중 max_minute 를 덮는 범위"""
+        minutes = [0, 5, 10, 15]
+        while minutes[-1] < max_minute:
+            minutes.append(minutes[-1] // 10 * 10 + 10)
+        return minutes
+
+    def _group_scores(self, paper, bw, up_to_minute):
+        """(paper, bw) 전체 lot 의 시점 y (lot 목록, y 배열), 실패 시 오류 dict"""
         gkey = (paper, bw)
-        df_same_set = cal_df[(cal_df['paper'] == paper) & (cal_df['bw'] == bw)].copy()
-
         x_ref = self.dp.ref_dict.get(gkey, {})
         x_tol = self.dp.tol_dict.get(gkey, {})
 
         try:
-            w_vec, _ = get_wi(df_same_set, self.INPUT_COLS, 'cal_production')
+            w_vec, _ = get_wi(self.dp.get_group_df(paper, bw), self.INPUT_COLS, 'cal_production')
         except Exception as e:
             return {'status': 'error', 'message': f'get_wi failed: {e}'}
 
-        results = []
-        for lot, df_lot in df_same_set.groupby('lot'):
-            df_lot_sorted = df_lot.sort_values('date')
-            
-            if up_to_minute is not None:
-                lot_t0 = df_lot_sorted['date'].min()
-                cutoff_time = lot_t0 + pd.to_timedelta(up_to_minute, unit='m')
-                df_used = df_lot_sorted[df_lot_sorted['date'] <= cutoff_time].copy()
-            else:
-                df_used = df_lot_sorted
-            
-            if df_used.empty:
-                continue
-                
-            try:
-                score_mat = get_st(df_used, self.INPUT_COLS, x_ref, x_tol)
-                a_ij = get_aj(df_used, self.INPUT_COLS, ratios=[0.2, 0.6, 0.2])
-                y = get_y(score_mat, a_ij, w_vec)
-            except Exception:
-                continue
-            results.append({'lot': lot, 'y': y})
+        lots, values, offsets = self.dp.get_group_block(paper, bw, self.INPUT_COLS, up_to_minute)
+        try:
+            y_all = get_y_batch(values, offsets, self.INPUT_COLS, x_ref, x_tol, w_vec, ratios=[0.2, 0.6, 0.2])
+        except Exception:
+            return {'status': 'error', 'message': 'No comparable lots'}
 
-        if not results:
+        if len(lots) == 0:
             return {'status': 'error', 'message': 'No comparable lots'}
+        return lots, y_all
+
+    def _build_checkpoint_table(self, paper, bw):
+        """그룹 lot 전체를 재계산 시점마다 점수화해 y 오름차순 정렬 (binary search 용)"""
+        lots = self.dp.get_group_lots(paper, bw)
+        if not lots:
+            return None
+        _, _, offsets, dates = self.dp.get_group_block(paper, bw, self.INPUT_COLS, with_dates=True)
+        spans = dates[offsets[1:] - 1] - dates[offsets[:-1]]
+        max_minute = int(np.ceil(spans.max() / np.timedelta64(1, 'm')))
+
+        minutes = self.checkpoint_minutes(max_minute)
+        y_rows = []
+        for minute in minutes:
+            scores = self._group_scores(paper, bw, minute)
+            if isinstance(scores, dict):
+                return None
+            y_rows.append(scores[1])
+
+        y = np.vstack(y_rows)
+        order = np.argsort(y, axis=1, kind='stable')  # NaN 은 끝으로
+        return {
+            'lots': list(lots),
+            'pos': {lot: i for i, lot in enumerate(lots)},
+            'minutes': {minute: i for i, minute in enumerate(minutes)},
+            'max_minute': max_minute,
+            'y': y,
+            'order': order,
+            'sorted_y': np.take_along_axis(y, order, axis=1),
+            'valid': (~np.isnan(y)).sum(axis=1),
+        }
 
-        score_df = pd.DataFrame(results)
-        if current_lot not in score_df['lot'].values:
-            return {'status': 'error', 'message': f'Current lot {current_lot} not in score set'}
+    def _group_version(self, paper, bw):
+        """그룹 데이터 버전 (만드는 도중 바뀐 테이블 / 인덱스는 저장하지 않음)"""
+        return self.dp.data_version, self.dp.group_versions.get((paper, bw), 0)
+
+    def _checkpoint_table(self, paper, bw):
+        if self.checkpoints['version'] != self.dp.data_version:
+            self.checkpoints = {'version': self.dp.data_version, 'groups': {}}
+        groups = self.checkpoints['groups']
+        table = groups.get((paper, bw))
+        if table is None and (paper, bw) not in groups:
+            version = self._group_version(paper, bw)
+            table = self._build_checkpoint_table(paper, bw)
+            if self._group_version(paper, bw) == version:
+                groups[(paper, bw)] = table
+        return table
+
+    def precompute_checkpoints(self, lock=None):
+        """전체 (paper, bw) 조합 재계산 시점 테이블 생성 (/init 후 background 실행)
+
+        lock: 그룹마다 잡을 읽기 lock 을 돌려주는 함수 (예: data_lock.read), 그룹 사이에는 쓰기 요청이 끼어들 수 있음
+        """
+        for paper, bw in list(self.dp.group_lots.keys()):
+            with lock() if lock is not None else contextlib.nullcontext():
+                if (paper, bw) not in self.dp.group_lots:
+                    continue
+                table = self._checkpoint_table(paper, bw)
+                if table is not None and self.similarity_mode != 'score':
+                    for minute in table['minutes']:
+                        self._trajectory_index(paper, bw, minute)
+        print(f"[Worker1] Checkpoint tables ready: {len(self.checkpoints['groups'])} groups")
+
+    # 궤적 유사도
+
+    def _group_embeddings(self, paper, bw, up_to_minute, segments, lots_idx=None):
+        """그룹 lot 궤적 PAA embedding (lots_idx 지정 시 해당 lot 만), (lot 목록, embedding)"""
+        lots, values, offsets, dates = self.dp.get_group_block(
+            paper, bw, self.INPUT_COLS, up_to_minute, with_dates=True
+        )
+        if lots_idx is not None:
+            rows = np.concatenate([np.arange(offsets[i], offsets[i + 1]) for i in lots_idx])
+            values, dates = values[rows], dates[rows]
+            offsets = np.concatenate(([0], np.cumsum([offsets[i + 1] - offsets[i] for i in lots_idx])))
+            lots = [lots[i] for i in lots_idx]
 
-        y_current = float(score_df.loc[score_df['lot'] == current_lot, 'y'].values[0])
-        score_df['distance'] = (score_df['y'] - y_current).abs()
-        similar_lots = score_df[score_df['lot'] != current_lot].nsmallest(3, 'distance')['lot'].tolist()
-
-        prev_similar = self.cache.get('similar_lots', {}).get(current_lot, [])
-        
-        self.cache['similar_lots'][current_lot] = similar_lots
-        
-        if prev_similar != similar_lots:
-            self._cache_similar_lots_data(current_lot, similar_lots)
-            self._cache_time_labels(current_lot, similar_lots, base_t0)
-            print(f"[Worker1] Similar lots changed for {current_lot}: {prev_similar} -> {similar_lots}")
-        
-        self.cache['bands'][current_lot] = self._build_bands(x_ref, x_tol)
-
-        similar_scores = [score_df.loc[score_df['lot']==lot, 'y'].values[0] for lot in similar_lots]
-        print(f"[Worker1] Lot {current_lot} at minute {up_to_minute}: Similar lots = {similar_lots}")
-        print(f"[Worker1] Y-scores: Current={y_current:.2f}, Similar={similar_scores}")
+        gkey = (paper, bw)
+        x_ref = self.dp.ref_dict.get(gkey, {})
+        x_tol = self.dp.tol_dict.get(gkey, {})
+        ref = np.array([x_ref.get(var, np.nan) for var in self.INPUT_COLS], dtype=float)
+        tol = np.array([x_tol.get(var, np.nan) for var in self.INPUT_COLS], dtype=float)
+        return lots, paa_embed(values, dates, offsets, ref, tol, segments, up_to_minute)
+
+    def _trajectory_index(self, paper, bw, up_to_minute):
+        """재계산 시점 궤적 인덱스 (시점이 아닌 분은 매번 생성)"""
+        if self.trajectories['version'] != self.dp.data_version:
+            self.trajectories = {'version': self.dp.data_version, 'groups': {}}
+        per_group = self.trajectories['groups'].setdefault((paper, bw), {})
+        index = per_group.get(up_to_minute)
+        if index is None:
+            version = self._group_version(paper, bw)
+            lots, embeddings = self._group_embeddings(paper, bw, up_to_minute, self.PAA_SEGMENTS)
+            index = TrajectoryIndex(lots, embeddings)
+            table = self._checkpoint_table(paper, bw)
+            if self._group_version(paper, bw) != version:
+                return index
+            if up_to_minute is None or (table is not None and up_to_minute in table['minutes']):
+                per_group[up_to_minute] = index
+        return index
+
+    def _trajectory_neighbors(self, paper, bw, current_lot, up_to_minute, dtw=False, k=3):
+        """궤적 embedding 최근접 k 개 lot, dtw=True 면 상위 후보를 DTW 거리로 재정렬"""
+        index = self._trajectory_index(paper, bw, up_to_minute)
+        candidates = index.query(current_lot, self.DTW_CANDIDATES if dtw else k)
+        if not dtw or not candidates:
+            return [index.lots[i] for i, _ in candidates[:k]]
+
+        lots_idx = [index.pos[current_lot]] + [i for i, _ in candidates]
+        _, seqs = self._group_embeddings(paper, bw, up_to_minute, self.DTW_SEGMENTS, lots_idx)
+        seqs = seqs.reshape(len(lots_idx), len(self.INPUT_COLS), self.DTW_SEGMENTS).transpose(0, 2, 1)
+        dists = [dtw_distance(seqs[0], seq, self.DTW_BAND) for seq in seqs[1:]]
+        order = sorted(range(len(candidates)), key=lambda j: (dists[j], candidates[j][0]))
+        return [index.lots[candidates[j][0]] for j in order[:k]]
+
+    @staticmethod
+    def _nearest_lots(lots, y, order, sorted_y, n_valid, current_idx, k=3):
+        """|y - y_current| 최소 k 개 lot (동일 거리는 lot 순), 정렬 y 에서 binary search"""
+        y_current = y[current_idx]
+        if np.isnan(y_current) or n_valid == 0:
+            return []
+        sorted_y = sorted_y[:n_valid]
+        p = int(np.searchsorted(sorted_y, y_current))
+        cand = order[max(0, p - k - 1):min(n_valid, p + k + 1)]
+        cand = cand[cand != current_idx]
+        if len(cand) == 0:
+            return []
+
+        # k 번째 거리와 같은 거리의 lot 이 창 밖에 있을 수 있어 해당 거리 범위로 다시 선택
+        dist = np.abs(y[cand] - y_current)
+        d_k = np.sort(dist)[min(k, len(dist)) - 1]
+        margin = d_k * 1e-12 + 1e-300
+        lo = int(np.searchsorted(sorted_y, y_current - d_k - margin, side='left'))
+        hi = int(np.searchsorted(sorted_y, y_current + d_k + margin, side='right'))
+        cand = order[lo:hi]
+        cand = cand[cand != current_idx]
+        dist = np.abs(y[cand] - y_current)
+        keep = np.lexsort((cand, dist))[:k]
+        return [lots[i] for i in cand[keep]]
 
-        return {'status': 'ok', 'similar_lots': similar_lots, 'y_current': y_current}
+    # 유사 lot 계산
 
-    def _cache_similar_lots_data(self, current_lot, similar_lots):
-        cal_df = self.dp.cal_df
-        data_by_var = {}
+    def calculate_similar_lots(self, current_lot, up_to_minute=None, mode=None):
+        return self._calculate_similar(current_lot, up_to_minute, mode)[0]
 
-        for var in self.INPUT_COLS:
-            var_dict = {}
-            for lot in similar_lots:
-                lot_data = cal_df[cal_df['lot'] == lot].sort_values('date').copy()
-                if lot_data.empty:
-                    continue
+    def _find_similar(self, paper, bw, current_lot, up_to_minute, mode):
+        """재계산 시점 테이블(없으면 직접 점수화)로 유사 lot 선택, (유사 lot, y_current, 유사 lot y) 또는 오류 dict"""
+        table = self._checkpoint_table(paper, bw)
+        row = None
+        if table is not None:
+            if up_to_minute is None or up_to_minute >= table['max_minute']:
+                row = len(table['minutes']) - 1  # 모든 lot 이 끝까지 포함되는 시점
+            else:
+                row = table['minutes'].get(up_to_minute)
 
-                lot_t0 = lot_data['date'].min()
-                lot_data['time_min'] = ((lot_data['date'] - lot_t0).dt.total_seconds() / 60).astype(int)
-                ser = lot_data.set_index('time_min')[var].sort_index()
-                if ser.empty:
-                    continue
+        if row is not None:
+            lots, pos = table['lots'], table['pos']
+            y_all = table['y'][row]
+            order, sorted_y, n_valid = table['order'][row], table['sorted_y'][row], table['valid'][row]
+        else:
+            # 재계산 시점이 아닌 분 또는 테이블 생성 실패 → 직접 계산
+            scores = self._group_scores(paper, bw, up_to_minute)
+            if isinstance(scores, dict):
+                return scores
+            lots, y_all = scores
+            pos = {lot: i for i, lot in enumerate(lots)}
+            order = np.argsort(y_all, kind='stable')
+            sorted_y, n_valid = y_all[order], int((~np.isnan(y_all)).sum())
+
+        current_idx = pos.get(current_lot)
+        if current_idx is None:
+            return {'status': 'error', 'message': f'Current lot {current_lot} not in score set'}
 
-                lot_max_min = int(ser.index.max())
-                idx = pd.RangeIndex(0, lot_max_min + 1, 1)
-                ser = ser.reindex(idx).ffill().bfill()
-                var_dict[lot] = [round(float(x), 3) if pd.notna(x) else None for x in ser.tolist()]
+        y_current = float(y_all[current_idx])
+        if mode == 'score':
+            similar_lots = self._nearest_lots(lots, y_all, order, sorted_y, n_valid, current_idx)
+        else:
+            similar_lots = self._trajectory_neighbors(
+                paper, bw, current_lot, up_to_minute, dtw=(mode == 'trajectory_dtw')
+            )
+        return similar_lots, y_current, [y_all[pos[lot]] for lot in similar_lots]
+
+    def _check_cache_version(self):
+        """append 로 가중치가 바뀌는 등 전체 데이터 변경 시 유사 lot / 격자 / 밴드 / 시간축 캐시 전체 폐기"""
+        with self._cache_lock:
+            if self._cache_version != self.dp.data_version:
+                self._cache_version = self.dp.data_version
+                for cache in self.cache.values():
+                    cache.clear()
+
+    def _calculate_similar(self, current_lot, up_to_minute=None, mode=None):
+        """유사 lot 계산 후 캐시, (결과 dict, (유사 lot, 격자, 밴드, 시간축) 또는 실패 시 None)"""
+        self._check_cache_version()
+        mode = mode or self.similarity_mode
+        if mode not in ('score', 'trajectory', 'trajectory_dtw'):
+            return {'status': 'error', 'message': f'Unknown similarity mode: {mode}'}, None
+
+        lot_df_full = self.dp.get_lot_df(current_lot)
+        if lot_df_full.empty:
+            return {'status': 'error', 'message': f'No data for lot {current_lot}'}, None
 
-            data_by_var[var] = var_dict
+        base_t0 = lot_df_full['date'].iloc[0]
 
-        self.cache['similar_lots_data'][current_lot] = data_by_var
+        paper = lot_df_full['paper'].iloc[0]
+        bw = lot_df_full['bw'].iloc[0]
+        gkey = (paper, bw)
+
+        x_ref = self.dp.ref_dict.get(gkey, {})
+        x_tol = self.dp.tol_dict.get(gkey, {})
+
+        found = self.replay.similar_lots(current_lot, mode, up_to_minute) if self.replay is not None else None
+        if found is None:
+            found = self._find_similar(paper, bw, current_lot, up_to_minute, mode)
+            if isinstance(found, dict):
+                return found, None
+        similar_lots, y_current, similar_scores = found
+
+        # 유사 lot 목록은 마지막에 기록 (동시 조회 시 격자/시간축이 먼저 준비되도록)
+        key = (current_lot, mode, up_to_minute)
+        bands = self._build_bands(x_ref, x_tol)
+        self.cache['bands'][current_lot] = bands
+        grids = self._cache_similar_lots_data(key, similar_lots)
+        time_labels = self._cache_time_labels(key, similar_lots, base_t0)
+        self.cache['similar_lots'][key] = similar_lots
 
-    def _cache_time_labels(self, current_lot, similar_lots, base_t0):
-        cal_df = self.dp.cal_df
-        cl = cal_df[cal_df['lot'] == current_lot].sort_values('date').copy()
-        if cl.empty:
-            self.cache['time_labels'][current_lot] = []
-            return
+        print(f"[Worker1] Lot {current_lot} at minute {up_to_minute}: Similar lots = {similar_lots}")
+        print(f"[Worker1] Y-scores: Current={y_current:.2f}, Similar={similar_scores}")
 
-        current_max_min = int((cl['date'].max() - base_t0).total_seconds() / 60)
-        max_length = current_max_min + 1
+        result = {'status': 'ok', 'similar_lots': similar_lots, 'y_current': y_current, 'mode': mode}
+        return result, (similar_lots, grids, bands, time_labels)
 
+    def _cache_similar_lots_data(self, key, similar_lots):
+        """유사 lot 의 분 단위 격자 (DataProcessor 공유 격자 참조)"""
+        grids = {}
+        for lot in similar_lots:
+            grid = self.dp.get_lot_grid(lot, self.INPUT_COLS)
+            if grid is not None:
+                grids[lot] = grid['values']
+        self.cache['similar_lots_data'][key] = grids
+        return grids
+
+    def _cache_time_labels(self, key, similar_lots, base_t0):
+        grid = self.dp.get_lot_grid(key[0], self.INPUT_COLS)
+        if grid is None:
+            self.cache['time_labels'][key] = []
+            return []
+
+        max_length = len(grid['values'])
         for lot in similar_lots:
-            lot_df = cal_df[cal_df['lot'] == lot].sort_values('date').copy()
-            if lot_df.empty:
-                continue
-            lot_t0 = lot_df['date'].min()
-            lot_max_min = int((lot_df['date'].max() - lot_t0).total_seconds() / 60)
-            if lot_max_min + 1 > max_length:
-                max_length = lot_max_min + 1
-
-        idx = pd.RangeIndex(0, max_length, 1)
-        self.cache['time_labels'][current_lot] = [
-            (base_t0 + pd.to_timedelta(i, unit='min')).strftime('%H:%M') for i in idx
-        ]
+            lot_grid = self.dp.get_lot_grid(lot, self.INPUT_COLS)
+            if lot_grid is not None:
+                max_length = max(max_length, len(lot_grid['values']))
+
+        time_labels = pd.date_range(base_t0, periods=max_length, freq='min').strftime('%H:%M').tolist()
+        self.cache['time_labels'][key] = time_labels
+        return time_labels
+
+    def invalidate_lots(self, lots):
+        """append 로 바뀐 lot 그룹의 재계산 시점 테이블 / 궤적 인덱스 / 유사 lot 결과 폐기 (조회 시 다시 계산)"""
+        groups = set()
+        for lot in set(lots):
+            lot_df = self.dp.get_lot_df(lot)
+            if not lot_df.empty:
+                groups.add((lot_df['paper'].iloc[0], lot_df['bw'].iloc[0]))
+        for gkey in groups:
+            self.checkpoints['groups'].pop(gkey, None)
+            self.trajectories['groups'].pop(gkey, None)
+        # 유사 lot 은 그룹 전체에서 고르므로 그룹 lot 모두 폐기 (격자 / 밴드 / 시간축은 재계산 시 덮어씀)
+        group_lots = {lot for gkey in groups for lot in self.dp.get_group_lots(*gkey)}
+        self.cache['similar_lots'].discard_where(lambda key: key[0] in group_lots)
+
+    def _cached_similar(self, key):
+        """key 의 (유사 lot, 격자, 밴드, 시간축), 하나라도 캐시에서 밀려났으면 None"""
+        self._check_cache_version()
+        similar_lots = self.cache['similar_lots'].get(key)
+        similar_data = self.cache['similar_lots_data'].get(key)
+        bands = self.cache['bands'].get(key[0])
+        time_labels = self.cache['time_labels'].get(key)
+        if similar_lots is None or similar_data is None or bands is None or time_labels is None:
+            return None
+        return similar_lots, similar_data, bands, time_labels
 
     # 스트리밍 응답
 
-    def get_chart_data(self, current_lot, current_minute, info_box_timestamp=None):
-        
-        if current_minute is not None and current_minute > 0:
-            should_recalculate = (
-                current_minute <= 15 and current_minute % 5 == 0 or
-                current_minute > 15 and current_minute % 10 == 0
-            )
-            
-            if should_recalculate:
-                recalc_result = self.calculate_similar_lots(current_lot, up_to_minute=current_minute)
-                if recalc_result.get('status') == 'ok':
-                    print(f"[Worker1] Recalculated similar lots for {current_lot} at minute {current_minute}")
-        
-        similar_lots = self.cache['similar_lots'].get(current_lot, [])
-        similar_data = self.cache['similar_lots_data'].get(current_lot, {})
-        bands = self.cache['bands'].get(current_lot, {})
-        time_labels = self.cache.get('time_labels', {}).get(current_lot, [])
+    def get_chart_data(self, current_lot, current_minute, info_box_timestamp=None, mode=None, context=None):
+        # context: /dashboard/data 공유 컨텍스트 (lot slice 재사용)
+        # 유사 lot 은 (lot, mode, 재계산 시점) 단위로 캐시 → 같은 lot 을 다른 시점에 보는 세션끼리 공유 가능
+        mode = mode or self.similarity_mode
+        key = (current_lot, mode, self.recalc_minute(current_minute))
+        cached = self._cached_similar(key)
+        if cached is None:
+            recalc_result, cached = self._calculate_similar(current_lot, up_to_minute=key[2], mode=mode)
+            if recalc_result.get('status') != 'ok':
+                return recalc_result
+            print(f"[Worker1] Recalculated similar lots for {current_lot} at minute {key[2]}")
+
+        similar_lots, similar_data, bands, time_labels = cached
         if not time_labels:
             return {'status': 'error', 'message': 'No time_labels cached for this lot'}
 
         max_length = len(time_labels)
 
-        cal_df = self.dp.cal_df
-        lot_df = cal_df[cal_df['lot'] == current_lot].sort_values('date').copy()
-        if lot_df.empty:
+        lot_df = context.lot_df if context is not None else self.dp.get_lot_df(current_lot)
+        grid = self.dp.get_lot_grid(current_lot, self.INPUT_COLS)
+        if lot_df.empty or grid is None:
             return {'status': 'error', 'message': 'No data for current lot'}
 
-        base_t0 = lot_df['date'].min()
-        lot_df['time_min'] = ((lot_df['date'] - base_t0).dt.total_seconds() / 60).astype(int)
-        current_max_min = int(lot_df['time_min'].max())
+        base_t0 = lot_df['date'].iloc[0]
 
-        current_lot_data = {}
-        for var in self.INPUT_COLS:
-            ser = lot_df.set_index('time_min')[var].sort_index()
-            idx = pd.RangeIndex(0, current_max_min + 1, 1)
-            ser = ser.reindex(idx).ffill().bfill()
-            arr = [round(float(x), 3) if pd.notna(x) else None for x in ser.tolist()]
-            padded = self._pad_series(arr, max_length)
-            current_lot_data[var] = padded
+        current_lot_data = dict(zip(
+            self.INPUT_COLS, grid_columns(grid['values'], max_length, self.PADDING_MODE)
+        ))
 
         similar_data_out = {var: {} for var in self.INPUT_COLS}
-        for var in self.INPUT_COLS:
-            var_dict = similar_data.get(var, {})
-            for lot in similar_lots:
-                series = var_dict.get(lot, [])
-                series = [round(float(x), 3) if (x is not None and pd.notna(x)) else None for x in series]
-                padded = self._pad_series(series, max_length)
-                similar_data_out[var][lot] = padded
+        empty = np.empty((0, len(self.INPUT_COLS)))
+        for lot in similar_lots:
+            columns = grid_columns(similar_data.get(lot, empty), max_length, self.PADDING_MODE)
+            for var, series in zip(self.INPUT_COLS, columns):
+                similar_data_out[var][lot] = series
 
         timestamp = base_t0.strftime('%Y-%m-%d %H:%M')
         cm = int(current_minute) if current_minute is not None else 0
@@ -258,15 +440,12 @@ class Worker1:
         elif max_length == 0:
             cm = 0
 
-        current_row = lot_df[lot_df['time_min'] == cm]
         current_point = {}
-        if not current_row.empty:
+        row = grid['rows'][cm] if 0 <= cm < len(grid['rows']) else -1
+        if row >= 0:
             for var in self.INPUT_COLS:
-                try:
-                    value = current_row[var].iloc[0]
-                    current_point[var] = round(float(value), 3) if pd.notna(value) else None
-                except Exception:
-                    current_point[var] = None
+                value = lot_df[var].iat[row]
+                current_point[var] = round(float(value), 3) if pd.notna(value) else None
 
         return {
             'status': 'ok',
@@ -1,6 +1,7 @@
-from common import get_st, get_aj, get_wi, get_y
+import threading
 import pandas as pd
 import numpy as np
+from bounded_cache import cache_registry
 
 
 class Worker2:
@@ -15,61 +16,126 @@ class Worker2:
         'x4': '건조기 압력',
     }
 
+    SEARCH_MODE = "single"  # "single" (변수별 독립 조정) | "joint" (좌표 하강 복합 조정)
+    NORM_DS = np.array([d for d in np.linspace(-1, 1, 21) if d != 0])  # tol 대비 조정 격자
+    JOINT_SWEEPS = 2
+
+    MEMO_MAX_ENTRIES = 10000  # (lot, 분) 결과 memo 최대 개수 (전략 / 품질 점수 캐시별)
+
     def __init__(self, data_processor):
         self.dp = data_processor
         self.cache = {
-            'strategy_data': {},
-            'quality_scores': {},
-            'sensitivity_data': {},
-            'time_labels': {},
-            'base_times': {},
+            'strategy_data': cache_registry.create('worker2.strategy_data', self.MEMO_MAX_ENTRIES),    # (lot, 분, mode) → 전략 결과
+            'quality_scores': cache_registry.create('worker2.quality_scores', self.MEMO_MAX_ENTRIES),  # (lot, 분, mode) → y_now / y_best / y_gain
+            'time_labels': cache_registry.create('worker2.time_labels'),
+            'base_times': cache_registry.create('worker2.base_times'),
         }
+        self._memo_version = self.dp.data_version
+        self._memo_lock = threading.RLock()  # 데이터 변경 시 memo 폐기와 lot 초기화 보호
+        self.replay = None  # 사전 계산 결과 store (replay 모드, ReplayStore)
+        self.dp.add_append_listener(self.invalidate_lots)
 
-    # 전략 계산
+    # (lot, 분) memo
 
-    def _calculate_strategy_for_cutoff(self, current_lot, cutoff_min):
-        cal_df = self.dp.cal_df
-        lot_df_full = cal_df[cal_df['lot'] == current_lot].sort_values('date').copy()
-        if lot_df_full.empty:
-            return None
+    def _check_memo_version(self):
+        """append 로 가중치가 바뀌는 등 전체 데이터 변경 시 memo 전체 폐기"""
+        with self._memo_lock:
+            if self._memo_version != self.dp.data_version:
+                self._memo_version = self.dp.data_version
+                self.cache['strategy_data'].clear()
+                self.cache['quality_scores'].clear()
 
-        base_t0 = lot_df_full['date'].min()
-        cutoff_time = base_t0 + pd.to_timedelta(cutoff_min, unit='m')
-        lot_df_partial = lot_df_full[lot_df_full['date'] <= cutoff_time].copy()
-        
-        if lot_df_partial.empty:
-            return None
+    def _memo_get(self, name, lot, key):
+        return self.cache[name].get((lot,) + key)
 
-        paper = lot_df_full['paper'].iloc[0]
-        bw = lot_df_full['bw'].iloc[0]
-        gkey = (paper, bw)
-        
-        x_ref = self.dp.ref_dict.get(gkey, {})
-        x_tol = self.dp.tol_dict.get(gkey, {})
+    def _memo_put(self, name, lot, key, value):
+        self.cache[name][(lot,) + key] = value
 
-        try:
-            w_vec, _ = get_wi(cal_df, self.INPUT_COLS, 'cal_production')
-        except Exception as e:
-            print(f"get_wi failed: {e}")
-            return None
+    def _drop_memo(self, lot):
+        with self._memo_lock:
+            for name in ('strategy_data', 'quality_scores'):
+                self.cache[name].discard_where(lambda key: key[0] == lot)
 
-        try:
-            score_mat = get_st(lot_df_partial, self.INPUT_COLS, x_ref, x_tol)
-            a_ij = get_aj(lot_df_partial, self.INPUT_COLS, ratios=[0.2, 0.6, 0.2])
-            y_now = float(get_y(score_mat, a_ij, w_vec))
-        except Exception as e:
-            print(f"Current score calculation failed: {e}")
-            return None
+    # 전략 계산
+
+    def _search(self, terms, mode):
+        """(변수 × 조정량) 격자 탐색을 분별로 한 번에 계산
+
+        a_ij 는 상수 이동에 불변이므로 조정 변수의 구간 점수 평균만 교체해 y 를 다시 합산한다.
+        single: 변수별 독립 조정, joint: 조정량을 누적하며 변수를 순회하는 좌표 하강.
+        반환: y_now (분,), y_best (분,), 변수별 권장 norm_d (분, 변수), 변수별 향상 (분, 변수)
+        """
+        index, w_arr, n = terms.index, terms.w_arr, terms.n
+        num_minutes, num_vars = len(n), len(self.INPUT_COLS)
+        a_ij = terms.a_ij
+        means = terms.means
+        y_now = terms.y
+
+        norm_ds = self.NORM_DS if mode == 'single' else np.linspace(-1, 1, 21)
+        active = [i for i, tol in enumerate(index.tol) if not pd.isna(tol)]
+        best_norm_d = np.zeros((num_minutes, num_vars))
+        gains = np.zeros((num_minutes, num_vars))
+
+        if mode == 'single':
+            y_best = y_now.copy()
+            for i in active:
+                sim_means = np.repeat(means[:, None], len(norm_ds), axis=1)
+                sim_means[:, :, i] = index.shifted_slice_means(i, norm_ds * index.tol[i], n)
+                y_sim = index.combine(w_arr, a_ij[:, None], sim_means)
+                y_sim = np.where(np.isnan(y_sim), -np.inf, y_sim)
+                k = y_sim.argmax(axis=1)
+                y_var = y_sim[np.arange(num_minutes), k]
+                better = y_var > y_now
+                best_norm_d[better, i] = norm_ds[k[better]]
+                gains[:, i] = np.where(better, y_var, y_now) - y_now
+                y_best = np.maximum(y_best, np.where(better, y_var, y_now))
+            return y_now, y_best, best_norm_d, gains
+
+        cur_means = means.copy()
+        y_cur = y_now.copy()
+        for _ in range(self.JOINT_SWEEPS):
+            changed = False
+            for i in active:
+                shifted = index.shifted_slice_means(i, norm_ds * index.tol[i], n)
+                sim_means = np.repeat(cur_means[:, None], len(norm_ds), axis=1)
+                sim_means[:, :, i] = shifted
+                y_sim = index.combine(w_arr, a_ij[:, None], sim_means)
+                y_sim = np.where(np.isnan(y_sim), -np.inf, y_sim)
+                k = y_sim.argmax(axis=1)
+                y_var = y_sim[np.arange(num_minutes), k]
+                better = y_var > y_cur
+                if better.any():
+                    changed = True
+                    cur_means[better, i] = shifted[better, k[better]]
+                    best_norm_d[better, i] = norm_ds[k[better]]
+                    gains[better, i] += y_var[better] - y_cur[better]
+                    y_cur = np.where(better, y_var, y_cur)
+            if not changed:
+                break
+        return y_now, y_cur, best_norm_d, gains
+
+    def _strategy_arrays(self, terms, mode):
+        """terms 의 분별 전략 수치 (y_now, y_best, 권장 norm_d, 향상, 현재 시점값, 평균, tol)"""
+        index = terms.index
+        y_now, y_best, best_norm_d, gains = self._search(terms, mode)
+        current = np.round(index.values_at(terms.n), 3)
+        means = index.value_means(terms.n)
+        return {
+            'y_now': y_now, 'y_best': y_best, 'norm_d': best_norm_d, 'gain': gains,
+            'current': current, 'mean': means, 'tol': index.tol,
+        }
+
+    def _format_strategy(self, arrays, k, w_vec, mode):
+        """_strategy_arrays 결과의 k 번째 분 → 전략 응답"""
+        y_now, max_y = float(arrays['y_now'][k]), float(arrays['y_best'][k])
 
         strategy_data = []
-        max_y = y_now
-        best_deltas = {}
-
-        for var in self.INPUT_COLS:
-            original_mean = float(lot_df_partial[var].mean())
-            current_value = round(float(lot_df_partial[var].iloc[-1]), 3) if len(lot_df_partial) > 0 else 0.0
-            
-            if var not in x_tol or pd.isna(x_tol[var]):
+        for i, var in enumerate(self.INPUT_COLS):
+            original_mean = float(arrays['mean'][k, i])
+            current_value = float(arrays['current'][k, i])
+            tol = float(arrays['tol'][i])
+
+            if pd.isna(tol):
                 strategy_data.append({
                     '센서': self.VARIABLE_NAMES[var],
                     '현재 시점값': current_value,
@@ -79,39 +145,12 @@ class Worker2:
                 })
                 continue
 
-            best_norm_d = 0.0
-            best_y = y_now
-            tol = float(x_tol[var])
-
-            for norm_d in np.linspace(-1, 1, 21):
-                if norm_d == 0:
-                    continue
-                delta = norm_d * tol
-
-                temp_df = lot_df_partial.copy()
-                temp_df[var] = temp_df[var] + delta
-
-                try:
-                    score_mat_sim = get_st(temp_df, self.INPUT_COLS, x_ref, x_tol)
-                    a_ij_sim = get_aj(temp_df, self.INPUT_COLS, ratios=[0.2, 0.6, 0.2])
-                    y_sim = float(get_y(score_mat_sim, a_ij_sim, w_vec))
-
-                    if y_sim > best_y:
-                        best_y = y_sim
-                        best_norm_d = float(norm_d)
-                except Exception:
-                    continue
-
-            best_deltas[var] = best_norm_d * tol
-            if best_y > max_y:
-                max_y = best_y
-
             strategy_data.append({
                 '센서': self.VARIABLE_NAMES[var],
                 '현재 시점값': current_value,
                 '평균': round(original_mean, 3),
-                '권장 조정': round(best_norm_d * tol, 3),
-                '품질 향상': round(best_y - y_now, 2)
+                '권장 조정': round(float(arrays['norm_d'][k, i]) * tol, 3),
+                '품질 향상': round(float(arrays['gain'][k, i]), 2)
             })
 
         strategy_data_sorted = sorted(strategy_data, key=lambda x: x['품질 향상'], reverse=True)
@@ -126,42 +165,133 @@ class Worker2:
             'sensitivity_data': [
                 {'name': self.VARIABLE_NAMES[var], 'value': round(float(w_vec[var]), 2)}
                 for var in self.INPUT_COLS
-            ]
+            ],
+            'mode': mode
         }
 
-    def calculate_strategy(self, current_lot, up_to_minute=None):
-        cal_df = self.dp.cal_df
-        lot_df_full = cal_df[cal_df['lot'] == current_lot].sort_values('date').copy()
-        if lot_df_full.empty:
-            return {'status': 'error', 'message': f'No data for lot {current_lot}'}
+    def _calculate_strategy_for_cutoff(self, current_lot, cutoff_min, mode='single', terms=None):
+        stored = self.replay.strategy(current_lot, [cutoff_min], mode) if self.replay is not None else None
+        if stored is not None:
+            return self._format_strategy(stored, 0, self.dp.get_weights(self.INPUT_COLS), mode)
+
+        if terms is None:
+            try:
+                terms = self.dp.get_cutoff_terms(current_lot, self.INPUT_COLS, [cutoff_min], ratios=[0.2, 0.6, 0.2])
+            except Exception as e:
+                print(f"Current score calculation failed: {e}")
+                return None
+        if terms is None:
+            return None
+
+        return self._format_strategy(self._strategy_arrays(terms, mode), 0, terms.w_vec, mode)
+
+    def _strategy_for_cutoff_cached(self, current_lot, cutoff_min, mode='single', terms=None):
+        self._check_memo_version()
+        result = self._memo_get('strategy_data', current_lot, (cutoff_min, mode))
+        if result is None:
+            result = self._calculate_strategy_for_cutoff(current_lot, cutoff_min, mode, terms)
+            if result:
+                self._memo_put('strategy_data', current_lot, (cutoff_min, mode), result)
+        return result
+
+    def _quality_timeline(self, current_lot, cm, time_labels, mode='single'):
+        """0..cm 분 y_now / y_best 추이 (memo 에 없는 분만 계산)"""
+        self._check_memo_version()
+        points = [self._memo_get('quality_scores', current_lot, (minute, mode)) for minute in range(cm + 1)]
+        missing = [minute for minute, point in enumerate(points) if point is None]
+        if missing:
+            for minute, point in zip(missing, self._quality_points(current_lot, missing, mode)):
+                points[minute] = point
+                self._memo_put('quality_scores', current_lot, (minute, mode), point)
+
+        return [
+            {'time': time_labels[minute] if minute < len(time_labels) else f"{minute}min", **point}
+            for minute, point in enumerate(points)
+            if point is not None
+        ]
+
+    def _quality_points(self, current_lot, minutes, mode='single'):
+        """분별 y_now / y_best / y_gain (lot 누적합 인덱스로 분당 상수 번 계산, replay 모드는 store 조회)"""
+        stored = self.replay.strategy(current_lot, minutes, mode) if self.replay is not None else None
+        if stored is not None:
+            y_now, y_best = stored['y_now'], stored['y_best']
+        else:
+            try:
+                terms = self.dp.get_cutoff_terms(current_lot, self.INPUT_COLS, minutes, ratios=[0.2, 0.6, 0.2])
+            except Exception as e:
+                print(f"Timeline index failed: {e}")
+                return [None] * len(minutes)
+            if terms is None:
+                return [None] * len(minutes)
+
+            y_now, y_best, _, _ = self._search(terms, mode)
+
+        return [
+            {
+                'y_now': round(float(y_now[k]), 3),
+                'y_best': round(float(y_best[k]), 3),
+                'y_gain': round(float(y_best[k] - y_now[k]), 3),
+            }
+            for k in range(len(minutes))
+        ]
 
-        base_t0 = lot_df_full['date'].min()
-        max_minutes = int((lot_df_full['date'].max() - base_t0).total_seconds() / 60)
+    def _build_axis(self, lot):
+        """lot 시작 시각 / 분 단위 시간축 생성 후 캐시, 데이터 없으면 (None, None)"""
+        lot_df_full = self.dp.get_lot_df(lot)
+        if lot_df_full.empty:
+            return None, None
 
-        self.cache['strategy_data'][current_lot] = {}
-        self.cache['quality_scores'][current_lot] = {}
-        self.cache['sensitivity_data'][current_lot] = {}
-        self.cache['base_times'][current_lot] = base_t0
+        base_t0 = lot_df_full['date'].iloc[0]
+        max_minutes = int((lot_df_full['date'].iloc[-1] - base_t0).total_seconds() / 60)
 
         time_labels = [
             (base_t0 + pd.to_timedelta(i, unit='min')).strftime('%H:%M') 
             for i in range(max_minutes + 1)
         ]
-        self.cache['time_labels'][current_lot] = time_labels
+        self.cache['time_labels'][lot] = time_labels
+        self.cache['base_times'][lot] = base_t0
+        return base_t0, time_labels
+
+    def calculate_strategy(self, current_lot, up_to_minute=None):
+        with self._memo_lock:
+            self._drop_memo(current_lot)
+            base_t0, time_labels = self._build_axis(current_lot)
+        if base_t0 is None:
+            return {'status': 'error', 'message': f'No data for lot {current_lot}'}
+        max_minutes = len(time_labels) - 1
 
         print(f"[Worker2] Lot {current_lot} initialized: {max_minutes} minutes available")
         return {'status': 'ok', 'max_minutes': max_minutes, 'base_time': base_t0.strftime('%Y-%m-%d %H:%M')}
 
+    def invalidate_lots(self, lots):
+        """append 로 바뀐 lot 의 (lot, 분) memo 폐기 및 시간축 갱신"""
+        stale = set(lots)
+        with self._memo_lock:
+            for name in ('strategy_data', 'quality_scores'):
+                self.cache[name].discard_where(lambda key: key[0] in stale)
+        for lot in lots:
+            if lot in self.cache['base_times']:
+                self.calculate_strategy(lot)
+
+    def _lot_axis(self, lot):
+        """lot 시작 시각 / 시간축 (캐시에서 밀려났으면 다시 생성), 실패 시 (None, None)"""
+        base_t0 = self.cache['base_times'].get(lot)
+        time_labels = self.cache['time_labels'].get(lot)
+        if base_t0 is None or time_labels is None:
+            return self._build_axis(lot)
+        return base_t0, time_labels
+
     # 스트리밍 응답
 
-    def get_chart_data(self, current_lot, current_minute, info_box_timestamp=None):
-        
-        if current_lot not in self.cache['strategy_data']:
-            return {'status': 'error', 'message': f'No strategy data for lot {current_lot}'}
+    def get_chart_data(self, current_lot, current_minute, info_box_timestamp=None, mode=None, context=None):
+        """context: /dashboard/data 공유 컨텍스트 (시간축, 분별 CutoffTerms 재사용)"""
+        mode = mode or self.SEARCH_MODE
+        if mode not in ('single', 'joint'):
+            return {'status': 'error', 'message': f'Unknown search mode: {mode}'}
 
-        base_t0 = self.cache['base_times'].get(current_lot)
-        if not base_t0:
-            return {'status': 'error', 'message': 'No base time for this lot'}
+        base_t0, time_labels = context.axis if context is not None else self._lot_axis(current_lot)
+        if base_t0 is None:
+            return {'status': 'error', 'message': f'No strategy data for lot {current_lot}'}
 
         cm = int(current_minute) if current_minute is not None else 0
         if info_box_timestamp:
@@ -177,25 +307,16 @@ class Worker2:
         else:
             print(f"[Worker2] get_chart_data: no timestamp, current_minute={cm}")
 
-        result = self._calculate_strategy_for_cutoff(current_lot, cm)
+        terms = context.terms(cm) if context is not None else None
+        result = self._strategy_for_cutoff_cached(current_lot, cm, mode, terms)
         if not result:
             return {'status': 'error', 'message': f'Failed to calculate strategy for minute {cm}'}
 
         strategy_data = result['strategy_data']
         quality_score = result['quality_score']
         sensitivity_data = result['sensitivity_data']
-        time_labels = self.cache['time_labels'].get(current_lot, [])
-
-        quality_timeline = []
-        for minute in range(0, cm + 1, 1):
-            timeline_result = self._calculate_strategy_for_cutoff(current_lot, minute)
-            if timeline_result:
-                quality_timeline.append({
-                    'time': time_labels[minute] if minute < len(time_labels) else f"{minute}min",
-                    'y_now': timeline_result['quality_score'].get('y_now', 0),
-                    'y_best': timeline_result['quality_score'].get('y_best', 0),
-                    'y_gain': timeline_result['quality_score'].get('y_gain', 0)
-                })
+
+        quality_timeline = self._quality_timeline(current_lot, cm, time_labels, mode)
 
         timestamp = info_box_timestamp if info_box_timestamp else base_t0.strftime('%Y-%m-%d %H:%M')
         
@@ -1,6 +1,6 @@
-from common import get_st, get_aj, get_wi, get_y
 import pandas as pd
 import numpy as np
+from bounded_cache import cache_registry
 
 
 class Worker5:
@@ -18,78 +18,63 @@ class Worker5:
     def __init__(self, data_processor):
         self.dp = data_processor
         self.cache = {
-            'importance_data': {},
-            'time_labels': {},
-            'base_times': {},
+            'time_labels': cache_registry.create('worker5.time_labels'),
+            'base_times': cache_registry.create('worker5.base_times'),
         }
+        self.replay = None  # 사전 계산 결과 store (replay 모드, ReplayStore)
+        self.dp.add_append_listener(self.invalidate_lots)
 
-    def calculate_importance(self, current_lot, up_to_minute=None):
-        cal_df = self.dp.cal_df
-        lot_df_full = cal_df[cal_df['lot'] == current_lot].sort_values('date').copy()
+    def _build_axis(self, lot):
+        """lot 시작 시각 / 분 단위 시간축 생성 후 캐시, 데이터 없으면 (None, None)"""
+        lot_df_full = self.dp.get_lot_df(lot)
         if lot_df_full.empty:
-            return {'status': 'error', 'message': f'No data for lot {current_lot}'}
-
-        base_t0 = lot_df_full['date'].min()
-        max_minutes = int((lot_df_full['date'].max() - base_t0).total_seconds() / 60)
+            return None, None
 
-        self.cache['importance_data'][current_lot] = {}
-        self.cache['base_times'][current_lot] = base_t0
+        base_t0 = lot_df_full['date'].iloc[0]
+        max_minutes = int((lot_df_full['date'].iloc[-1] - base_t0).total_seconds() / 60)
 
         time_labels = [
             (base_t0 + pd.to_timedelta(i, unit='min')).strftime('%H:%M') 
             for i in range(max_minutes + 1)
         ]
-        self.cache['time_labels'][current_lot] = time_labels
+        self.cache['time_labels'][lot] = time_labels
+        self.cache['base_times'][lot] = base_t0
+        return base_t0, time_labels
+
+    def calculate_importance(self, current_lot, up_to_minute=None):
+        base_t0, time_labels = self._build_axis(current_lot)
+        if base_t0 is None:
+            return {'status': 'error', 'message': f'No data for lot {current_lot}'}
+        max_minutes = len(time_labels) - 1
 
         print(f"[Worker5] Lot {current_lot} initialized: {max_minutes} minutes available")
         return {'status': 'ok', 'max_minutes': max_minutes, 'base_time': base_t0.strftime('%Y-%m-%d %H:%M')}
 
     # 중요도 계산
 
-    def _calculate_importance_for_cutoff(self, current_lot, cutoff_min):
-        cal_df = self.dp.cal_df
-        lot_df_full = cal_df[cal_df['lot'] == current_lot].sort_values('date').copy()
-        if lot_df_full.empty:
-            return None
-
-        base_t0 = lot_df_full['date'].min()
-        cutoff_time = base_t0 + pd.to_timedelta(cutoff_min, unit='m')
-        lot_df_partial = lot_df_full[lot_df_full['date'] <= cutoff_time].copy()
-        
-        if lot_df_partial.empty:
-            return None
-
-        paper = lot_df_full['paper'].iloc[0]
-        bw = lot_df_full['bw'].iloc[0]
-        gkey = (paper, bw)
-        
-        x_ref = self.dp.ref_dict.get(gkey, {})
-        x_tol = self.dp.tol_dict.get(gkey, {})
-
-        try:
-            w_vec, _ = get_wi(cal_df, self.INPUT_COLS, 'cal_production')
-        except Exception as e:
-            print(f"get_wi failed: {e}")
-            return None
-
-        try:
-            score_mat = get_st(lot_df_partial, self.INPUT_COLS, x_ref, x_tol)
-            a_ij = get_aj(lot_df_partial, self.INPUT_COLS, ratios=[0.2, 0.6, 0.2])
-            y_total = float(get_y(score_mat, a_ij, w_vec))
-        except Exception as e:
-            print(f"Score calculation failed: {e}")
-            return None
-
+    def _contribution_matrix(self, current_lot, minutes, terms=None):
+        """분별 변수 기여도 (분, 변수), y = 변수별 100·w_i·Σ_j a_ij·구간 평균 합이므로 한 번에 분해"""
+        stored = self.replay.contributions(current_lot, minutes) if self.replay is not None else None
+        if stored is not None:
+            return stored
+        if terms is None:
+            terms = self.dp.get_cutoff_terms(current_lot, self.INPUT_COLS, minutes, ratios=[0.2, 0.6, 0.2])
+        if terms is None:
+            return None, None
+
+        contributions = 100 * terms.w_arr * (terms.a_ij * terms.means).sum(axis=-1)
+        return contributions, terms.y
+
+    def _importance_rows(self, contributions, y_total):
+        """변수별 기여도(절대) + 전체 대비 비율(%) 중요도"""
         importance_data = []
         for i, var in enumerate(self.INPUT_COLS):
-            score_zeroed = score_mat.copy()
-            score_zeroed[:, i] = 0.0
-            y_wo = float(get_y(score_zeroed, a_ij, w_vec))
-            delta = abs(y_total - y_wo)
-            
+            # 변수 i 점수를 0 으로 둔 y 와의 차이 = 기여도 (y 가 NaN 이면 모두 NaN)
+            contribution = float(contributions[i]) if not np.isnan(y_total) else np.nan
             importance_data.append({
                 'name': self.VARIABLE_NAMES[var],
-                'importance': round(float(delta), 2)
+                'contribution': round(contribution, 3),
+                'importance': round(abs(contribution), 2)
             })
 
         total_importance = sum(item['importance'] for item in importance_data)
@@ -99,16 +84,75 @@ class Worker5:
 
         return importance_data
 
-    # 스트리밍 응답
+    def _calculate_importance_for_cutoff(self, current_lot, cutoff_min, terms=None):
+        try:
+            contributions, y_total = self._contribution_matrix(current_lot, [cutoff_min], terms)
+        except Exception as e:
+            print(f"Score calculation failed: {e}")
+            return None
+        if contributions is None:
+            return None
 
-    def get_chart_data(self, current_lot, current_minute, info_box_timestamp=None):
-        
-        if current_lot not in self.cache['importance_data']:
+        return self._importance_rows(contributions[0], float(y_total[0]))
+
+    def get_importance_history(self, current_lot, up_to_minute=None):
+        """0..up_to_minute 분(기본: lot 전체) 변수별 기여도 행렬 (1회 계산)"""
+        base_t0, time_labels = self._lot_axis(current_lot)
+        if base_t0 is None:
             return {'status': 'error', 'message': f'No importance data for lot {current_lot}'}
 
-        base_t0 = self.cache['base_times'].get(current_lot)
-        if not base_t0:
-            return {'status': 'error', 'message': 'No base time for this lot'}
+        if up_to_minute is None:
+            up_to_minute = len(time_labels) - 1
+        minutes = np.arange(max(0, int(up_to_minute)) + 1)
+
+        try:
+            contributions, y_total = self._contribution_matrix(current_lot, minutes)
+        except Exception as e:
+            return {'status': 'error', 'message': f'Importance calculation failed: {e}'}
+        if contributions is None:
+            return {'status': 'error', 'message': f'No data for lot {current_lot}'}
+
+        contribution_rows = []
+        importance_rows = []
+        for minute in minutes.tolist():
+            rows = self._importance_rows(contributions[minute], float(y_total[minute]))
+            contribution_rows.append([item['contribution'] for item in rows])
+            importance_rows.append([item['importance'] for item in rows])
+
+        return {
+            'status': 'ok',
+            'variable_names': [self.VARIABLE_NAMES[var] for var in self.INPUT_COLS],
+            'time_labels': [
+                time_labels[minute] if minute < len(time_labels) else f"{minute}min"
+                for minute in minutes.tolist()
+            ],
+            'y': [round(float(y), 3) for y in y_total],
+            'contribution': contribution_rows,
+            'importance': importance_rows,
+            'current_minute': int(minutes[-1]),
+        }
+
+    def invalidate_lots(self, lots):
+        """append 된 lot 의 시간축 갱신"""
+        for lot in lots:
+            if lot in self.cache['base_times']:
+                self.calculate_importance(lot)
+
+    def _lot_axis(self, lot):
+        """lot 시작 시각 / 시간축 (캐시에서 밀려났으면 다시 생성), 실패 시 (None, None)"""
+        base_t0 = self.cache['base_times'].get(lot)
+        time_labels = self.cache['time_labels'].get(lot)
+        if base_t0 is None or time_labels is None:
+            return self._build_axis(lot)
+        return base_t0, time_labels
+
+    # 스트리밍 응답
+
+    def get_chart_data(self, current_lot, current_minute, info_box_timestamp=None, context=None):
+        """context: /dashboard/data 공유 컨텍스트 (시간축, 분별 CutoffTerms 재사용)"""
+        base_t0, time_labels = context.axis if context is not None else self._lot_axis(current_lot)
+        if base_t0 is None:
+            return {'status': 'error', 'message': f'No importance data for lot {current_lot}'}
 
         cm = int(current_minute) if current_minute is not None else 0
         if info_box_timestamp:
@@ -124,12 +168,11 @@ class Worker5:
         else:
             print(f"[Worker5] get_chart_data: no timestamp, current_minute={cm}")
 
-        result = self._calculate_importance_for_cutoff(current_lot, cm)
+        terms = context.terms(cm) if context is not None else None
+        result = self._calculate_importance_for_cutoff(current_lot, cm, terms)
         if not result:
             return {'status': 'error', 'message': f'Failed to calculate importance for minute {cm}'}
 
-        time_labels = self.cache['time_labels'].get(current_lot, [])
-
         timestamp = info_box_timestamp if info_box_timestamp else base_t0.strftime('%Y-%m-%d %H:%M')
         
         return {
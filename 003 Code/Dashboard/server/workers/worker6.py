@@ -1,6 +1,7 @@
-from common import get_st, get_aj, get_wi, get_y
+from common import get_st, get_aj, get_y
 import pandas as pd
 import numpy as np
+from bounded_cache import cache_registry
 
 
 class Worker6:
@@ -15,46 +16,128 @@ class Worker6:
         'x4': '건조기 압력',
     }
 
+    SENSITIVITY_MODE = "analytic"  # "analytic" (닫힌 형태 미분) | "fd" (중앙 차분, 기존 방식)
+    FD_STEP_FRAC = 0.10
+
     def __init__(self, data_processor):
         self.dp = data_processor
         self.cache = {
-            'sensitivity_data': {},
-            'time_labels': {},
-            'base_times': {},
+            'time_labels': cache_registry.create('worker6.time_labels'),
+            'base_times': cache_registry.create('worker6.base_times'),
         }
+        self.replay = None  # 사전 계산 결과 store (replay 모드, ReplayStore)
+        self.dp.add_append_listener(self.invalidate_lots)
 
-    def calculate_sensitivity(self, current_lot, up_to_minute=None):
-        cal_df = self.dp.cal_df
-        lot_df_full = cal_df[cal_df['lot'] == current_lot].sort_values('date').copy()
+    def _build_axis(self, lot):
+        """lot 시작 시각 / 분 단위 시간축 생성 후 캐시, 데이터 없으면 (None, None)"""
+        lot_df_full = self.dp.get_lot_df(lot)
         if lot_df_full.empty:
-            return {'status': 'error', 'message': f'No data for lot {current_lot}'}
+            return None, None
 
-        base_t0 = lot_df_full['date'].min()
-        max_minutes = int((lot_df_full['date'].max() - base_t0).total_seconds() / 60)
-
-        self.cache['sensitivity_data'][current_lot] = {}
-        self.cache['base_times'][current_lot] = base_t0
+        base_t0 = lot_df_full['date'].iloc[0]
+        max_minutes = int((lot_df_full['date'].iloc[-1] - base_t0).total_seconds() / 60)
 
         time_labels = [
             (base_t0 + pd.to_timedelta(i, unit='min')).strftime('%H:%M') 
             for i in range(max_minutes + 1)
         ]
-        self.cache['time_labels'][current_lot] = time_labels
+        self.cache['time_labels'][lot] = time_labels
+        self.cache['base_times'][lot] = base_t0
+        return base_t0, time_labels
+
+    def calculate_sensitivity(self, current_lot, up_to_minute=None):
+        base_t0, time_labels = self._build_axis(current_lot)
+        if base_t0 is None:
+            return {'status': 'error', 'message': f'No data for lot {current_lot}'}
+        max_minutes = len(time_labels) - 1
 
         print(f"[Worker6] Lot {current_lot} initialized: {max_minutes} minutes available")
         return {'status': 'ok', 'max_minutes': max_minutes, 'base_time': base_t0.strftime('%Y-%m-%d %H:%M')}
 
     # 민감도 계산
 
-    def _calculate_sensitivity_for_cutoff(self, current_lot, cutoff_min):
-        cal_df = self.dp.cal_df
-        lot_df_full = cal_df[cal_df['lot'] == current_lot].sort_values('date').copy()
+    def _sensitivity_matrix(self, current_lot, minutes, terms=None):
+        """분별 dy/dx·tol (분, 변수), 상수 이동에 불변인 a_ij 와 점수 도함수 구간 평균으로 한 번에 계산"""
+        stored = self.replay.sensitivities(current_lot, minutes) if self.replay is not None else None
+        if stored is not None:
+            return stored
+        if terms is None:
+            terms = self.dp.get_cutoff_terms(current_lot, self.INPUT_COLS, minutes, ratios=[0.2, 0.6, 0.2])
+        if terms is None:
+            return None, None
+
+        dy_dx = 100 * terms.w_arr * (terms.a_ij * terms.grad_means).sum(axis=-1)
+        return dy_dx * terms.index.tol, terms.index.tol
+
+    def _rows_from_matrix(self, values, tols):
+        out = []
+        for i, var in enumerate(self.INPUT_COLS):
+            tol = float(tols[i])
+            if not np.isfinite(tol) or tol == 0:
+                continue
+            out.append({'name': self.VARIABLE_NAMES[var], 'value': round(float(values[i]), 3)})
+        return out
+
+    def _calculate_sensitivity_for_cutoff(self, current_lot, cutoff_min, mode=None, terms=None):
+        mode = mode or self.SENSITIVITY_MODE
+        if mode == 'fd':
+            return self._fd_sensitivity_for_cutoff(current_lot, cutoff_min)
+
+        try:
+            values, tols = self._sensitivity_matrix(current_lot, [cutoff_min], terms)
+        except Exception as e:
+            print(f"Base score calculation failed: {e}")
+            return None
+        if values is None:
+            return None
+        return self._rows_from_matrix(values[0], tols)
+
+    def check_sensitivity(self, current_lot, cutoff_min):
+        """닫힌 형태 미분과 중앙 차분 결과 비교 (검증용)"""
+        analytic = self._calculate_sensitivity_for_cutoff(current_lot, cutoff_min, mode='analytic') or []
+        fd = self._calculate_sensitivity_for_cutoff(current_lot, cutoff_min, mode='fd') or []
+        fd_by_name = {item['name']: item['value'] for item in fd}
+        diffs = [abs(item['value'] - fd_by_name[item['name']]) for item in analytic if item['name'] in fd_by_name]
+        return {
+            'analytic': analytic,
+            'fd': fd,
+            'max_abs_diff': round(float(max(diffs)), 3) if diffs else None,
+        }
+
+    def get_sensitivity_history(self, current_lot, up_to_minute):
+        """0..up_to_minute 분 민감도 추이 (1회 계산)"""
+        base_t0, time_labels = self._lot_axis(current_lot)
+        if base_t0 is None:
+            return {'status': 'error', 'message': f'No sensitivity data for lot {current_lot}'}
+
+        minutes = np.arange(max(0, int(up_to_minute)) + 1)
+        try:
+            values, tols = self._sensitivity_matrix(current_lot, minutes)
+        except Exception as e:
+            return {'status': 'error', 'message': f'Sensitivity calculation failed: {e}'}
+        if values is None:
+            return {'status': 'error', 'message': f'No data for lot {current_lot}'}
+
+        history = []
+        for minute in minutes.tolist():
+            row = {'time': time_labels[minute] if minute < len(time_labels) else f"{minute}min"}
+            for item in self._rows_from_matrix(values[minute], tols):
+                row[item['name']] = item['value']
+            history.append(row)
+
+        return {
+            'status': 'ok',
+            'sensitivity_history': history,
+            'variable_names': [self.VARIABLE_NAMES[var] for var in self.INPUT_COLS],
+            'current_minute': int(minutes[-1]),
+        }
+
+    def _fd_sensitivity_for_cutoff(self, current_lot, cutoff_min):
+        lot_df_full = self.dp.get_lot_df(current_lot)
         if lot_df_full.empty:
             return None
 
-        base_t0 = lot_df_full['date'].min()
-        cutoff_time = base_t0 + pd.to_timedelta(cutoff_min, unit='m')
-        lot_df_partial = lot_df_full[lot_df_full['date'] <= cutoff_time].copy()
+        lot_df_partial = self.dp.get_lot_df(current_lot, cutoff_min)
         
         if lot_df_partial.empty:
             return None
@@ -67,7 +150,7 @@ class Worker6:
         x_tol = self.dp.tol_dict.get(gkey, {})
 
         try:
-            w_vec, _ = get_wi(cal_df, self.INPUT_COLS, 'cal_production')
+            w_vec = self.dp.get_weights(self.INPUT_COLS, 'cal_production')
         except Exception as e:
             print(f"get_wi failed: {e}")
             return None
@@ -80,7 +163,7 @@ class Worker6:
             print(f"Base score calculation failed: {e}")
             return None
 
-        step_frac = 0.10
+        step_frac = self.FD_STEP_FRAC
         sensitivity_data = []
         
         for var in self.INPUT_COLS:
@@ -117,16 +200,30 @@ class Worker6:
 
         return sensitivity_data
 
+    def invalidate_lots(self, lots):
+        """append 된 lot 의 시간축 갱신"""
+        for lot in lots:
+            if lot in self.cache['base_times']:
+                self.calculate_sensitivity(lot)
+
+    def _lot_axis(self, lot):
+        """lot 시작 시각 / 시간축 (캐시에서 밀려났으면 다시 생성), 실패 시 (None, None)"""
+        base_t0 = self.cache['base_times'].get(lot)
+        time_labels = self.cache['time_labels'].get(lot)
+        if base_t0 is None or time_labels is None:
+            return self._build_axis(lot)
+        return base_t0, time_labels
+
     # 스트리밍 응답
 
-    def get_chart_data(self, current_lot, current_minute, info_box_timestamp=None):
-        
-        if current_lot not in self.cache['sensitivity_data']:
-            return {'status': 'error', 'message': f'No sensitivity data for lot {current_lot}'}
+    def get_chart_data(self, current_lot, current_minute, info_box_timestamp=None, mode=None, context=None):
+        """context: /dashboard/data 공유 컨텍스트 (시간축, 분별 CutoffTerms 재사용)"""
+        if mode not in (None, 'analytic', 'fd'):
+            return {'status': 'error', 'message': f'Unknown sensitivity mode: {mode}'}
 
-        base_t0 = self.cache['base_times'].get(current_lot)
-        if not base_t0:
-            return {'status': 'error', 'message': 'No base time for this lot'}
+        base_t0, time_labels = context.axis if context is not None else self._lot_axis(current_lot)
+        if base_t0 is None:
+            return {'status': 'error', 'message': f'No sensitivity data for lot {current_lot}'}
 
         cm = int(current_minute) if current_minute is not None else 0
         if info_box_timestamp:
@@ -142,12 +239,11 @@ class Worker6:
         else:
             print(f"[Worker6] get_chart_data: no timestamp, current_minute={cm}")
 
-        result = self._calculate_sensitivity_for_cutoff(current_lot, cm)
+        terms = context.terms(cm) if context is not None else None
+        result = self._calculate_sensitivity_for_cutoff(current_lot, cm, mode, terms)
         if not result:
             return {'status': 'error', 'message': f'Failed to calculate sensitivity for minute {cm}'}
 
-        time_labels = self.cache['time_labels'].get(current_lot, [])
-
         timestamp = info_box_timestamp if info_box_timestamp else base_t0.strftime('%Y-%m-%d %H:%M')
         
         return {
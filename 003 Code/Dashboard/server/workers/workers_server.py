@@ -2,10 +2,14 @@
 
 from __future__ import annotations
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
+import argparse
 import sys
 import os
+import subprocess
+import threading
+import pandas as pd
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
@@ -14,6 +18,13 @@ from worker1 import Worker1
 from worker2 import Worker2     
 from worker5 import Worker5       
 from worker6 import Worker6      
+from delta import DeltaEncoder
+from sessions import PlaybackSession, ReadWriteLock, SessionStore
+from bounded_cache import cache_registry
+from offload import OffloadError, WorkerOffload
+from streams import StreamHub
+from dashboard import SECTIONS, DashboardContext, build_dashboard
+from replay_store import ReplayStore, build_replay_store
 
 app = Flask(__name__)
 CORS(app)
@@ -23,44 +34,183 @@ worker1: Worker1 | None = None
 worker2: Worker2 | None = None
 worker5: Worker5 | None = None
 worker6: Worker6 | None = None
-
-worker1_current_lot: str | None = None
-worker1_current_minute: int = 0
-
-worker2_current_lot: str | None = None
-worker2_current_minute: int = 0
-
-worker5_current_lot: str | None = None
-worker5_current_minute: int = 0
-
-worker6_current_lot: str | None = None
-worker6_current_minute: int = 0
+offload: WorkerOffload | None = None
+replay: ReplayStore | None = None
+
+# 세션(대시보드)별 worker 재생 상태 (lot, 분), X-Session-Id 헤더 또는 session 파라미터로 구분
+sessions = SessionStore(
+    max_sessions=int(os.environ.get('WORKERS_MAX_SESSIONS', '256')),
+    idle_ttl=float(os.environ.get('WORKERS_SESSION_TTL', '3600')),
+)
+DEFAULT_SESSION = 'default'
+
+# 데이터 변경(/append, /ref-tol)은 단독, worker 조회는 동시 실행
+data_lock = ReadWriteLock()
+init_lock = threading.Lock()
+
+# worker / 파생 캐시 전체 바이트 예산 (MB) 과 항목 유효 시간 (초, 미설정 시 무제한)
+cache_registry.configure(
+    max_bytes=int(float(os.environ.get('WORKERS_CACHE_MB', '1024')) * 1024 * 1024),
+    ttl=float(os.environ['WORKERS_CACHE_TTL']) if os.environ.get('WORKERS_CACHE_TTL') else None,
+)
+
+def current_session() -> PlaybackSession:
+    """요청 세션 (X-Session-Id 헤더 → ?session= → body session → 'default')"""
+    session_id = request.headers.get('X-Session-Id') or request.args.get('session')
+    if not session_id and request.is_json:
+        session_id = (request.get_json(silent=True) or {}).get('session')
+    return sessions.get(str(session_id or DEFAULT_SESSION))
+
+def advance_minute(session: PlaybackSession, worker_name: str) -> tuple[str | None, int, str | None]:
+    """?minute= 반영 후 이번 응답 분을 확정하고 세션 cursor 를 1분 진행, (lot, 응답 분, mode)"""
+    with session.lock:
+        state = session.state(worker_name)
+        if state['lot'] is None:
+            return None, state['minute'], None
+        minute_arg = request.args.get('minute', type=int)
+        if minute_arg is not None:
+            state['minute'] = minute_arg
+        responded_minute = state['minute']
+        state['minute'] += 1
+        return state['lot'], responded_minute, state['mode']
+
+def set_session_lot(session: PlaybackSession, worker_name: str, lot: str, mode: str | None = None) -> None:
+    with session.lock:
+        state = session.state(worker_name)
+        state['lot'] = lot
+        state['minute'] = 0
+        state['mode'] = mode
+        state['timestamp'] = None
+
+def worker_health(worker_name: str, worker) -> dict:
+    state = current_session().state(worker_name)
+    return {
+        'status': 'ok',
+        'initialized': (data_processor is not None and worker is not None),
+        'current_lot': state['lot'],
+        'current_minute': state['minute']
+    }
+
+# /workerN/data delta 응답 (client 파라미터를 보낸 요청만 적용)
+data_encoders: dict[str, DeltaEncoder] = {
+    name: DeltaEncoder() for name in ('worker1', 'worker2', 'worker5', 'worker6')
+}
+
+def data_response(worker_name: str, session: PlaybackSession, data: dict, responded_minute: int):
+    """/workerN/data 응답, ?client=ID&since=VERSION 이면 직전 응답 대비 변경분만 반환"""
+    body = {'status': 'ok', 'minute': responded_minute, 'current_minute': responded_minute + 1}
+    client = request.args.get('client')
+    if client:
+        encoder = data_encoders[worker_name]
+        body.update(encoder.encode(f'{session.session_id}:{client}', request.args.get('since'), data))
+    else:
+        body['data'] = data
+    return jsonify(body)
 
 # 공통 초기화
 
+# WORKERS_CSV 로 다른 데이터 지정 가능 (부하 테스트용 합성 데이터 등)
+CSV_PATH = os.environ.get('WORKERS_CSV') or os.path.join(
+    os.path.dirname(__file__),
+    '..', '..', 'public', 'worker_dashboard', 'simulate_paper_data.csv'
+)
+# attach: loader(--publish) 가 게시한 공유 데이터셋에 읽기 전용 memory-map 으로 연결 (여러 서빙 프로세스가 같은 페이지 공유)
+DATASET_MODE = os.environ.get('WORKERS_DATASET', 'local')
+DATASET_DIR = os.environ.get('WORKERS_DATASET_DIR', os.path.join(os.path.dirname(CSV_PATH), '.dataset'))
+
+# replay: --build-replay 로 사전 계산한 lot × 분 결과를 조회해 응답 (저장되지 않은 mode / 데이터 변경 후에는 직접 계산)
+SERVE_MODE = os.environ.get('WORKERS_SERVE', 'live')
+REPLAY_DIR = os.environ.get('WORKERS_REPLAY_DIR', os.path.join(os.path.dirname(CSV_PATH), '.replay'))
+
+# 무거운 worker 호출(Worker2/5/6 data, history)을 process pool 로 분리 (0 이면 서버 프로세스에서 실행)
+OFFLOAD_PROCESSES = int(os.environ.get('WORKERS_OFFLOAD_PROCESSES', '0'))
+OFFLOAD_TIMEOUT = float(os.environ.get('WORKERS_OFFLOAD_TIMEOUT', '30'))
+OFFLOAD_ENDPOINTS = ('worker2', 'worker5', 'worker6', 'worker5.history', 'worker6.history')
+
+def offload_limits() -> dict[str, int]:
+    """endpoint 별 동시 실행 수 (기본 pool 절반, WORKERS_OFFLOAD_LIMITS='worker2=1,worker6=2' 로 변경)"""
+    limits = {name: max(1, OFFLOAD_PROCESSES // 2) for name in OFFLOAD_ENDPOINTS}
+    for item in filter(None, os.environ.get('WORKERS_OFFLOAD_LIMITS', '').split(',')):
+        name, _, value = item.partition('=')
+        if name.strip() in limits:
+            limits[name.strip()] = max(1, int(value))
+    return limits
+
+def run_worker(endpoint: str, worker_name: str, worker, method: str, **kwargs):
+    """offload 대상이면 pool 에서, 아니면 현재 프로세스에서 worker.method(**kwargs) 실행"""
+    if offload is not None and offload.handles(endpoint):
+        return offload.call(endpoint, worker_name, method, **kwargs)
+    with data_lock.read():
+        return getattr(worker, method)(**kwargs)
+
+def new_data_processor() -> DataProcessor:
+    return DataProcessor(
+        CSV_PATH,
+        snapshot_dir=os.environ.get('WORKERS_SNAPSHOT_DIR', os.path.join(os.path.dirname(CSV_PATH), '.snapshot')),
+        ingest=os.environ.get('WORKERS_INGEST', 'default')
+    )
+
+def load_data_processor() -> DataProcessor:
+    processor = new_data_processor()
+    if DATASET_MODE == 'attach':
+        processor.attach(DATASET_DIR)
+    elif OFFLOAD_PROCESSES > 0:
+        # pool 프로세스와 같은 데이터를 보도록 게시 후 서버 프로세스도 attach
+        publish_dataset()
+        processor.attach(DATASET_DIR)
+    else:
+        processor.initialize()
+    return processor
+
+def build_replay() -> dict:
+    """전체 lot × 분 Worker1/2/5/6 결과를 REPLAY_DIR 에 사전 계산 (replay 모드 서빙용)"""
+    processor = load_data_processor()
+    return build_replay_store(
+        REPLAY_DIR, processor, Worker1(processor), Worker2(processor), Worker5(processor), Worker6(processor)
+    )
+
+def publish_dataset() -> dict:
+    """loader: 전처리 1회 후 공유 데이터셋 게시 (Worker1 그룹 블록 포함)"""
+    processor = new_data_processor()
+    processor.initialize()
+    return processor.publish(DATASET_DIR, block_cols=[Worker1.INPUT_COLS])
+
 @app.route('/init', methods=['GET'])
 def initialize_all():
-    global data_processor, worker1, worker2, worker5, worker6
+    global data_processor, worker1, worker2, worker5, worker6, offload, replay
     try:
-        if data_processor is None:
-            csv_path = os.path.join(
-                os.path.dirname(__file__),
-                '..', '..', 'public', 'worker_dashboard', 'simulate_paper_data.csv'
-            )
-            data_processor = DataProcessor(csv_path)
-            data_processor.initialize()
-
-        if worker1 is None:
-            worker1 = Worker1(data_processor)
-
-        if worker2 is None:
-            worker2 = Worker2(data_processor)
-
-        if worker5 is None:
-            worker5 = Worker5(data_processor)
-
-        if worker6 is None:
-            worker6 = Worker6(data_processor)
+        with init_lock:
+            if data_processor is None:
+                data_processor = load_data_processor()
+
+            if replay is None and SERVE_MODE == 'replay':
+                replay = ReplayStore(REPLAY_DIR, data_processor)
+
+            if worker1 is None:
+                worker1 = Worker1(data_processor)
+                worker1.replay = replay
+                if replay is None:
+                    # 유사 lot 재계산 시점 테이블은 background 에서 미리 생성 (미완료 그룹은 조회 시 생성)
+                    threading.Thread(target=worker1.precompute_checkpoints, kwargs={'lock': data_lock.read}, daemon=True).start()
+
+            if worker2 is None:
+                worker2 = Worker2(data_processor)
+                worker2.replay = replay
+
+            if worker5 is None:
+                worker5 = Worker5(data_processor)
+                worker5.replay = replay
+
+            if worker6 is None:
+                worker6 = Worker6(data_processor)
+                worker6.replay = replay
+
+            if offload is None and OFFLOAD_PROCESSES > 0:
+                offload = WorkerOffload(
+                    DATASET_DIR, processes=OFFLOAD_PROCESSES, limits=offload_limits(), timeout=OFFLOAD_TIMEOUT,
+                    replay_dir=REPLAY_DIR if replay is not None else None
+                )
+                offload.warm_up()
 
         return jsonify({
             'status': 'ok', 
@@ -73,6 +223,57 @@ def initialize_all():
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
+@app.route('/append', methods=['POST'])
+def append_rows():
+    try:
+        if data_processor is None:
+            return jsonify({'status': 'error', 'message': 'Data processor not initialized'}), 400
+
+        body = request.get_json(silent=True) or {}
+        rows = body.get('rows')
+        if not rows:
+            return jsonify({'status': 'error', 'message': 'Rows are required'}), 400
+
+        if data_processor.read_only:
+            return jsonify({'status': 'error', 'message': 'Shared dataset is read-only'}), 400
+
+        with data_lock.write():
+            result = data_processor.append(rows)
+        return jsonify({
+            'status': 'ok',
+            'appended': result['appended'],
+            'lots': [str(lot) for lot in result['lots']],
+            'data_rows': len(data_processor.cal_df)
+        })
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/ref-tol', methods=['POST'])
+def recompute_ref_tol():
+    try:
+        if data_processor is None:
+            return jsonify({'status': 'error', 'message': 'Data processor not initialized'}), 400
+
+        body = request.get_json(silent=True) or {}
+        time_window = body.get('time_window')
+        if time_window is not None:
+            # 숫자는 pd.Timedelta 가 ns 로 해석하므로 '30D' 같은 문자열 기간만 허용
+            try:
+                window = pd.Timedelta(time_window) if isinstance(time_window, str) else None
+                if window is None or pd.isna(window) or window <= pd.Timedelta(0):
+                    raise ValueError(time_window)
+            except (TypeError, ValueError):
+                return jsonify({'status': 'error', 'message': f'Invalid time_window: {time_window}'}), 400
+
+        if data_processor.read_only:
+            return jsonify({'status': 'error', 'message': 'Shared dataset is read-only'}), 400
+
+        with data_lock.write():
+            result = data_processor.recompute_ref_tol(time_window)
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
 # Worker1 엔드포인트
 
 @app.route('/worker1/init', methods=['GET'])
@@ -81,7 +282,6 @@ def worker1_init():
 
 @app.route('/worker1/set-lot', methods=['POST'])
 def worker1_set_lot():
-    global worker1_current_lot, worker1_current_minute
     try:
         if worker1 is None:
             return jsonify({'status': 'error', 'message': 'Worker1 not initialized'}), 400
@@ -91,19 +291,23 @@ def worker1_set_lot():
         if not lot:
             return jsonify({'status': 'error', 'message': 'Lot is required'}), 400
 
-        result = worker1.calculate_similar_lots(lot, up_to_minute=0)
-        worker1_current_lot = lot
-        worker1_current_minute = 0
+        mode = body.get('mode')
+        if mode is not None and mode not in ('score', 'trajectory', 'trajectory_dtw'):
+            return jsonify({'status': 'error', 'message': f'Unknown similarity mode: {mode}'}), 400
+        mode = mode or worker1.similarity_mode
 
-        cal_df = worker1.dp.cal_df
-        lot_df = cal_df[cal_df['lot'] == lot].sort_values('date')
-        base_time = lot_df['date'].min().strftime('%Y-%m-%d %H:%M') if not lot_df.empty else None
+        with data_lock.read():
+            result = worker1.calculate_similar_lots(lot, up_to_minute=0, mode=mode)
+            lot_df = worker1.dp.get_lot_df(lot)
+            base_time = lot_df['date'].iloc[0].strftime('%Y-%m-%d %H:%M') if not lot_df.empty else None
+        set_session_lot(current_session(), 'worker1', lot, mode)
 
         return jsonify({
             'status': 'ok',
             'lot': lot,
             'similar_lots': result.get('similar_lots', []),
             'y_current': result.get('y_current', 0),
+            'mode': mode,
             'base_time': base_time
         })
     except Exception as e:
@@ -111,43 +315,29 @@ def worker1_set_lot():
 
 @app.route('/worker1/data', methods=['GET'])
 def worker1_get_data():
-    global worker1_current_minute
     try:
-        if worker1 is None or worker1_current_lot is None:
+        session = current_session()
+        lot, responded_minute, lot_mode = advance_minute(session, 'worker1')
+        if worker1 is None or lot is None:
             return jsonify({'status': 'error', 'message': 'Worker1 not initialized or no lot set'}), 400
 
-        minute_arg = request.args.get('minute', type=int)
-        if minute_arg is not None:
-            worker1_current_minute = minute_arg
-
         info_box_timestamp = request.args.get('timestamp', None)
 
-        data = worker1.get_chart_data(
-            current_lot=worker1_current_lot,
-            current_minute=worker1_current_minute,
-            info_box_timestamp=info_box_timestamp
-        )
-
-        responded_minute = worker1_current_minute
-        worker1_current_minute += 1
+        with data_lock.read():
+            data = worker1.get_chart_data(
+                current_lot=lot,
+                current_minute=responded_minute,
+                info_box_timestamp=info_box_timestamp,
+                mode=lot_mode
+            )
 
-        return jsonify({
-            'status': 'ok',
-            'data': data,
-            'minute': responded_minute,
-            'current_minute': worker1_current_minute
-        })
+        return data_response('worker1', session, data, responded_minute)
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
 @app.route('/worker1/health', methods=['GET'])
 def worker1_health():
-    return jsonify({
-        'status': 'ok',
-        'initialized': (data_processor is not None and worker1 is not None),
-        'current_lot': worker1_current_lot,
-        'current_minute': worker1_current_minute
-    })
+    return jsonify(worker_health('worker1', worker1))
 
 # Worker2 엔드포인트
 
@@ -157,7 +347,6 @@ def worker2_init():
 
 @app.route('/worker2/set-lot', methods=['POST'])
 def worker2_set_lot():
-    global worker2_current_lot, worker2_current_minute
     try:
         if worker2 is None:
             return jsonify({'status': 'error', 'message': 'Worker2 not initialized'}), 400
@@ -167,11 +356,11 @@ def worker2_set_lot():
         if not lot:
             return jsonify({'status': 'error', 'message': 'Lot is required'}), 400
 
-        result = worker2.calculate_strategy(lot)
+        with data_lock.read():
+            result = worker2.calculate_strategy(lot)
 
         if result['status'] == 'ok':
-            worker2_current_lot = lot
-            worker2_current_minute = 0
+            set_session_lot(current_session(), 'worker2', lot)
             return jsonify({
                 'status': 'ok',
                 'lot': lot,
@@ -187,44 +376,33 @@ def worker2_set_lot():
 
 @app.route('/worker2/data', methods=['GET'])
 def worker2_get_data():
-    global worker2_current_minute
     try:
-        if worker2 is None or worker2_current_lot is None:
+        session = current_session()
+        lot, responded_minute, lot_mode = advance_minute(session, 'worker2')
+        if worker2 is None or lot is None:
             return jsonify({'status': 'error', 'message': 'Worker2 not initialized or no lot set'}), 400
 
-        minute_arg = request.args.get('minute', type=int)
-        if minute_arg is not None:
-            worker2_current_minute = minute_arg
-
         info_box_timestamp = request.args.get('timestamp', None)
-
-        data = worker2.get_chart_data(
-            current_lot=worker2_current_lot,
-            current_minute=worker2_current_minute,
-            info_box_timestamp=info_box_timestamp
+        mode = request.args.get('mode', None)
+
+        data = run_worker(
+            'worker2', 'worker2', worker2, 'get_chart_data',
+            current_lot=lot,
+            current_minute=responded_minute,
+            info_box_timestamp=info_box_timestamp,
+            mode=mode
         )
 
-        responded_minute = worker2_current_minute
-        worker2_current_minute += 1
-
-        return jsonify({
-            'status': 'ok',
-            'data': data,
-            'minute': responded_minute,
-            'current_minute': worker2_current_minute
-        })
+        return data_response('worker2', session, data, responded_minute)
 
+    except OffloadError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), e.status_code
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
 @app.route('/worker2/health', methods=['GET'])
 def worker2_health():
-    return jsonify({
-        'status': 'ok',
-        'initialized': (data_processor is not None and worker2 is not None),
-        'current_lot': worker2_current_lot,
-        'current_minute': worker2_current_minute
-    })
+    return jsonify(worker_health('worker2', worker2))
 
 # Worker5 엔드포인트
 
@@ -234,22 +412,18 @@ def worker5_init():
 
 @app.route('/worker5/set-lot', methods=['POST'])
 def worker5_set_lot():
-    global worker5_current_lot, worker5_current_minute, worker5
     try:
         data = request.get_json()
         lot = data.get('lot')
         if not lot:
             return jsonify({'status': 'error', 'message': 'Lot required'}), 400
         
-        worker5_current_lot = lot
-        worker5_current_minute = 0
+        set_session_lot(current_session(), 'worker5', lot)
 
-        result = worker5.calculate_importance(lot)
-        worker5_current_minute = 0
-        
-        cal_df = worker5.dp.cal_df
-        lot_df = cal_df[cal_df['lot'] == lot].sort_values('date')
-        base_time = lot_df['date'].min().strftime('%Y-%m-%d %H:%M') if not lot_df.empty else None
+        with data_lock.read():
+            result = worker5.calculate_importance(lot)
+            lot_df = worker5.dp.get_lot_df(lot)
+            base_time = lot_df['date'].iloc[0].strftime('%Y-%m-%d %H:%M') if not lot_df.empty else None
         
         return jsonify({
             'status': 'ok',
@@ -262,43 +436,51 @@ def worker5_set_lot():
 
 @app.route('/worker5/data', methods=['GET'])
 def worker5_get_data():
-    global worker5_current_minute
     try:
-        if worker5 is None or worker5_current_lot is None:
+        session = current_session()
+        lot, responded_minute, lot_mode = advance_minute(session, 'worker5')
+        if worker5 is None or lot is None:
             return jsonify({'status': 'error', 'message': 'Worker5 not initialized or no lot set'}), 400
 
-        minute_arg = request.args.get('minute', type=int)
-        if minute_arg is not None:
-            worker5_current_minute = minute_arg
-
         info_box_timestamp = request.args.get('timestamp', None)
 
-        data = worker5.get_chart_data(
-            current_lot=worker5_current_lot,
-            current_minute=worker5_current_minute,
+        data = run_worker(
+            'worker5', 'worker5', worker5, 'get_chart_data',
+            current_lot=lot,
+            current_minute=responded_minute,
             info_box_timestamp=info_box_timestamp
         )
 
-        responded_minute = worker5_current_minute
-        worker5_current_minute += 1
+        return data_response('worker5', session, data, responded_minute)
+    except OffloadError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), e.status_code
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
 
-        return jsonify({
-            'status': 'ok',
-            'data': data,
-            'minute': responded_minute,
-            'current_minute': worker5_current_minute
-        })
+@app.route('/worker5/history', methods=['GET'])
+def worker5_get_history():
+    try:
+        state = current_session().state('worker5')
+        if worker5 is None or state['lot'] is None:
+            return jsonify({'status': 'error', 'message': 'Worker5 not initialized or no lot set'}), 400
+
+        minute = request.args.get('minute', type=int)
+        data = run_worker(
+            'worker5.history', 'worker5', worker5, 'get_importance_history',
+            current_lot=state['lot'], up_to_minute=minute
+        )
+        if data.get('status') != 'ok':
+            return jsonify(data), 400
+
+        return jsonify({'status': 'ok', 'data': data, 'minute': data['current_minute']})
+    except OffloadError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), e.status_code
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
 @app.route('/worker5/health', methods=['GET'])
 def worker5_health():
-    return jsonify({
-        'status': 'ok',
-        'initialized': (data_processor is not None and worker5 is not None),
-        'current_lot': worker5_current_lot,
-        'current_minute': worker5_current_minute
-    })
+    return jsonify(worker_health('worker5', worker5))
 
 # Worker6 엔드포인트
 
@@ -308,22 +490,18 @@ def worker6_init():
 
 @app.route('/worker6/set-lot', methods=['POST'])
 def worker6_set_lot():
-    global worker6_current_lot, worker6_current_minute, worker6
     try:
         data = request.get_json()
         lot = data.get('lot')
         if not lot:
             return jsonify({'status': 'error', 'message': 'Lot required'}), 400
         
-        worker6_current_lot = lot
-        worker6_current_minute = 0
+        set_session_lot(current_session(), 'worker6', lot)
 
-        result = worker6.calculate_sensitivity(lot)
-        worker6_current_minute = 0
-        
-        cal_df = worker6.dp.cal_df
-        lot_df = cal_df[cal_df['lot'] == lot].sort_values('date')
-        base_time = lot_df['date'].min().strftime('%Y-%m-%d %H:%M') if not lot_df.empty else None
+        with data_lock.read():
+            result = worker6.calculate_sensitivity(lot)
+            lot_df = worker6.dp.get_lot_df(lot)
+            base_time = lot_df['date'].iloc[0].strftime('%Y-%m-%d %H:%M') if not lot_df.empty else None
         
         return jsonify({
             'status': 'ok',
@@ -336,48 +514,177 @@ def worker6_set_lot():
 
 @app.route('/worker6/data', methods=['GET'])
 def worker6_get_data():
-    global worker6_current_minute
     try:
-        if worker6 is None or worker6_current_lot is None:
+        session = current_session()
+        lot, responded_minute, lot_mode = advance_minute(session, 'worker6')
+        if worker6 is None or lot is None:
             return jsonify({'status': 'error', 'message': 'Worker6 not initialized or no lot set'}), 400
 
-        minute_arg = request.args.get('minute', type=int)
-        if minute_arg is not None:
-            worker6_current_minute = minute_arg
-
         info_box_timestamp = request.args.get('timestamp', None)
-
-        data = worker6.get_chart_data(
-            current_lot=worker6_current_lot,
-            current_minute=worker6_current_minute,
-            info_box_timestamp=info_box_timestamp
+        mode = request.args.get('mode', None)
+
+        data = run_worker(
+            'worker6', 'worker6', worker6, 'get_chart_data',
+            current_lot=lot,
+            current_minute=responded_minute,
+            info_box_timestamp=info_box_timestamp,
+            mode=mode
         )
 
-        responded_minute = worker6_current_minute
-        worker6_current_minute += 1
+        return data_response('worker6', session, data, responded_minute)
+    except OffloadError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), e.status_code
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
 
-        return jsonify({
-            'status': 'ok',
-            'data': data,
-            'minute': responded_minute,
-            'current_minute': worker6_current_minute
-        })
+@app.route('/worker6/history', methods=['GET'])
+def worker6_get_history():
+    try:
+        state = current_session().state('worker6')
+        if worker6 is None or state['lot'] is None:
+            return jsonify({'status': 'error', 'message': 'Worker6 not initialized or no lot set'}), 400
+
+        minute = request.args.get('minute', type=int)
+        if minute is None:
+            minute = state['minute']
+
+        data = run_worker(
+            'worker6.history', 'worker6', worker6, 'get_sensitivity_history',
+            current_lot=state['lot'], up_to_minute=minute
+        )
+        if data.get('status') != 'ok':
+            return jsonify(data), 400
+
+        return jsonify({'status': 'ok', 'data': data, 'minute': minute})
+    except OffloadError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), e.status_code
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
 @app.route('/worker6/health', methods=['GET'])
 def worker6_health():
-    return jsonify({
-        'status': 'ok',
-        'initialized': (data_processor is not None and worker6 is not None),
-        'current_lot': worker6_current_lot,
-        'current_minute': worker6_current_minute
-    })
+    return jsonify(worker_health('worker6', worker6))
+
+# 통합 대시보드 엔드포인트 (lot slice / 가중치 / cutoff 인덱스 / a_ij 를 1회 계산해 worker 간 공유)
+
+@app.route('/dashboard/data', methods=['GET'])
+def dashboard_data():
+    try:
+        if data_processor is None or None in (worker1, worker2, worker5, worker6):
+            return jsonify({'status': 'error', 'message': 'Workers not initialized'}), 400
+
+        lot = request.args.get('lot')
+        if not lot:
+            return jsonify({'status': 'error', 'message': 'Lot is required'}), 400
+
+        sections = [name.strip() for name in request.args.get('sections', ','.join(SECTIONS)).split(',') if name.strip()]
+        unknown = [name for name in sections if name not in SECTIONS]
+        if unknown:
+            return jsonify({'status': 'error', 'message': f'Unknown sections: {unknown}'}), 400
+
+        minute = request.args.get('minute', type=int)
+        timestamp = request.args.get('timestamp', None)
+        modes = {name: request.args.get(f'{name}_mode') for name in ('worker1', 'worker2', 'worker6')}
+        workers = {'worker1': worker1, 'worker2': worker2, 'worker5': worker5, 'worker6': worker6}
+
+        with data_lock.read():
+            context = DashboardContext(data_processor, lot)
+            if context.lot_df.empty:
+                return jsonify({'status': 'error', 'message': f'No data for lot {lot}'}), 400
+            data = build_dashboard(context, workers, sections, minute, timestamp, modes)
+
+        return jsonify({'status': 'ok', 'lot': lot, 'minute': minute, 'sections': data})
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+# 서버 push 스트림: (session, worker, mode) 채널마다 내부 clock 이 분을 진행, 같은 (lot, 분) 계산은 1번만 수행
+
+STREAM_WORKERS = ('worker1', 'worker2', 'worker5', 'worker6')
+
+def stream_worker(worker_name: str):
+    return {'worker1': worker1, 'worker2': worker2, 'worker5': worker5, 'worker6': worker6}[worker_name]
+
+def timestamp_minute(lot: str, timestamp: str) -> int | None:
+    """InfoBox timestamp → lot 시작 분 기준 경과 분 (해석 실패 시 None)"""
+    with data_lock.read():
+        lot_df = data_processor.get_lot_df(lot)
+        if lot_df.empty:
+            return None
+        base = lot_df['date'].iloc[0].floor('min')
+    try:
+        return max(0, int((pd.Timestamp(timestamp) - base) // pd.Timedelta(minutes=1)))
+    except (ValueError, TypeError):
+        return None
+
+def plan_stream(channel: tuple) -> tuple | None:
+    """채널 세션 cursor 를 1분 진행하고 (계산 키, 메시지 메타) 반환, lot 미설정이면 None"""
+    session_id, worker_name, mode = channel
+    session = sessions.get(session_id)
+    with session.lock:
+        state = session.state(worker_name)
+        lot, timestamp = state['lot'], state['timestamp']
+    if lot is None or stream_worker(worker_name) is None:
+        return None
+
+    minute = timestamp_minute(lot, timestamp) if timestamp else None
+    with session.lock:
+        if state['lot'] != lot:
+            return None
+        if minute is not None:
+            state['minute'] = minute
+        responded_minute = state['minute']
+        state['minute'] += 1
+        if worker_name == 'worker1':
+            mode = state['mode']
+
+    key = (worker_name, lot, responded_minute, timestamp, mode)
+    return key, {'status': 'ok', 'lot': lot, 'minute': responded_minute, 'current_minute': responded_minute + 1}
+
+def compute_stream(key: tuple) -> dict:
+    worker_name, lot, minute, timestamp, mode = key
+    kwargs = {'current_lot': lot, 'current_minute': minute, 'info_box_timestamp': timestamp}
+    if worker_name != 'worker5':
+        kwargs['mode'] = mode
+    return run_worker(worker_name, worker_name, stream_worker(worker_name), 'get_chart_data', **kwargs)
+
+stream_hub = StreamHub(
+    plan_stream, compute_stream,
+    interval=float(os.environ.get('WORKERS_STREAM_INTERVAL', '5')),
+)
+
+@app.route('/<worker_name>/stream', methods=['GET'])
+def worker_stream(worker_name):
+    if worker_name not in STREAM_WORKERS:
+        return jsonify({'status': 'error', 'message': f'Unknown worker: {worker_name}'}), 404
+    if stream_worker(worker_name) is None:
+        return jsonify({'status': 'error', 'message': f'{worker_name} not initialized'}), 400
+
+    session = current_session()
+    mode = request.args.get('mode') if worker_name in ('worker2', 'worker6') else None
+    channel = (session.session_id, worker_name, mode)
+    return Response(
+        stream_hub.events(channel),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+@app.route('/<worker_name>/set-timestamp', methods=['POST'])
+def worker_set_timestamp(worker_name):
+    """스트림이 분을 계산할 InfoBox timestamp 설정 (null 이면 자동 진행)"""
+    if worker_name not in STREAM_WORKERS:
+        return jsonify({'status': 'error', 'message': f'Unknown worker: {worker_name}'}), 404
+
+    body = request.get_json(silent=True) or {}
+    session = current_session()
+    with session.lock:
+        session.state(worker_name)['timestamp'] = body.get('timestamp') or None
+    return jsonify({'status': 'ok', 'timestamp': body.get('timestamp') or None})
 
 # 공통 엔드포인트
 
 @app.route('/health', methods=['GET'])
 def health():
+    session = current_session()
     return jsonify({
         'status': 'ok',
         'data_processor_initialized': data_processor is not None,
@@ -385,12 +692,49 @@ def health():
         'worker2_initialized': worker2 is not None,
         'worker5_initialized': worker5 is not None,
         'worker6_initialized': worker6 is not None,
-        'worker1_current_lot': worker1_current_lot,
-        'worker2_current_lot': worker2_current_lot,
-        'worker5_current_lot': worker5_current_lot,
-        'worker6_current_lot': worker6_current_lot,
+        'worker1_current_lot': session.state('worker1')['lot'],
+        'worker2_current_lot': session.state('worker2')['lot'],
+        'worker5_current_lot': session.state('worker5')['lot'],
+        'worker6_current_lot': session.state('worker6')['lot'],
+        'sessions': len(sessions),
+        'cache': cache_registry.stats(),
+        'offload': offload.stats() if offload is not None else None,
+        'streams': stream_hub.stats(),
+        'replay': replay.stats() if replay is not None else None,
         'data_rows': len(data_processor.cal_df) if data_processor is not None else 0
     })
 
+def serve_processes(count: int, port: int) -> None:
+    """loader 로 데이터셋을 1회 게시한 뒤 attach 모드 서빙 프로세스 count 개를 port, port+1, ... 에 실행"""
+    result = subprocess.run([sys.executable, os.path.abspath(__file__), '--publish'])
+    if result.returncode != 0:
+        sys.exit(result.returncode)
+    env = {**os.environ, 'WORKERS_DATASET': 'attach'}
+    procs = [
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), '--port', str(port + i)], env=env)
+        for i in range(count)
+    ]
+    try:
+        for proc in procs:
+            proc.wait()
+    except KeyboardInterrupt:
+        for proc in procs:
+            proc.terminate()
+
 if __name__ == '__main__':
-    app.run(host='127.0.0.1', port=5002, debug=False, use_reloader=False)
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--port', type=int, default=5002)
+    parser.add_argument('--publish', action='store_true', help='공유 데이터셋 게시 후 종료 (loader)')
+    parser.add_argument('--processes', type=int, default=0, help='attach 모드 서빙 프로세스 수')
+    parser.add_argument('--build-replay', action='store_true', help='replay store 사전 계산 후 종료')
+    args = parser.parse_args()
+
+    if args.publish:
+        print(publish_dataset())
+    elif args.build_replay:
+        print(build_replay())
+    elif args.processes > 0:
+        serve_processes(args.processes, args.port)
+    else:
+        # 세션별 요청을 동시에 처리 (세션 상태는 프로세스 메모리에 있으므로 프로세스 내부는 스레드)
+        app.run(host='127.0.0.1', port=args.port, debug=False, use_reloader=False, threaded=True)
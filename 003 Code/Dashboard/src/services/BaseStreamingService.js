@@ -1,3 +1,5 @@
+import { applyDeltaOps } from "../utils/payloadDelta";
+
 /* 공통 스트리밍 서비스 베이스 클래스 */
 class BaseStreamingService {
   constructor(serverUrl = "http://localhost:4000") {
@@ -9,6 +11,7 @@ class BaseStreamingService {
     this._maxReconnect = 7;
     this._reconnectTimer = null;
     this._endpoint = null;
+    this._streamPayload = null; // delta 메시지 적용 기준 (직전 전체 payload)
   }
 
   startStreaming(endpoint = "") {
@@ -37,7 +40,8 @@ class BaseStreamingService {
 
       this.eventSource.onmessage = (event) => {
         try {
-          const data = JSON.parse(event.data);
+          const data = this._resolveStreamPayload(JSON.parse(event.data));
+          if (!data) return;
           if (data?.error) {
             console.error(`${this.constructor.name} 스트리밍 오류:`, data.error);
             this.handleStreamingError(data.error);
@@ -62,8 +66,29 @@ class BaseStreamingService {
     }
   }
 
+  /**
+   * 서버 delta 메시지({ stream_delta, base, ops })를 직전 payload에 적용해 전체 payload로 복원
+   * - 기준 version이 다르면 재연결(새 연결 첫 메시지는 전체 payload)
+   */
+  _resolveStreamPayload(message) {
+    if (!message?.stream_delta) {
+      if (message?.stream_version !== undefined) this._streamPayload = message;
+      return message;
+    }
+    if (!this._streamPayload || this._streamPayload.stream_version !== message.base) {
+      console.warn(`${this.constructor.name} delta 기준 불일치, 재연결`);
+      const endpoint = this._endpoint;
+      this.stopStreaming();
+      this.startStreaming(endpoint);
+      return null;
+    }
+    this._streamPayload = applyDeltaOps(this._streamPayload, message.ops);
+    return this._streamPayload;
+  }
+
   stopStreaming() {
     this.isStreaming = false;
+    this._streamPayload = null;
     if (this.eventSource) {
       try { this.eventSource.close(); } catch {}
       this.eventSource = null;
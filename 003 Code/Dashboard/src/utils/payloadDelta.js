@@ -0,0 +1,79 @@
+// 워커 payload delta 유틸 (Express 서버와 브라우저 공용)
+// 연산 형식은 server/workers/delta.py 와 동일: ['set', path, value] / ['append', path, items] / ['del', path]
+
+const isPlainObject = (v) => v !== null && typeof v === "object" && !Array.isArray(v);
+
+/**
+ * 값 비교 (NaN 동일 취급, 같은 참조는 바로 true)
+ */
+export const samePayloadValue = (a, b) => {
+  if (a === b) return true;
+  if (typeof a === "number" && typeof b === "number") return Number.isNaN(a) && Number.isNaN(b);
+  if (Array.isArray(a) && Array.isArray(b)) {
+    if (a.length !== b.length) return false;
+    for (let i = 0; i < a.length; i += 1) {
+      if (!samePayloadValue(a[i], b[i])) return false;
+    }
+    return true;
+  }
+  if (isPlainObject(a) && isPlainObject(b)) {
+    const keys = Object.keys(a);
+    if (keys.length !== Object.keys(b).length) return false;
+    return keys.every((k) => Object.prototype.hasOwnProperty.call(b, k) && samePayloadValue(a[k], b[k]));
+  }
+  return false;
+};
+
+/**
+ * 두 payload 차이 → 연산 목록 (객체는 키 단위, 배열은 앞부분 일치 시 append)
+ */
+export const diffPayload = (prev, next, path = []) => {
+  if (isPlainObject(prev) && isPlainObject(next)) {
+    const ops = [];
+    Object.keys(next).forEach((key) => {
+      if (!Object.prototype.hasOwnProperty.call(prev, key)) {
+        ops.push(["set", [...path, key], next[key]]);
+      } else {
+        ops.push(...diffPayload(prev[key], next[key], [...path, key]));
+      }
+    });
+    Object.keys(prev).forEach((key) => {
+      if (!Object.prototype.hasOwnProperty.call(next, key)) ops.push(["del", [...path, key]]);
+    });
+    return ops;
+  }
+  if (prev === next) return [];
+  if (Array.isArray(prev) && Array.isArray(next) && prev.length > 0 && prev.length <= next.length) {
+    const head = prev.length === next.length ? next : next.slice(0, prev.length);
+    if (samePayloadValue(prev, head)) {
+      return next.length > prev.length ? [["append", path, next.slice(prev.length)]] : [];
+    }
+  }
+  if (samePayloadValue(prev, next)) return [];
+  return [["set", path, next]];
+};
+
+/**
+ * 연산 적용 (copy-on-write: 변경 경로의 객체/배열만 새로 만들고 나머지는 참조 공유)
+ */
+export const applyDeltaOps = (base, ops = []) => {
+  let root = base;
+  ops.forEach(([kind, path, value]) => {
+    if (!path.length) {
+      root = kind === "append" ? [...(root || []), ...value] : value;
+      return;
+    }
+    root = isPlainObject(root) ? { ...root } : {};
+    let node = root;
+    for (let i = 0; i < path.length - 1; i += 1) {
+      const child = node[path[i]];
+      node[path[i]] = Array.isArray(child) ? [...child] : { ...(child || {}) };
+      node = node[path[i]];
+    }
+    const key = path[path.length - 1];
+    if (kind === "set") node[key] = value;
+    else if (kind === "append") node[key] = [...(node[key] || []), ...value];
+    else if (kind === "del") delete node[key];
+  });
+  return root;
+};
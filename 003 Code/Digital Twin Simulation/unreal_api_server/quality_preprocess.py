@@ -65,39 +65,144 @@ def load_from_influx():
 
 # ---------------- 기존 점수 계산 함수들 ---------------- #
 def drop_missing_cols(df, rat):
-    df = df.copy()
     null_ratio = df.isnull().mean() * 100
     cols_to_drop = null_ratio[null_ratio > rat].index.tolist()
     df = df.drop(columns=cols_to_drop)
     return df, cols_to_drop
 
 
+def _rolling_outlier_mask(values, window=5, z_thresh=3, block_size=1 << 20):
+    """2-D 배열(행=시간, 열=변수) 전체에 대한 centered rolling z-score 이상치 마스크
+
+    pandas rolling(window, center=True, min_periods=1) 과 같은 구간을 사용하며,
+    컬럼 루프 대신 window 오프셋만큼만 배열 연산을 반복한다.
+    임시 배열은 block_size 원소 단위 컬럼 블록으로 재사용해 메모리를 데이터 크기에 맞춘다.
+    """
+    T, C = values.shape
+    mask = np.zeros((T, C), dtype=bool)
+    if T == 0 or C == 0:
+        return mask
+
+    offset = (window - 1) // 2          # pandas center=True 기준 오른쪽 폭
+    left = window - 1 - offset          # 왼쪽 폭
+    step = max(1, min(C, block_size // max(T, 1)))
+
+    for c0 in range(0, C, step):
+        block = values[:, c0:c0 + step]
+        B = block.shape[1]
+
+        padded = np.zeros((T + window - 1, B))
+        valid = np.zeros((T + window - 1, B), dtype=bool)
+        np.isnan(block, out=valid[left:left + T])
+        np.logical_not(valid[left:left + T], out=valid[left:left + T])
+        np.copyto(padded[left:left + T], block, where=valid[left:left + T])
+
+        count = np.zeros((T, B))
+        total = np.zeros((T, B))
+        lo = np.full((T, B), np.inf)
+        hi = np.full((T, B), -np.inf)
+        for k in range(window):
+            s, v = padded[k:k + T], valid[k:k + T]
+            count += v
+            total += s
+            np.minimum(lo, s, out=lo, where=v)
+            np.maximum(hi, s, out=hi, where=v)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / count         # count == 0 → NaN
+
+            sq = total                   # total 버퍼 재사용
+            sq.fill(0.0)
+            dev = np.empty((T, B))
+            for k in range(window):
+                np.subtract(padded[k:k + T], mean, out=dev)
+                dev *= valid[k:k + T]
+                dev *= dev
+                sq += dev
+            count -= 1
+            std = np.sqrt(sq / count, out=sq)  # ddof=1
+
+            # 구간 값이 모두 같으면 pandas 와 동일하게 mean 은 그 값, std 는 0
+            const = lo == hi
+            mean[const] = lo[const]
+            std[const] = 0.0
+            std[count < 1] = np.nan      # 관측 1개 이하 → NaN
+
+            np.subtract(block, mean, out=dev)
+            dev /= std
+            np.abs(dev, out=dev)
+            np.greater(dev, z_thresh, out=mask[:, c0:c0 + B])
+
+    return mask
+
+
+def _ffill_bfill(values):
+    """2-D 배열 열 단위 ffill → bfill"""
+    T = len(values)
+    if T == 0:
+        return values
+    rows = np.arange(T)[:, None]
+
+    idx = np.where(np.isnan(values), 0, rows)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    values = np.take_along_axis(values, idx, axis=0)
+
+    idx = np.where(np.isnan(values), T - 1, rows)
+    idx = np.minimum.accumulate(idx[::-1], axis=0)[::-1]
+    return np.take_along_axis(values, idx, axis=0)
+
+
+def _write_back(df, num_cols, values, changed):
+    """변경된 컬럼만 df 에 반영 (정수형은 기존 loc NaN 대입과 같이 항상 float64 로 승격)"""
+    for i, col in enumerate(num_cols):
+        dtype = df[col].dtype
+        if dtype.kind in 'iu':
+            df[col] = values[:, i]
+        elif changed[i]:
+            df[col] = values[:, i].astype(dtype, copy=False)
+
+
 def interpolate(df, obj_cols):
     df = df.copy()
-    cols = df.select_dtypes(include='number').columns.tolist()
-    cols += [col for col in obj_cols if col in df.columns]
-    for col in cols:
-        df[col] = df[col].ffill().bfill()
+    num_cols = df.select_dtypes(include='number').columns
+    changed = df[num_cols].isnull().to_numpy().any(axis=0)
+    if changed.any():
+        values = df[num_cols].to_numpy(dtype=float)
+        values[:, changed] = _ffill_bfill(values[:, changed])
+        for i in np.flatnonzero(changed):
+            df[num_cols[i]] = values[:, i].astype(df[num_cols[i]].dtype, copy=False)
+    for col in obj_cols:
+        if col in df.columns and col not in num_cols:
+            df[col] = df[col].ffill().bfill()
     return df
 
 
 def outliers(df, window=5, z_thresh=3):
     df = df.copy()
     num_cols = df.select_dtypes(include='number').columns
-    for col in num_cols:
-        rolling_mean = df[col].rolling(window, center=True, min_periods=1).mean()
-        rolling_std = df[col].rolling(window, center=True, min_periods=1).std()
-        z_scores = (df[col] - rolling_mean) / rolling_std
-        outliers = z_scores.abs() > z_thresh
-        df.loc[outliers, col] = np.nan
+    if len(num_cols) == 0:
+        return df
+    values = df[num_cols].to_numpy(dtype=float)
+    mask = _rolling_outlier_mask(values, window, z_thresh)
+    values[mask] = np.nan
+    _write_back(df, num_cols, values, mask.any(axis=0))
     return df
 
 
-def prepro(df, rat=20, obj_cols=[]):
-    df = df.copy()
+def prepro(df, rat=20, obj_cols=[], window=5, z_thresh=3):
     df, _ = drop_missing_cols(df, rat)
-    df = outliers(df)
-    df = interpolate(df, obj_cols)
+    num_cols = df.select_dtypes(include='number').columns
+    if len(num_cols) and len(df):
+        # 이상치 NaN 처리 + ffill/bfill 을 전체 숫자형 컬럼 2-D 배열로 1회 처리
+        values = df[num_cols].to_numpy(dtype=float)
+        values[_rolling_outlier_mask(values, window, z_thresh)] = np.nan
+        changed = np.isnan(values).any(axis=0)
+        if changed.any():
+            values[:, changed] = _ffill_bfill(values[:, changed])
+        _write_back(df, num_cols, values, changed)
+    for col in obj_cols:
+        if col in df.columns and not pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = df[col].ffill().bfill()
     for col in obj_cols:
         if col in df.columns:
             dummies = pd.get_dummies(df[col], prefix=col)